@@ -0,0 +1,2 @@
+# preprocess/preprocess_test.py는 main.py에서 쓰는 전처리 결과 확인용 함수 모듈이라 테스트로 수집하지 않음
+collect_ignore = ["preprocess/preprocess_test.py"]
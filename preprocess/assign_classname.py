@@ -1,3 +1,6 @@
+from util.spatial_index import GridIndex
+
+
 def assignClassNameToBlocks(blocks, yolo_objects):
     """
     각 block에 대해 yolo_objects를 참고하여 class_name을 부여한다.
@@ -32,6 +35,9 @@ def assignClassNameToBlocks(blocks, yolo_objects):
         horizontal = get_horizontal_overlap(bbox1, bbox2)
         return vertical * horizontal
 
+    # 블락과 겹칠 수 있는 yolo object만 비교하도록 공간 인덱스 생성
+    yolo_index = GridIndex.fromBboxes([obj.get("bbox") for obj in yolo_objects])
+
     # blocks를 하나씩 순회
     for block in blocks:
         block_bbox = block.get("bbox")
@@ -42,8 +48,9 @@ def assignClassNameToBlocks(blocks, yolo_objects):
 
         matching_objects = []  # block과 충분히 겹치는 yolo object 저장 리스트
 
-        # 모든 yolo object들과 겹침 여부 판단
-        for obj in yolo_objects:
+        # 겹칠 수 있는 yolo object들과 겹침 여부 판단 (입력 순서 유지)
+        for obj_idx in yolo_index.query(block_bbox):
+            obj = yolo_objects[obj_idx]
             obj_bbox = obj.get("bbox")
             if not obj_bbox:
                 continue
@@ -2,6 +2,8 @@ from text_extract.text_extract import blockText
 from util.line_utils import calculateAverageGap
 from styled_translate.assign_style import dirToRotation
 from util.block_utils import *
+from util.spatial_index import GridIndex
+from util.line_features import getLineFeatures
 from typing import Dict, List
 
 # 주어진 두 bbox가 진행 방향(rotate 기준)에서 얼마나 겹치는지 비율을 계산
@@ -60,7 +62,7 @@ def adjustBlockBbox(block, leftBound, rightBound):
     if not lines:
         return
 
-    rotate = dirToRotation(lines[0]["dir"])
+    rotate = getLineFeatures(lines[0]).rotate
     line_gap = calculateAverageGap(lines, rotate)
 
     for i in range(len(lines)):
@@ -88,18 +90,21 @@ def adjustBlocks(blocks, adjust_objects):
             width = max(0, min(b1[3], b2[3]) - max(b1[1], b2[1]))
         return height, width
 
+    # 블락과 겹칠 수 있는 객체만 비교하도록 공간 인덱스 생성
+    adjust_index = GridIndex.fromBboxes([adj_block.get("bbox") for adj_block in adjust_objects])
+
     for block in blocks:
         block_bbox = block.get("bbox")
         lines = block.get("lines", [])
         if not block_bbox or not lines:
             continue
 
-        rotate = dirToRotation(lines[0]["dir"])
+        rotate = getLineFeatures(lines[0]).rotate
         adjustBlockBbox(block, block_bbox[0], block_bbox[2])
 
         matching_adj_bboxes = []
-        for adj_block in adjust_objects:
-            adj_bbox = adj_block.get("bbox")
+        for adj_idx in adjust_index.query(block_bbox):
+            adj_bbox = adjust_objects[adj_idx].get("bbox")
             if not adj_bbox:
                 continue
 
@@ -3,6 +3,7 @@ import re
 from text_extract.text_extract import lineText
 from util.line_utils import *
 from util.block_utils import *
+from util.line_features import getLineFeatures
 
 
 # 블록 다시 나누기 전, 한 라인 내에 단순 스페이스 이상으로 멀리 떨어져 있는 요소들은 따로 블락으로 나누는 전처리 하기.
@@ -42,7 +43,7 @@ def ends_with_punctuation(prev_line, _, block_bbox, align, src_lang, target_lang
     # 이전 줄이 마침 기호로 끝나는가(동시에 좌측 정렬일 때는 block 너비의 97% 이하여야 함.)
     
     END_PUNCTUATIONS = {'.', ':', '!', '?', '”', '"'}
-    text = "".join(span["text"] for span in prev_line["spans"]).strip()
+    text = getLineFeatures(prev_line).raw_text.strip()
     
     return text and text[-1] in END_PUNCTUATIONS and (align == ALIGN_CENTER or isShortLine(prev_line, _, block_bbox,src_lang =src_lang, target_lang=target_lang, ratio = 0.97))
 
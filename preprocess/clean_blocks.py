@@ -1,4 +1,4 @@
-from text_extract.text_extract import lineText
+from util.line_features import getLineFeatures
 
 def cleanBlocks(blocks):
     """
@@ -12,7 +12,7 @@ def cleanBlocks(blocks):
 
     for block in blocks:
         # 빈 line 제거
-        cleaned_lines = [line for line in block.get("lines", []) if lineText(line).strip() != ""]
+        cleaned_lines = [line for line in block.get("lines", []) if getLineFeatures(line).stripped_text != ""]
 
         if cleaned_lines:
             # line이 하나라도 남아있으면 block 추가
@@ -1,5 +1,8 @@
 import pymupdf
 import math
+from bisect import bisect_right
+from heapq import merge as mergeSorted
+from util.spatial_index import GridIndex, MaxSegmentTree
 from util.line_utils import isLinesStartWithSameX
 from util.line_utils import *
 
@@ -61,6 +64,71 @@ def mergeBlocksByLineOverlap(blocks):
         else:
             return "Text"
 
+    # 두 line이 이어지는 line인지 판단하는 함수 (last_line 뒤에 next_first_line이 이어지는지)
+    def can_merge(last_line, next_first_line):
+        # span 정보: font size 기준으로 허용 x 간격 설정
+        last_span = last_line["spans"][-1]
+        first_span = next_first_line["spans"][0]
+
+        # 조건 1: x 간격이 적절한지 확인
+        x_gap = next_first_line["bbox"][0] - last_line["bbox"][2]
+        font_size_max = max(last_span["size"], first_span["size"])
+        x_gap_close = -font_size_max * 1.5 <= x_gap <= font_size_max * 1.5
+
+        # 조건 2: y축으로 충분히 겹치는지 확인
+        y0_a, y3_a = last_line["bbox"][1], last_line["bbox"][3]
+        y0_b, y3_b = next_first_line["bbox"][1], next_first_line["bbox"][3]
+        y_overlap = max(0, min(y3_a, y3_b) - max(y0_a, y0_b))
+        min_height = min(y3_a - y0_a, y3_b - y0_b)
+        y_overlap_enough = y_overlap >= min_height * 0.5
+
+        # 조건 3: line의 진행 방향이 일치하는지 확인
+        line_aligned = hasSameDirection(last_line, next_first_line)
+
+        return x_gap_close and y_overlap_enough and line_aligned
+
+    first_lines = [getFirstLine(block) for block in blocks]
+
+    # 각 block 첫 line의 시작점(x0)과 y 범위를 격자 인덱스에 넣어, 이어질 수 있는 block만 후보로 찾음
+    # 높이가 0 이하인 line은 y 겹침 조건이 항상 참이므로 인덱스 대신 항상 후보로 둠
+    start_bboxes = []
+    always_candidates = []
+    for idx, line in enumerate(first_lines):
+        if not line:
+            start_bboxes.append(None)
+            continue
+        x0, y0, _, y1 = line["bbox"]
+        if y1 - y0 > 0:
+            start_bboxes.append((x0, y0, x0, y1))
+        else:
+            start_bboxes.append(None)
+            always_candidates.append(idx)
+    start_index = GridIndex.fromBboxes(start_bboxes)
+
+    # x 간격 허용치는 두 span의 font size 중 큰 값에 비례하므로, 첫 span의 최대 font size로 후보 범위를 넉넉히 잡음
+    max_first_size = max((line["spans"][0]["size"] for line in first_lines if line and line.get("spans")), default=0)
+    indexed_bboxes = [bbox for bbox in start_bboxes if bbox]
+    page_y_range = (min((bbox[1] for bbox in indexed_bboxes), default=0), max((bbox[3] for bbox in indexed_bboxes), default=0))
+
+    # after 뒤의 아직 병합되지 않은 block 중 current_block에 이어지는 첫 번째 block 번호 (없으면 None)
+    def find_next_block(current_block, after):
+        last_line = getLastLine(current_block)
+        if not last_line:
+            return None
+
+        _, y0, x1, y1 = last_line["bbox"]
+        if not y1 - y0 > 0:
+            y0, y1 = page_y_range  # 높이가 0 이하면 y 겹침 조건이 항상 참
+        x_margin = max(last_line["spans"][-1]["size"], max_first_size, 0) * 1.5
+
+        candidates = start_index.query((x1 - x_margin, y0, x1 + x_margin, y1))
+        for j in mergeSorted(candidates, always_candidates):
+            if j <= after or j in used_indices:
+                continue
+            if can_merge(last_line, first_lines[j]):
+                return j
+        return None
+
     merged_blocks = []
     used_indices = set()  # 이미 병합에 사용된 블록의 인덱스를 저장
 
@@ -75,42 +143,13 @@ def mergeBlocksByLineOverlap(blocks):
 
         current_block = blocks[i]
 
-        # 이후 블록들과 병합 조건을 비교
-        for j in range(i + 1, len(blocks)):
-            if j in used_indices:
-                continue
-
-            next_block = blocks[j]
-            last_line = getLastLine(current_block)
-            next_first_line = getFirstLine(next_block)
-
-            if not last_line or not next_first_line:
-                continue
-
-            # span 정보: font size 기준으로 허용 x 간격 설정
-            last_span = last_line["spans"][-1]
-            first_span = next_first_line["spans"][0]
-
-            # 조건 1: x 간격이 적절한지 확인
-            x_gap = next_first_line["bbox"][0] - last_line["bbox"][2]
-            font_size_max = max(last_span["size"], first_span["size"])
-            x_gap_close = -font_size_max * 1.5 <= x_gap <= font_size_max * 1.5
-
-            # 조건 2: y축으로 충분히 겹치는지 확인
-            y0_a, y3_a = last_line["bbox"][1], last_line["bbox"][3]
-            y0_b, y3_b = next_first_line["bbox"][1], next_first_line["bbox"][3]
-            y_overlap = max(0, min(y3_a, y3_b) - max(y0_a, y0_b))
-            min_height = min(y3_a - y0_a, y3_b - y0_b)
-            y_overlap_enough = y_overlap >= min_height * 0.5
-
-            # 조건 3: line의 진행 방향이 일치하는지 확인
-            line_aligned = hasSameDirection(last_line, next_first_line)
-
-            # 모든 조건을 만족하면 group에 추가
-            if x_gap_close and y_overlap_enough and line_aligned:
-                group.append(next_block)
-                used_indices.add(j)
-                current_block = next_block  # 병합 기준을 업데이트
+        # 이후 블록들 중 병합 조건을 만족하는 블록을 순서대로 찾아 이어 붙임
+        j = find_next_block(current_block, i)
+        while j is not None:
+            group.append(blocks[j])
+            used_indices.add(j)
+            current_block = blocks[j]  # 병합 기준을 업데이트
+            j = find_next_block(current_block, j)
 
         # group을 병합하여 하나의 block으로 생성
         merged_lines = []
@@ -225,33 +264,107 @@ def mergeBlocksByYGap(blocks, src_lang, target_lang):
     def group_blocks_by_y_then_x(blocks):
         return sorted(blocks, key=lambda b: (get_block_top_y(b), b["bbox"][0]))
 
+    # y 간격이 너무 커서 더 이상 병합할 block을 찾지 않아도 되는지 판단하는 함수
+    def is_gap_too_large(prev, curr):
+        vertical_gap, min_height = get_vertical_gap_and_min_height(prev, curr)
+        if src_lang == "English" and vertical_gap > 0.5 * min_height:
+            return True
+        if src_lang == "한국어" and vertical_gap > 0.8 * min_height:
+            return True
+        return False
+
     # 1. block 정렬
     blocks = group_blocks_by_y_then_x(blocks)
     used = [False] * len(blocks)  # 병합에 사용된 블록 표시
     merged_blocks = []
 
+    n = len(blocks)
+    tops = [get_block_top_y(block) for block in blocks]  # 정렬 기준이므로 오름차순
+    gap_ratio = {"English": 0.5, "한국어": 0.8}.get(src_lang)
+
+    # 아직 병합되지 않은 다음 block으로 건너뛰기 위한 포인터 (경로 압축)
+    next_unused_ptr = list(range(n + 1))
+
+    def next_unused(idx):
+        root = idx
+        while next_unused_ptr[root] != root:
+            root = next_unused_ptr[root]
+        while next_unused_ptr[idx] != root:
+            next_unused_ptr[idx], idx = root, next_unused_ptr[idx]
+        return root
+
+    # y 간격 조건: top - prev_bottom > ratio * min(prev_h, h)
+    #   ⇔ top > prev_bottom + ratio * prev_h  (tops가 정렬되어 있으므로 이분 탐색)
+    #   또는 top - ratio * h > prev_bottom  (세그먼트 트리로 검색)
+    # 두 검색은 후보를 찾는 데만 쓰고, 실제 판정은 is_gap_too_large로 다시 합니다.
+    gap_tree = None
+    if gap_ratio is not None:
+        gap_tree = MaxSegmentTree([
+            top - gap_ratio * (block["lines"][0]["bbox"][3] - block["lines"][0]["bbox"][1]) if block.get("lines") else top
+            for top, block in zip(tops, blocks)
+        ])
+
+    def mark_used(idx):
+        used[idx] = True
+        next_unused_ptr[idx] = idx + 1
+        if gap_tree is not None:
+            gap_tree.update(idx, float("-inf"))
+
+    # lo 이후 아직 병합되지 않은 block 중 prev와의 y 간격 때문에 탐색이 끝나는 첫 위치 (없으면 n)
+    def find_stop(prev, lo):
+        if gap_ratio is None:
+            return n
+
+        last_bbox = prev["lines"][-1]["bbox"]
+        prev_bottom = last_bbox[3]
+        eps = 1e-6 * (1 + abs(prev_bottom))
+
+        a = next_unused(bisect_right(tops, prev_bottom + gap_ratio * (last_bbox[3] - last_bbox[1]) - eps, lo))
+        b = gap_tree.findFirstAbove(lo, prev_bottom - eps)
+        while True:
+            j = min(a, b)
+            if j >= n:
+                return n
+            if is_gap_too_large(prev, blocks[j]):
+                return j
+            if j == a:
+                a = next_unused(a + 1)
+            if j == b:
+                b = gap_tree.findFirstAbove(j + 1, prev_bottom - eps)
+
+    # x축 범위(점 대신 top 높이의 가로 선분)를 격자 인덱스에 넣어, x축으로 겹칠 수 있는 block만 후보로 찾음
+    span_index = GridIndex.fromBboxes([(block["bbox"][0], top, block["bbox"][2], top) for top, block in zip(tops, blocks)])
+
+    # [lo, hi) 범위의 아직 병합되지 않은 block 중 prev와 병합할 수 있는 첫 번째 block 번호 (없으면 None)
+    def find_merge(prev, lo, hi):
+        if lo >= hi:
+            return None
+        x0, _, x1, _ = prev["bbox"]
+        for j in span_index.query((x0, tops[lo], x1, tops[hi - 1])):
+            if j < lo or j >= hi or used[j]:
+                continue
+            if can_merge(prev, blocks[j], src_lang, target_lang):
+                return j
+        return None
+
     # 2. block들을 순서대로 병합
     for i, base in enumerate(blocks):
         if used[i]:
             continue
 
         group = [base]  # base block과 병합할 그룹 초기화
-        used[i] = True
-
-        # base 다음 block들과 비교
-        for j in range(i + 1, len(blocks)):
-            if used[j]:
-                continue
-
-            vertical_gap, min_height = get_vertical_gap_and_min_height(group[-1], blocks[j])
-            if src_lang == "English" and vertical_gap > 0.5 * min_height:
-                break  # y 간격이 크면 더 이상 병합 불가
-            if src_lang == "한국어" and vertical_gap > 0.8 * min_height:
+        mark_used(i)
+
+        # base 다음 block들 중 y 간격이 커지기 전까지 병합할 수 있는 block을 순서대로 이어 붙임
+        pos = i
+        while True:
+            stop = find_stop(group[-1], pos + 1)
+            j = find_merge(group[-1], pos + 1, stop)
+            if j is None:
                 break
-
-            if can_merge(group[-1], blocks[j], src_lang, target_lang):
-                group.append(blocks[j])
-                used[j] = True
+            group.append(blocks[j])
+            mark_used(j)
+            pos = j
 
         # 3. 그룹을 하나의 block으로 병합
         merged_lines = []
@@ -0,0 +1,210 @@
+import copy
+import random
+import pytest
+from preprocess.assign_classname import assignClassNameToBlocks
+from preprocess.bbox_adjust import normalizeAllBboxes
+from preprocess.clean_blocks import cleanBlocks
+from preprocess.continuos_block_merge import mergeContinuosBlocks, hasSameDirection
+from preprocess.preprocess_fixtures import FIXTURE_SEEDS, FIXTURE_CLASS_NAMES, LINE_DIRECTIONS, fixturePageInfos
+from preprocess.split_blocks_by_line_gap import splitBlocksByLineGap
+from util.line_utils import isSameFontSize
+
+
+def referenceMergeGroup(group):
+    """이전 구현의 group 병합: lines를 잇고 bbox를 합친 뒤 넓이가 가장 큰 class_name 선택"""
+    merged_lines = []
+    merged_bbox = [float('inf'), float('inf'), float('-inf'), float('-inf')]
+    area_by_class = {}
+    for block in group:
+        merged_lines.extend(block["lines"])
+        merged_bbox[0] = min(merged_bbox[0], block["bbox"][0])
+        merged_bbox[1] = min(merged_bbox[1], block["bbox"][1])
+        merged_bbox[2] = max(merged_bbox[2], block["bbox"][2])
+        merged_bbox[3] = max(merged_bbox[3], block["bbox"][3])
+
+        x0, y0, x1, y1 = block["bbox"]
+        class_name = block.get("class_name", "Text")
+        area_by_class[class_name] = area_by_class.get(class_name, 0) + max(0, x1 - x0) * max(0, y1 - y0)
+
+    return {
+        "lines": merged_lines,
+        "bbox": merged_bbox,
+        "type": group[0].get("type", 0),
+        "class_name": max(area_by_class.items(), key=lambda x: x[1])[0] if area_by_class else "Text",
+    }
+
+
+def referenceMergeBlocksByLineOverlap(blocks):
+    """이전 mergeBlocksByLineOverlap: 남은 모든 block과 차례로 비교"""
+    merged_blocks = []
+    used_indices = set()
+
+    for i in range(len(blocks)):
+        if i in used_indices:
+            continue
+
+        group = [blocks[i]]
+        used_indices.add(i)
+        current_block = blocks[i]
+
+        for j in range(i + 1, len(blocks)):
+            if j in used_indices:
+                continue
+
+            next_block = blocks[j]
+            last_line = current_block["lines"][-1] if current_block.get("lines") else None
+            next_first_line = next_block["lines"][0] if next_block.get("lines") else None
+            if not last_line or not next_first_line:
+                continue
+
+            last_span = last_line["spans"][-1]
+            first_span = next_first_line["spans"][0]
+
+            x_gap = next_first_line["bbox"][0] - last_line["bbox"][2]
+            font_size_max = max(last_span["size"], first_span["size"])
+            x_gap_close = -font_size_max * 1.5 <= x_gap <= font_size_max * 1.5
+
+            y0_a, y3_a = last_line["bbox"][1], last_line["bbox"][3]
+            y0_b, y3_b = next_first_line["bbox"][1], next_first_line["bbox"][3]
+            y_overlap = max(0, min(y3_a, y3_b) - max(y0_a, y0_b))
+            min_height = min(y3_a - y0_a, y3_b - y0_b)
+            y_overlap_enough = y_overlap >= min_height * 0.5
+
+            if x_gap_close and y_overlap_enough and hasSameDirection(last_line, next_first_line):
+                group.append(next_block)
+                used_indices.add(j)
+                current_block = next_block
+
+        merged_blocks.append(referenceMergeGroup(group))
+
+    return merged_blocks
+
+
+def referenceMergeBlocksByYGap(blocks, src_lang, target_lang):
+    """이전 mergeBlocksByYGap: y 간격이 커질 때까지 뒤의 block과 차례로 비교"""
+    def get_block_top_y(block):
+        for line in block.get("lines", []):
+            return line["bbox"][1]
+        return float("inf")
+
+    def get_x_overlap_ratio(block1, block2):
+        x0_1, _, x1_1, _ = block1["bbox"]
+        x0_2, _, x1_2, _ = block2["bbox"]
+        overlap = max(0, min(x1_1, x1_2) - max(x0_1, x0_2))
+        min_width = min(x1_1 - x0_1, x1_2 - x0_2)
+        return overlap / min_width if min_width > 0 else 0
+
+    def get_vertical_gap_and_min_height(block1, block2):
+        line1 = block1["lines"][-1]
+        line2 = block2["lines"][0]
+        min_height = min(line1["bbox"][3] - line1["bbox"][1], line2["bbox"][3] - line2["bbox"][1])
+        return line2["bbox"][1] - line1["bbox"][3], min_height
+
+    def is_gap_too_large(prev, curr):
+        vertical_gap, min_height = get_vertical_gap_and_min_height(prev, curr)
+        if src_lang == "English" and vertical_gap > 0.5 * min_height:
+            return True
+        if src_lang == "한국어" and vertical_gap > 0.8 * min_height:
+            return True
+        return False
+
+    def can_merge(prev, curr):
+        if is_gap_too_large(prev, curr):
+            return False
+        if get_x_overlap_ratio(prev, curr) < 0.5:
+            return False
+        if not hasSameDirection(prev["lines"][-1], curr["lines"][0]):
+            return False
+        return isSameFontSize(prev["lines"][-1], curr["lines"][0])
+
+    blocks = sorted(blocks, key=lambda b: (get_block_top_y(b), b["bbox"][0]))
+    used = [False] * len(blocks)
+    merged_blocks = []
+
+    for i, base in enumerate(blocks):
+        if used[i]:
+            continue
+
+        group = [base]
+        used[i] = True
+
+        for j in range(i + 1, len(blocks)):
+            if used[j]:
+                continue
+            if is_gap_too_large(group[-1], blocks[j]):
+                break
+            if can_merge(group[-1], blocks[j]):
+                group.append(blocks[j])
+                used[j] = True
+
+        merged_blocks.append(referenceMergeGroup(group))
+
+    return merged_blocks
+
+
+def referenceMergeContinuosBlocks(blocks, src_lang, target_lang):
+    blocks = referenceMergeBlocksByLineOverlap(blocks)
+    return referenceMergeBlocksByYGap(blocks, src_lang, target_lang)
+
+
+def randomMergeBlocks(rng):
+    """
+    옆으로 이어지거나 아래로 쌓이는 block 묶음들을 무작위로 만든 block 리스트.
+    (x/y 간격이 병합 기준 근처에 있는 경우, 높이가 0이거나 뒤집힌 line, 방향이 다른 line, 글머리 기호 포함)
+    """
+    blocks = []
+    for _ in range(rng.randint(0, 12)):
+        x, y = rng.uniform(0, 500), rng.uniform(0, 700)
+        for _ in range(rng.randint(1, 8)):
+            size = rng.choice([8, 9, 9, 10, 12])
+            direction = rng.choice(LINE_DIRECTIONS)
+            lines = []
+            line_y = y
+            width = rng.uniform(5, 250)
+            for _ in range(rng.randint(1, 3)):
+                height = rng.choice([size * 1.2, size * 1.2, size * 1.3, 0, -size * 0.2])
+                bbox = (x, line_y, x + width * rng.uniform(0.5, 1), line_y + height)
+                text = rng.choice(["• item", "text", "1. first", " next"])
+                span_size = size if rng.random() < 0.9 else size + rng.choice([-0.05, 1])
+                lines.append({"bbox": bbox, "dir": direction, "wmode": 0, "spans": [
+                    {"text": text, "size": span_size, "bbox": bbox, "font": "Helv", "flags": 0, "color": 0},
+                ]})
+                line_y += max(height, 0) + rng.uniform(-1, 3)
+
+            bbox = (x, y, max(line["bbox"][2] for line in lines), max(y, line_y))
+            blocks.append({"type": 0, "bbox": bbox, "lines": lines, "class_name": rng.choice(FIXTURE_CLASS_NAMES)})
+
+            if rng.random() < 0.5:
+                x = bbox[2] + rng.uniform(-size * 2, size * 2)  # 옆으로 이어지는 block
+                y += rng.uniform(-size * 0.6, size * 0.6)
+            else:
+                x += rng.uniform(-20, 20)  # 아래로 이어지는 block
+                y = line_y + rng.uniform(-2, size)
+
+    if rng.random() < 0.3:
+        rng.shuffle(blocks)
+    return blocks
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_merge_continuous_blocks_matches_reference_on_random_input(seed):
+    rng = random.Random(seed)
+    blocks = randomMergeBlocks(rng)
+
+    for src_lang in ("English", "한국어", "日本語"):
+        assert mergeContinuosBlocks(copy.deepcopy(blocks), src_lang, "한국어") == \
+            referenceMergeContinuosBlocks(copy.deepcopy(blocks), src_lang, "한국어")
+
+
+@pytest.mark.parametrize("seed", FIXTURE_SEEDS)
+def test_merge_continuous_blocks_matches_reference_on_fixture_pages(seed):
+    for page_info in fixturePageInfos(seed):
+        # 전처리에서 병합 직전까지의 단계 적용
+        blocks = cleanBlocks(page_info["blocks"])
+        normalizeAllBboxes(blocks)
+        assignClassNameToBlocks(blocks, page_info["yolo_objects"])
+        blocks = splitBlocksByLineGap(blocks)
+
+        for src_lang in ("English", "한국어"):
+            assert mergeContinuosBlocks(copy.deepcopy(blocks), src_lang, "한국어") == \
+                referenceMergeContinuosBlocks(copy.deepcopy(blocks), src_lang, "한국어")
@@ -1,3 +1,4 @@
+from util.spatial_index import GridIndex
 
 def markLinkToSpan(blocks, links):
     """
@@ -5,6 +6,10 @@ def markLinkToSpan(blocks, links):
     해당 span에 'link_num' 키를 할당.
     """
 
+    spans = [span for block in blocks for line in block.get("lines", []) for span in line.get("spans", [])]
+    # 링크와 겹칠 수 있는 span만 비교하도록 공간 인덱스 생성
+    span_index = GridIndex.fromBboxes([span.get("bbox", [0, 0, 0, 0]) for span in spans])
+
     for link_idx, link in enumerate(links):
         link_bbox = link.get("from")  # [x0, y0, x1, y1]
 
@@ -17,32 +22,31 @@ def markLinkToSpan(blocks, links):
         if ly0 > ly1:
             ly0, ly1 = ly1, ly0
 
-        for block in blocks:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    sx0, sy0, sx1, sy1 = span.get("bbox", [0, 0, 0, 0])
-                    
-                    if sx0 > sx1:
-                        sx0, sx1 = sx1, sx0
-                    if sy0 > sy1:
-                        sy0, sy1 = sy1, sy0
-
-                    # 교집합 영역 계산
-                    x_overlap = max(0, min(lx1, sx1) - max(lx0, sx0))
-                    y_overlap = max(0, min(ly1, sy1) - max(ly0, sy0))
-
-                    link_width = (lx1 - lx0)
-                    link_height = (ly1 - ly0)
-                    
-                    span_width = (sx1 - sx0)
-                    span_height = (sy1 - sy0)
-
-                    if min(link_width, span_width) == 0 or min(link_height, span_height) == 0:
-                        continue
-
-                    width_coverage_ratio = x_overlap / min(link_width, span_width)
-                    height_coverage_ratio = y_overlap / min(link_height, span_height)
-
-                    if width_coverage_ratio >= 0.7 and height_coverage_ratio >= 0.6:
-                        span["link_num"] = link_idx
+        for span_idx in span_index.query((lx0, ly0, lx1, ly1)):
+            span = spans[span_idx]
+            sx0, sy0, sx1, sy1 = span.get("bbox", [0, 0, 0, 0])
+            
+            if sx0 > sx1:
+                sx0, sx1 = sx1, sx0
+            if sy0 > sy1:
+                sy0, sy1 = sy1, sy0
+
+            # 교집합 영역 계산
+            x_overlap = max(0, min(lx1, sx1) - max(lx0, sx0))
+            y_overlap = max(0, min(ly1, sy1) - max(ly0, sy0))
+
+            link_width = (lx1 - lx0)
+            link_height = (ly1 - ly0)
+            
+            span_width = (sx1 - sx0)
+            span_height = (sy1 - sy0)
+
+            if min(link_width, span_width) == 0 or min(link_height, span_height) == 0:
+                continue
+
+            width_coverage_ratio = x_overlap / min(link_width, span_width)
+            height_coverage_ratio = y_overlap / min(link_height, span_height)
+
+            if width_coverage_ratio >= 0.7 and height_coverage_ratio >= 0.6:
+                span["link_num"] = link_idx
 
@@ -1,18 +1,28 @@
 import pymupdf
-from yolo.yolo_inference.detection import detectObjectsFromFile
+from yolo.yolo_inference.detection import detectObjectsFromFile, DEFAULT_BATCH_SIZE, DEFAULT_QUEUE_DEPTH, DEFAULT_RENDER_WORKERS
 from preprocess.pdf_summary import summarizePdfInChunks, summarizePdfInChunksParallel
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from util.console_utils import start_translation_animation, stop_animation, print_stage_progress
 from draw.draw_blocks import drawBlocks
+from util.mupdf_lock import mupdf_lock, openPdfLocked
+from text_extract.document_extraction import DocumentExtractor, DISPLAY_LIST_CACHE_PAGES
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import modal
 import json
+import time
 
 
-def getYoloObjects(file_path):
+def getYoloObjects(file_path, batch_size=DEFAULT_BATCH_SIZE, queue_depth=DEFAULT_QUEUE_DEPTH, render_workers=DEFAULT_RENDER_WORKERS,
+                   extractor=None, page_indices=None):
     '''
     pdf 이름 받아서, yolo에 요청 보내고 탐지된 객체 배열 반환 받는 함수.
+    page_indices(0부터 시작하는 페이지 index 리스트)가 주어지면 그 페이지만 탐지합니다.
+    batch_size가 2 이상이면 렌더링과 추론을 겹치는 배치 모드로 탐지하고,
+    render_workers가 1 이상이면 여러 프로세스에서 페이지를 렌더링합니다.
+    extractor(DocumentExtractor)가 주어지면 텍스트 추출과 같은 문서 핸들에서 렌더링합니다.
 
     반환 타입: 
     [
@@ -32,7 +42,8 @@ def getYoloObjects(file_path):
     ]
     '''
     
-    return detectObjectsFromFile(file_path)
+    return detectObjectsFromFile(file_path, batch_size=batch_size, queue_depth=queue_depth, render_workers=render_workers,
+                                 extractor=extractor, page_indices=page_indices)
     
 def getYoloObjectsFromRemote(file_path):
     
@@ -46,74 +57,182 @@ def getYoloObjectsFromRemote(file_path):
     return yolo_objects
 
 
-def getFileInfo(file_path, src_lang, target_lang, max_workers=30):
+def extractPagedBlocks(file_path, extractor=None, page_indices=None):
     '''
-    file_path 받아서, 페이지별 blocks 반환받는 함수. 페이지별 링크 정보도 포함.
-    
+    file_path 받아서, 페이지별 blocks와 links를 추출하는 함수.
+    extractor(DocumentExtractor)가 주어지면 요약/레이아웃 분석과 공유하는 페이지 record에서 가져옵니다.
+    page_indices(0부터 시작하는 페이지 index 리스트)가 주어지면 그 페이지만 추출합니다.
+
     반환 값:
     [
         {
             "page_num": 1,
-            "blocks": page.get_text("dict", flags=1, sort=True)["blocks"] 로 얻은 block 정보 배열,
-            "links": [
-                {
-                    "kind": 링크 종류 (예: LINK_URI, LINK_GOTO, 등),
-                    "from": 링크가 걸린 사각형 위치 (Rect),
-                    "uri": 외부 URL일 경우 대상 주소,
-                    "page": 내부 링크일 경우 목적지 페이지 번호,
-                    "xref": PDF 내부 객체 참조 번호,
-                    "to": 이동할 위치 정보 등
-                },
-                ...
-            ],
-            "yolo_objects": getYoloObjects(file_path) 해서 얻어온 값 중 해당 페이지의 객체 배열
+            "blocks": page.get_text("dict", flags=1, sort=True)["blocks"],
+            "links": page.get_links()
         },
         ...
     ]
     '''
+    if extractor is not None:
+        return [extractor.extractPageBlocks(page_idx) for page_idx in (range(extractor.page_count) if page_indices is None else page_indices)]
+
     results = []
+
+    # 요약/레이아웃 분석과 동시에 실행되므로 pymupdf 호출은 페이지 단위로 lock
+    with openPdfLocked(file_path) as doc:
+        for page_idx in (range(len(doc)) if page_indices is None else page_indices):
+            results.append(extractPageBlocks(doc, page_idx))
+
+    return results
+
+
+def extractPageBlocks(doc, page_idx):
+    '''
+    열려 있는 문서에서 한 페이지의 blocks/links를 추출하는 함수. pymupdf 호출은 mupdf_lock으로 보호.
+
+    반환 값: {"page_num": page_idx + 1, "blocks": [...], "links": [...]}
+    '''
+    with mupdf_lock:
+        page = doc[page_idx]
+
+        # blocks 추출
+        blocks = page.get_text("dict", flags=1, sort=True)["blocks"]
+
+        # links 추출 
+        links = page.get_links()
+
+    return {
+        "page_num": page_idx + 1,
+        "blocks": blocks,
+        "links": links,
+    }
+
+
+def createDocumentExtractor(file_path, cache_blocks=True):
+    '''
+    요약/레이아웃 분석/blocks 추출이 공유할 DocumentExtractor 생성.
+    YOLO 입력을 여러 프로세스에서 렌더링하면 이 문서의 DisplayList를 쓰지 않으므로 보관하지 않습니다.
+    '''
+    display_list_pages = DISPLAY_LIST_CACHE_PAGES if DEFAULT_RENDER_WORKERS == 0 else 0
+    return DocumentExtractor(file_path, cache_blocks=cache_blocks, display_list_pages=display_list_pages)
+
+
+def getFileInfo(file_path, src_lang, target_lang, max_workers=30, extract_blocks=True, extractor=None, skip_pages=(), summary_info=None):
+    '''
+    file_path 받아서, 페이지별 blocks 반환받는 함수. 페이지별 링크 정보도 포함.
+
+    요약/용어집 추출(네트워크), YOLO 레이아웃 분석(CPU), 페이지별 텍스트 추출은
+    서로 의존성이 없으므로 동시에 실행합니다. 전체 소요 시간은 가장 느린 단계에 가까워집니다.
+    세 단계 모두 하나의 DocumentExtractor를 공유해서, 문서는 한 번만 열고 페이지 내용도 한 번만 해석합니다.
+
+    extract_blocks가 False이면 blocks/links 추출을 건너뛰고, 페이지별로 나중에 추출하도록 남겨둡니다.
+    (페이지 스트리밍 번역에서 모든 페이지의 blocks를 한꺼번에 메모리에 올리지 않기 위해 사용)
+    이때 extractor를 넘기면 나중에 같은 extractor로 페이지별 blocks를 추출할 수 있습니다. (닫는 것은 넘긴 쪽 담당)
+
+    checkpoint로 이어서 번역할 때는 이전 작업의 결과를 넘겨 이미 한 작업을 건너뜁니다.
+    - skip_pages(페이지 번호 집합)의 페이지는 레이아웃 분석과 blocks 추출을 하지 않습니다. (page_infos에는 blocks/yolo_objects가 빈 채로 포함)
+    - summary_info({"term_dict", "summaries"}, summarizePdfInChunksParallel 반환 값과 같은 형식)가 주어지면 요약/용어집 생성을 하지 않고 그 값을 사용합니다.
     
-    # 요약 및 용어집 생성 애니메이션 시작
-    summary_animation_running = start_translation_animation("summary")
-    
-    summaries_with_terms = summarizePdfInChunksParallel(file_path, source_language=src_lang, target_language=target_lang, max_workers=max_workers)
-    term_dict = summaries_with_terms["term_dict"]
-    summary_dict = {s["page"]: s["summary"] for s in summaries_with_terms["summaries"]}
-    
-    # 애니메이션 중지
-    stop_animation(summary_animation_running)
-    
-    # 2단계 진행상황 출력
-    print_stage_progress("레이아웃 분석 중", 2, 4)
-    
-    # 레이아웃 분석 애니메이션 시작
-    layout_animation_running = start_translation_animation("layout")
-    
-    paged_yolo = {item["page_num"]: item["objects"] for item in getYoloObjects(file_path)}
+    반환 값:
+    {
+        "term_dict": 용어집,
+        "summaries": [{"page": 페이지 번호, "summary": 페이지 요약}, ...],
+        "page_infos": [
+            {
+                "page_num": 1,
+                "blocks": page.get_text("dict", flags=1, sort=True)["blocks"] 로 얻은 block 정보 배열,
+                "links": [
+                    {
+                        "kind": 링크 종류 (예: LINK_URI, LINK_GOTO, 등),
+                        "from": 링크가 걸린 사각형 위치 (Rect),
+                        "uri": 외부 URL일 경우 대상 주소,
+                        "page": 내부 링크일 경우 목적지 페이지 번호,
+                        "xref": PDF 내부 객체 참조 번호,
+                        "to": 이동할 위치 정보 등
+                    },
+                    ...
+                ],
+                "yolo_objects": getYoloObjects(file_path) 해서 얻어온 값 중 해당 페이지의 객체 배열,
+                "summary": 해당 페이지 요약
+            },
+            ...
+        ],
+        "timings": {
+            "summary": 요약 및 용어집 추출 소요 시간(초),
+            "layout": YOLO 레이아웃 분석 소요 시간(초),
+            "extraction": 페이지별 blocks/links 추출 소요 시간(초),
+            "total": getFileInfo 전체 소요 시간(초)
+        }
+    }
+    '''
+    start_time = time.perf_counter()
+    timings = {}
+
+    # 단계별 소요 시간을 기록하며 실행하는 함수 생성
+    def timed(stage_name, func, *args, **kwargs):
+        def run():
+            stage_start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings[stage_name] = round(time.perf_counter() - stage_start, 3)
+        return run
     
+    extractor_context = nullcontext(extractor) if extractor is not None else createDocumentExtractor(file_path, cache_blocks=extract_blocks)
+
+    with extractor_context as extractor, ThreadPoolExecutor(max_workers=3) as executor:
+        page_count = extractor.page_count
+        page_indices = [page_idx for page_idx in range(page_count) if page_idx + 1 not in skip_pages] if skip_pages else None
+
+        # 요약 및 용어집 생성 애니메이션 시작
+        summary_animation_running = start_translation_animation("summary") if summary_info is None else None
+
+        try:
+            summary_future = executor.submit(timed("summary", summarizePdfInChunksParallel, file_path, source_language=src_lang, target_language=target_lang, max_workers=max_workers, extractor=extractor)) if summary_info is None else None
+            layout_future = executor.submit(timed("layout", getYoloObjects, file_path, extractor=extractor, page_indices=page_indices))
+            extraction_future = executor.submit(timed("extraction", extractPagedBlocks, file_path, extractor=extractor, page_indices=page_indices)) if extract_blocks else None
 
-    with pymupdf.open(file_path) as doc:
-        for page_num, page in enumerate(doc, start=1):
-            # blocks 추출
-            blocks = page.get_text("dict", flags=1, sort=True)["blocks"]
-
-            # links 추출 
-            links = page.get_links()
-
-            results.append({
-                "page_num": page_num,
-                "blocks": blocks,
-                "links": links,
-                "yolo_objects": paged_yolo.get(page_num, []),
-                "summary": summary_dict.get(page_num, "")
-            })
-  
-    # 레이아웃 분석 애니메이션 중지
-    stop_animation(layout_animation_running)
+            summaries_with_terms = summary_future.result() if summary_future is not None else summary_info
+        finally:
+            # 요약이 실패해도 애니메이션 스레드가 계속 출력하지 않도록 중지
+            stop_animation(summary_animation_running)
+
+        term_dict = summaries_with_terms["term_dict"]
+        summary_dict = {s["page"]: s["summary"] for s in summaries_with_terms["summaries"]}
+        
+        # 2단계 진행상황 출력 (레이아웃 분석은 요약과 동시에 이미 진행 중)
+        print_stage_progress("레이아웃 분석 중", 2, 4)
+        
+        # 레이아웃 분석 애니메이션 시작
+        layout_animation_running = start_translation_animation("layout")
+
+        try:
+            yolo_objects = layout_future.result()
+            paged_yolo = {item["page_num"]: item["objects"] for item in yolo_objects}
+            # extract_blocks가 False이면 blocks/links는 비워두고 페이지 목록만 구성
+            paged_blocks = {item["page_num"]: item for item in extraction_future.result()} if extraction_future is not None else {}
+        finally:
+            # 레이아웃 분석 애니메이션 중지
+            stop_animation(layout_animation_running)
+
+    results = []
+    for page_num in range(1, page_count + 1):
+        paged_block = paged_blocks.get(page_num, {})
+        results.append({
+            "page_num": page_num,
+            "blocks": paged_block.get("blocks", []),
+            "links": paged_block.get("links", []),
+            "yolo_objects": paged_yolo.get(page_num, []),
+            "summary": summary_dict.get(page_num, "")
+        })
+
+    timings["total"] = round(time.perf_counter() - start_time, 3)
     
     return {
         "term_dict": term_dict,
-        "page_infos": results
+        "summaries": summaries_with_terms["summaries"],
+        "page_infos": results,
+        "timings": timings
     }
 
 def getFileInfoWithoutSummary(file_path):
@@ -142,22 +261,17 @@ def getFileInfoWithoutSummary(file_path):
     ]
     '''
     results = []
-    paged_yolo = {item["page_num"]: item["objects"] for item in getYoloObjects(file_path)}
-
-    with pymupdf.open(file_path) as doc:
-        for page_num, page in enumerate(doc, start=1):
-            # blocks 추출
-            blocks = page.get_text("dict", flags=1, sort=True)["blocks"]
-
-            # links 추출 
-            links = page.get_links()
-
-            results.append({
-                "page_num": page_num,
-                "blocks": blocks,
-                "links": links,
-                "yolo_objects": paged_yolo.get(page_num, []),
-            })
+    with createDocumentExtractor(file_path) as extractor:
+        paged_yolo = {item["page_num"]: item["objects"] for item in getYoloObjects(file_path, extractor=extractor)}
+        paged_blocks = extractPagedBlocks(file_path, extractor=extractor)
+
+    for paged_block in paged_blocks:
+        results.append({
+            "page_num": paged_block["page_num"],
+            "blocks": paged_block["blocks"],
+            "links": paged_block["links"],
+            "yolo_objects": paged_yolo.get(paged_block["page_num"], []),
+        })
 
     return {
         "page_infos": results
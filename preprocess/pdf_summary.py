@@ -11,6 +11,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from util.console_utils import (Colors, print_info, print_success, print_error, 
                                print_processing, print_header)
+from util.mupdf_lock import mupdf_lock
+from util.kv_cache import getKVCache, hashKey
+from util.rate_scheduler import createChatCompletion
 
 # OpenAI API Key 확인 및 클라이언트 생성
 if not os.environ.get('OPENAI_API_KEY'):
@@ -24,11 +27,20 @@ if not os.environ.get('OPENAI_API_KEY'):
     print_success("API Key가 설정되었습니다.")
 
 client = OpenAI()
+SUMMARY_MODEL = "gpt-4.1-mini"
+SUMMARY_EXPECTED_OUTPUT_TOKENS = 1500  # 요약 + 용어집 응답의 예상 토큰 수 (rate limit 예약용)
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", 20000))  # 요약 캐시 최대 항목 수
+CHUNK_ANCHOR_WINDOW = 3  # 청크 경계 hash에 넣는 최근 페이지 수 (splitPagesIntoChunks)
 
 # 📄 PDF 문서의 전체 텍스트를 페이지 단위로 추출하는 함수
-def extractTextByPage(pdf_path):
+def extractTextByPage(pdf_path, extractor=None):
+    # extractor(DocumentExtractor)가 있으면 전처리/레이아웃 분석과 같은 페이지 record의 텍스트 사용
+    if extractor is not None:
+        return [{"page": i + 1, "text": extractor.pageText(i)} for i in range(extractor.page_count)]
+
     pages_text = []
-    with pymupdf.open(pdf_path) as doc:
+    # 레이아웃 분석 등 다른 단계와 동시에 실행될 수 있으므로 pymupdf 호출은 lock으로 보호
+    with mupdf_lock, pymupdf.open(pdf_path) as doc:
         for i in range(len(doc)):
             text = doc[i].get_text().strip()
             pages_text.append({"page": i + 1, "text": text})
@@ -85,8 +97,8 @@ def summarizeChunkWithTerms(pages, source_language="English", target_language="K
     input_text = "\n\n".join([f"Page {p['page']}:\n{p['text']}" for p in pages])
 
     # GPT 호출 시, JSON 스키마 명시하여 요약 + 용어집 구조 강제
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
+    response = createChatCompletion(client, dict(
+        model=SUMMARY_MODEL,
         # temperature=0,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -125,11 +137,46 @@ def summarizeChunkWithTerms(pages, source_language="English", target_language="K
                 }
             }
         }
-    )
+    ), expected_output_tokens=SUMMARY_EXPECTED_OUTPUT_TOKENS)
 
     parsed = json.loads(response.choices[0].message.content)
     return parsed["summaries"], parsed["terms"]
 
+# 💾 같은 내용의 청크는 이전 실행의 요약 + 용어집을 재사용하는 함수
+def summarizeChunkWithTermsCached(pages, source_language="English", target_language="Korean"):
+    '''
+    summarizeChunkWithTerms의 결과를 청크 페이지 텍스트 + 언어 쌍 기준으로 디스크에 캐시합니다.
+    페이지 번호는 키에 넣지 않고 청크 안에서의 위치로 저장하므로, 페이지 번호가 달라도 내용이 같은 청크는 재사용됩니다.
+    (청크 경계는 splitPagesIntoChunks가 페이지 내용으로 정하므로, 앞부분에 페이지가 추가/삭제된 문서에서도 이후 청크는 같게 나뉨)
+    '''
+    summary_cache = getKVCache("summaries", max_entries=SUMMARY_CACHE_MAX_ENTRIES)
+    if summary_cache is None:
+        return summarizeChunkWithTerms(pages, source_language, target_language)
+
+    cache_key = hashKey("summary", SUMMARY_MODEL, source_language, target_language, [p["text"] for p in pages])
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        summaries = [
+            {"page": pages[pos]["page"], "summary": summary}
+            for pos, summary in cached["summaries"]
+            if pos < len(pages)
+        ]
+        return summaries, cached["terms"]
+
+    summaries, glossary = summarizeChunkWithTerms(pages, source_language, target_language)
+
+    page_positions = {p["page"]: pos for pos, p in enumerate(pages)}
+    summary_cache.set(cache_key, {
+        "summaries": [
+            [page_positions[item["page"]], item["summary"]]
+            for item in summaries
+            if item["page"] in page_positions
+        ],
+        "terms": glossary,
+    })
+
+    return summaries, glossary
+
 # 🧠 청크별로 수집된 용어집을 병합하는 함수 (가장 자주 등장한 번역 선택)
 def mergeGlossaries(glossaries):
     term_freq = defaultdict(Counter)
@@ -142,23 +189,51 @@ def mergeGlossaries(glossaries):
     }
     return final_terms
 
+# ✂️ 페이지 텍스트 기준으로 요약 청크 경계를 정하는 함수
+def splitPagesIntoChunks(pages, chunk_size=7):
+    '''
+    페이지 목록을 요약 청크들로 나눕니다. (평균 약 chunk_size 페이지, 최소 chunk_size // 2, 최대 chunk_size * 2)
+    고정 간격으로 자르지 않고 최근 CHUNK_ANCHOR_WINDOW 페이지 텍스트의 hash가 조건을 만족하는 페이지에서 청크를 끝내므로(content-defined chunking),
+    앞부분에 페이지가 추가/삭제되어도 그 뒤 청크 경계는 곧 원래 페이지들로 돌아와 이후 청크는 요약 캐시를 재사용합니다.
+    빈 페이지처럼 같은 텍스트가 반복되는 구간은 hash로 경계를 정할 수 없으므로(모두 경계이거나 모두 아님) 고정 chunk_size 간격으로 자릅니다.
+    '''
+    min_size = max(chunk_size // 2, 1)
+    max_size = chunk_size * 2
+    anchor_period = max(chunk_size - min_size + 1, 1)  # 최소 길이에 도달한 뒤 평균 이 간격마다 경계 (평균 길이 chunk_size)
+
+    chunks, chunk = [], []
+    for idx, page in enumerate(pages):
+        chunk.append(page)
+        window = [p["text"] for p in pages[max(idx - CHUNK_ANCHOR_WINDOW + 1, 0):idx + 1]]
+        if len(set(window)) == 1:
+            # 반복 구간: 고정 간격
+            is_boundary = len(chunk) >= chunk_size
+        else:
+            is_anchor = int(hashKey("summary-chunk", window)[:8], 16) % anchor_period == 0
+            is_boundary = len(chunk) >= max_size or (len(chunk) >= min_size and is_anchor)
+        if is_boundary:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
 # 📘 전체 PDF를 순차적으로 요약하고 용어집을 추출하는 함수
-def summarizePdfInChunks(pdf_path, chunk_size=7, source_language="English", target_language="Korean"):
+def summarizePdfInChunks(pdf_path, chunk_size=7, source_language="English", target_language="Korean", extractor=None):
     # PDF에서 모든 페이지의 텍스트를 추출
-    all_pages = extractTextByPage(pdf_path)
+    all_pages = extractTextByPage(pdf_path, extractor=extractor)
     all_summaries = []  # 전체 요약 저장용 리스트
     all_glossaries = []  # 전체 용어집 저장용 리스트
 
-    # chunk_size만큼 페이지를 잘라서 반복 처리
-    for i in range(0, len(all_pages), chunk_size):
-        chunk = all_pages[i:i + chunk_size]  # 현재 청크
+    # 평균 chunk_size 페이지씩 잘라서 반복 처리
+    for chunk in splitPagesIntoChunks(all_pages, chunk_size):
         page_numbers = [p["page"] for p in chunk]  # 청크 내 페이지 번호 목록
         page_range = f"{page_numbers[0]}–{page_numbers[-1]}"
         print_processing(f"페이지 {page_range} 요약 중...")
 
         try:
             # GPT로 요약과 용어집 생성 요청
-            summaries, glossary = summarizeChunkWithTerms(chunk, source_language, target_language)
+            summaries, glossary = summarizeChunkWithTermsCached(chunk, source_language, target_language)
             summary_dict = {item["page"]: item["summary"] for item in summaries}  # 페이지 번호 기반 딕셔너리 구성
 
             # 순서 유지하며 누락된 페이지는 빈 문자열로 처리
@@ -177,9 +252,9 @@ def summarizePdfInChunks(pdf_path, chunk_size=7, source_language="English", targ
     return {"term_dict": merged_glossary, "summaries": sorted(all_summaries, key=lambda x: x["page"])}
 
 # ⚡ 전체 PDF를 병렬로 처리하며 요약과 용어집을 생성하는 함수
-def summarizePdfInChunksParallel(pdf_path, chunk_size=7, max_workers=30, source_language="English", target_language="Korean"):
-    all_pages = extractTextByPage(pdf_path)  # 모든 페이지 텍스트 추출
-    chunks = [all_pages[i:i + chunk_size] for i in range(0, len(all_pages), chunk_size)]  # 청크 단위로 분할
+def summarizePdfInChunksParallel(pdf_path, chunk_size=7, max_workers=30, source_language="English", target_language="Korean", extractor=None):
+    all_pages = extractTextByPage(pdf_path, extractor=extractor)  # 모든 페이지 텍스트 추출
+    chunks = splitPagesIntoChunks(all_pages, chunk_size)  # 청크 단위로 분할
     results = []  # 병렬 결과 수집용 리스트
     all_glossaries = []  # 병렬 생성된 용어집 리스트
 
@@ -191,7 +266,7 @@ def summarizePdfInChunksParallel(pdf_path, chunk_size=7, max_workers=30, source_
 
         try:
             # GPT 호출: 요약 및 용어집 생성
-            summaries, glossary = summarizeChunkWithTerms(chunk, source_language, target_language)
+            summaries, glossary = summarizeChunkWithTermsCached(chunk, source_language, target_language)
             summary_dict = {item["page"]: item["summary"] for item in summaries}
             ordered = [{"page": page, "summary": summary_dict.get(page, "")} for page in page_numbers]
             all_glossaries.append(glossary)
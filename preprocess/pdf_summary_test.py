@@ -0,0 +1,63 @@
+import random
+import pytest
+from preprocess.pdf_summary import splitPagesIntoChunks
+from preprocess.preprocess_fixtures import FIXTURE_WORDS
+
+
+def makePages(seed, count, blank_runs=()):
+    """임의 텍스트 페이지 목록. blank_runs의 (start, length) 구간은 빈 페이지"""
+    rng = random.Random(seed)
+    pages = [{"page": i + 1, "text": " ".join(rng.choice(FIXTURE_WORDS) for _ in range(30))} for i in range(count)]
+    for start, length in blank_runs:
+        for page in pages[start:start + length]:
+            page["text"] = ""
+    return pages
+
+
+def chunkTexts(chunks):
+    return [tuple(p["text"] for p in chunk) for chunk in chunks]
+
+
+def assertChunkLimits(pages, chunks, chunk_size):
+    assert [p for chunk in chunks for p in chunk] == pages
+    assert all(len(chunk) <= chunk_size * 2 for chunk in chunks)
+    assert all(len(chunk) >= max(chunk_size // 2, 1) for chunk in chunks[:-1])
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 10])
+def test_chunks_respect_size_limits(seed, chunk_size):
+    pages = makePages(seed, 120, blank_runs=[(30, 25), (90, 3)])
+    assertChunkLimits(pages, splitPagesIntoChunks(pages, chunk_size), chunk_size)
+
+
+@pytest.mark.parametrize("text", ["", "Figure intentionally left blank"])
+def test_repeated_pages_fall_back_to_fixed_chunks(text):
+    """같은 텍스트가 반복되면 hash로 경계를 정할 수 없으므로 chunk_size 간격으로 자름"""
+    pages = [{"page": i + 1, "text": text} for i in range(40)]
+    assert [len(chunk) for chunk in splitPagesIntoChunks(pages, 7)] == [7] * 5 + [5]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_chunk_sizes_vary_around_chunk_size(seed):
+    pages = makePages(seed, 300)
+    sizes = [len(chunk) for chunk in splitPagesIntoChunks(pages, 7)[:-1]]
+    assert 4 <= sum(sizes) / len(sizes) <= 10
+    assert len(set(sizes)) > 3
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("edit", ["insert", "delete"])
+def test_chunk_boundaries_survive_page_shift(seed, edit):
+    """앞부분에 페이지가 추가/삭제되어도 뒤쪽 청크는 그대로여서 요약 캐시를 재사용"""
+    pages = makePages(seed, 80, blank_runs=[(40, 10)])
+    if edit == "insert":
+        shifted = makePages(seed + 100, 2) + pages
+    else:
+        shifted = pages[2:]
+
+    before = chunkTexts(splitPagesIntoChunks(pages, 7))
+    after = chunkTexts(splitPagesIntoChunks(shifted, 7))
+
+    # 페이지 수가 바뀐 앞쪽 몇 청크를 지나면 경계가 원래대로 돌아옴
+    assert before[-len(after) + 3:] == after[3:]
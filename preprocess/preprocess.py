@@ -1,4 +1,6 @@
 import pymupdf
+import os
+from concurrent.futures import ProcessPoolExecutor
 from preprocess.continuos_block_merge import mergeContinuosBlocks
 from preprocess.block_separate import extractTrueBlocks
 from preprocess.line_preprocess import mergeContinuosLines
@@ -12,8 +14,18 @@ from preprocess.mark_listitem import markListItems
 from preprocess.make_result_line_frames import assignLineFramesToBlocks
 from preprocess.block_sort import sortLinesInBlocks
 from preprocess.split_blocks_by_line_gap import splitBlocksByLineGap
+from util.process_pool import getProcessContext
+from util.line_features import lineFeatureScope
+
+DEFAULT_PREPROCESS_WORKERS = int(os.environ.get("PREPROCESS_WORKERS", "1"))  # 1이면 현재 프로세스에서 순서대로 전처리
 
 def preProcess(page_info, src_lang: str, target_lang: str):
+    # 페이지를 전처리하는 동안 line별 텍스트/글머리 기호 등 계산 결과를 재사용
+    with lineFeatureScope():
+        _preProcess(page_info, src_lang, target_lang)
+
+
+def _preProcess(page_info, src_lang: str, target_lang: str):
     blocks = page_info.get("blocks", [])
     yolo_objects = page_info.get("yolo_objects", [])
     links = page_info.get("links", [])
@@ -89,7 +101,61 @@ if __name__ == "__main__":
   doc.save("_b.pdf", garbage=3, clean=True, deflate=True)
 
 
-def preProcessPageInfos(page_infos, src_lang, target_lang):
-    for page_info in page_infos:
+def makePreProcessPayload(page_info):
+    """
+    worker 프로세스로 보낼 전처리 입력만 추린 page_info.
+    - 글자가 없는 block(이미지 등)은 cleanBlocks에서 어차피 지워지므로 보내지 않음
+    - links는 markLinkToSpan이 쓰는 "from" 좌표만 tuple로 보냄 (pymupdf.Rect/Point 객체를 pickle하지 않도록, 링크 번호는 유지)
+    """
+    return {
+        "blocks": [block for block in page_info.get("blocks", []) if block.get("lines")],
+        "yolo_objects": page_info.get("yolo_objects", []),
+        "links": [{"from": tuple(link["from"])} if link.get("from") else {} for link in page_info.get("links", [])],
+    }
+
+
+def preProcessPayload(payload, src_lang, target_lang):
+    """(worker 프로세스) 전처리 후 blocks만 반환"""
+    preProcess(payload, src_lang, target_lang)
+    return payload["blocks"]
+
+
+def createPreProcessPool(workers=DEFAULT_PREPROCESS_WORKERS):
+    """workers가 2 이상이면 전처리용 프로세스 풀을, 아니면 None을 반환 (호출한 쪽에서 shutdown)"""
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=getProcessContext())
+
+
+def preProcessInPool(page_info, src_lang, target_lang, pool=None):
+    """
+    페이지 하나를 전처리. (스트리밍 번역처럼 페이지가 하나씩 들어올 때 사용)
+    pool이 있으면 worker 프로세스에서 전처리하고 결과 blocks를 page_info에 넣습니다. 기다리는 동안 호출한 스레드는 GIL을 놓습니다.
+    """
+    if pool is None:
         preProcess(page_info, src_lang, target_lang)
+        return
+    page_info["blocks"] = pool.submit(preProcessPayload, makePreProcessPayload(page_info), src_lang, target_lang).result()
+
+
+def preProcessPageInfos(page_infos, src_lang, target_lang, workers=DEFAULT_PREPROCESS_WORKERS):
+    """
+    페이지별 preProcess 실행.
+    workers가 2 이상이면 페이지들을 프로세스 풀에서 나눠 전처리하고, 결과 blocks를 원래 page_info에 페이지 순서대로 넣습니다.
+    (페이지 사이에 의존성이 없고 순수 Python 연산이라 GIL 때문에 스레드로는 빨라지지 않음)
+    """
+    if workers <= 1 or len(page_infos) <= 1:
+        for page_info in page_infos:
+            preProcess(page_info, src_lang, target_lang)
+        return
+
+    workers = min(workers, len(page_infos))
+    payloads = [makePreProcessPayload(page_info) for page_info in page_infos]
+    # 페이지를 worker마다 몇 묶음씩 나눠 보내 프로세스 간 통신 횟수를 줄임
+    chunksize = max(1, len(payloads) // (workers * 4))
+
+    with createPreProcessPool(workers) as executor:
+        results = executor.map(preProcessPayload, payloads, [src_lang] * len(payloads), [target_lang] * len(payloads), chunksize=chunksize)
+        for page_info, blocks in zip(page_infos, results):
+            page_info["blocks"] = blocks
   
\ No newline at end of file
@@ -0,0 +1,82 @@
+import copy
+import random
+import pymupdf
+
+'''
+전처리 관련 비교 테스트(*_test.py)에서 함께 쓰는 입력 생성 함수 모듈.
+단 나눔, 글자 크기, 정렬, 글머리 기호, 세로 글자가 섞인 PDF를 seed로 만들고,
+페이지마다 blocks와 YOLO 객체/링크를 붙인 page_info를 만듭니다.
+'''
+
+FIXTURE_SEEDS = range(3)  # 고정 입력 비교에 사용할 PDF seed
+FIXTURE_WORDS = "the of layout model block merge line span figure table result value page index tree grid font 1. (a) 2.5 % —".split()
+FIXTURE_CLASS_NAMES = ["Text", "Title", "List-item", "Table", "Picture", "Caption", "Formula", "Page-header"]
+# 무작위 line의 진행 방향 (가로가 가장 많고, 세로/살짝 기울어진/거꾸로 된 line 포함)
+LINE_DIRECTIONS = [(1.0, 0.0), (1.0, 0.0), (1.0, 0.0), (0.0, -1.0), (0.995, 0.0998), (-1.0, 0.0)]
+
+
+def makeFixturePdf(seed, page_count=3):
+    """단 나눔, 글자 크기, 정렬, 글머리 기호, 세로 글자가 섞인 페이지들로 된 PDF 생성"""
+    rng = random.Random(seed)
+    doc = pymupdf.open()
+    for _ in range(page_count):
+        page = doc.new_page(width=612, height=792)
+        y = 50
+        while y < 700:
+            x0, x1 = rng.choice([(50, 560), (50, 290), (320, 560)])
+            font_size = rng.choice([8, 9, 10, 12, 16])
+            text = " ".join(rng.choice(FIXTURE_WORDS) for _ in range(rng.randint(3, 80)))
+            if rng.random() < 0.2:
+                text = rng.choice(["• ", "- ", "1. "]) + text
+            height = font_size * 1.3 * (len(text) * font_size * 0.5 / (x1 - x0) + 2)
+            page.insert_textbox(pymupdf.Rect(x0, y, x1, y + height), text, fontsize=font_size, align=rng.choice([0, 1, 3]))
+            y += height + rng.choice([2, 6, 14])
+        if rng.random() < 0.5:
+            page.insert_text((580, 700), "rotated side text", rotate=90, fontsize=9)
+    return doc
+
+
+def randomBbox(rng, page_size):
+    """무작위 bbox (좌표가 뒤집힌 것, 크기가 0인 것 포함)"""
+    x0, y0 = rng.uniform(0, page_size), rng.uniform(0, page_size)
+    kind = rng.random()
+    if kind < 0.1:
+        return [x0, y0, x0, y0 + rng.uniform(0, 30)]
+    if kind < 0.2:
+        return [x0, y0, x0 - rng.uniform(0, 100), y0 - rng.uniform(0, 30)]
+    return [x0, y0, x0 + rng.uniform(0, 200), y0 + rng.uniform(0, 40)]
+
+
+def jitteredBbox(rng, bbox, amount):
+    return [v + rng.uniform(-amount, amount) for v in bbox]
+
+
+def fixturePageInfos(seed):
+    """fixture PDF 페이지마다 blocks와, 블락 근처/무작위 위치의 YOLO 객체와 링크를 붙인 page_info 리스트"""
+    rng = random.Random(seed)
+    page_infos = []
+    with makeFixturePdf(seed) as doc:
+        for page in doc:
+            blocks = page.get_text("dict", flags=1, sort=True)["blocks"]
+            spans = [span for block in blocks for line in block.get("lines", []) for span in line["spans"]]
+
+            yolo_objects = [
+                {"class_name": rng.choice(FIXTURE_CLASS_NAMES), "confidence": 0.9, "bbox": jitteredBbox(rng, block["bbox"], 8)}
+                for block in blocks if rng.random() < 0.8
+            ]
+            yolo_objects += [{"class_name": rng.choice(FIXTURE_CLASS_NAMES), "confidence": 0.5, "bbox": randomBbox(rng, 612)} for _ in range(5)]
+            yolo_objects.append({"class_name": "Text", "confidence": 0.5, "bbox": None})
+
+            links = [{"from": pymupdf.Rect(jitteredBbox(rng, span["bbox"], 2))} for span in rng.sample(spans, min(len(spans), 10))]
+            links += [{"from": pymupdf.Rect(randomBbox(rng, 612))} for _ in range(3)] + [{}]
+
+            page_infos.append({"page_num": page.number + 1, "blocks": blocks, "yolo_objects": yolo_objects, "links": links})
+    return page_infos
+
+
+def preprocessedBlocks(page_infos, preprocess, src_lang="English", target_lang="한국어"):
+    """page_infos 사본을 페이지마다 preprocess(page_info, src_lang, target_lang)로 전처리한 페이지별 blocks"""
+    page_infos = copy.deepcopy(page_infos)
+    for page_info in page_infos:
+        preprocess(page_info, src_lang, target_lang)
+    return [page_info["blocks"] for page_info in page_infos]
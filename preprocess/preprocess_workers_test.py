@@ -0,0 +1,29 @@
+import copy
+import pytest
+from preprocess.preprocess import createPreProcessPool, preProcess, preProcessInPool, preProcessPageInfos
+from preprocess.preprocess_fixtures import FIXTURE_SEEDS, fixturePageInfos, preprocessedBlocks
+
+SRC_LANG, TARGET_LANG = "English", "한국어"
+
+
+def pageInfoBlocks(page_infos, workers):
+    page_infos = copy.deepcopy(page_infos)
+    preProcessPageInfos(page_infos, SRC_LANG, TARGET_LANG, workers=workers)
+    return [page_info["blocks"] for page_info in page_infos]
+
+
+@pytest.mark.parametrize("seed", FIXTURE_SEEDS)
+def test_process_pool_matches_serial_preprocess(seed):
+    """workers=2(프로세스 풀)로 전처리한 blocks가 workers=1(순서대로)과 같은지 (링크 표시 포함)"""
+    page_infos = fixturePageInfos(seed)
+    assert pageInfoBlocks(page_infos, workers=2) == pageInfoBlocks(page_infos, workers=1)
+
+
+def test_streaming_preprocess_in_pool_matches_serial_preprocess():
+    """스트리밍 번역에서 페이지 하나씩 풀로 보내 전처리한 결과도 같은지"""
+    page_infos = fixturePageInfos(FIXTURE_SEEDS[0])
+    expected = preprocessedBlocks(page_infos, preProcess)
+
+    assert createPreProcessPool(1) is None
+    with createPreProcessPool(2) as pool:
+        assert preprocessedBlocks(page_infos, lambda page_info, src, target: preProcessInPool(page_info, src, target, pool=pool)) == expected
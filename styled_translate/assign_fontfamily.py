@@ -1,11 +1,53 @@
 from typing import List, Dict
-from styled_translate.get_font_family import getFontFamily
+import numpy as np
+from styled_translate.get_font_family import getCoverageIndex, CoverageIndex
+
+FALLBACK_FONT_FAMILY = 'NotoSans'
+
+
+def segmentFontFamilyRuns(text: str, target_language: str):
+    """
+    text를 같은 font family가 이어지는 구간으로 나눠 [(font_family, 구간 텍스트), ...] 반환.
+
+    글자별 family는 CoverageIndex로 한 번에 조회하고, family가 바뀌는 위치에서만 구간을 자릅니다.
+    커버하는 family가 없는 글자는 공백으로 바꾸고 앞 글자의 family를 이어 씁니다.
+    (첫 글자라면 NotoSans)
+    """
+    coverage_index = getCoverageIndex(target_language)
+
+    if coverage_index is None:
+        # 지원하지 않는 언어: 개행만 NotoSans, 나머지 글자는 모두 공백 처리
+        ids = np.where(np.fromiter(map(ord, text), dtype=np.int64, count=len(text)) == ord("\n"), 0, CoverageIndex.NO_FAMILY)
+        families = [FALLBACK_FONT_FAMILY]
+    else:
+        ids = coverage_index.lookupIds(text)
+        families = coverage_index.families
+
+    missing = ids == CoverageIndex.NO_FAMILY
+    if missing.any():
+        chars = np.array(list(text))
+        chars[missing] = " "
+        text = "".join(chars.tolist())
+
+        if missing[0]:
+            ids[0] = families.index(FALLBACK_FONT_FAMILY)
+
+        # 앞 글자의 family로 채우기 (forward fill)
+        positions = np.where(missing, 0, np.arange(len(ids)))
+        positions[0] = 0
+        ids = ids[np.maximum.accumulate(positions)]
+
+    boundaries = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    starts = [0] + boundaries.tolist()
+    ends = boundaries.tolist() + [len(text)]
+
+    return [(families[ids[start]], text[start:end]) for start, end in zip(starts, ends)]
+
 
 def assignFontFamilyToStyledSpans(styled_spans: List[Dict], target_language: str) -> List[Dict]:
     """
-    각 styled_span["text"]를 문자 단위로 분해하고,
-    각 문자에 대해 getFontFamily로 폰트 패밀리를 확인한 후,
-    같은 폰트 그룹으로 묶고, 폰트가 달라지면 새로운 styled_span을 생성합니다.
+    각 styled_span["text"]를 font family 구간으로 나누고,
+    구간마다 font_family가 명시된 새로운 styled_span을 생성합니다.
 
     Returns:
         List[Dict]: font_family가 명시된 styled_span 리스트
@@ -19,40 +61,11 @@ def assignFontFamilyToStyledSpans(styled_spans: List[Dict], target_language: str
         if not text:
             continue
 
-        # 첫 글자 기반 초기화
-        try:
-            current_font_family = getFontFamily(text[0], target_language)
-            current_text = text[0]
-        except:
-            current_font_family = 'NotoSans'
-            current_text = ' '
-        
-
-        for char in text[1:]:
-            try:
-                font_family = getFontFamily(char, target_language)
-            except Exception:
-                # Suppress font family errors - use fallback
-                font_family = current_font_family
-                char = " "
-                
-            if font_family == current_font_family:
-                current_text += char
-            else:
-                # font가 바뀌면 새 styled_span 추가
-                new_styled_spans.append({
-                    "style_id": style_id,
-                    "text": current_text,
-                    "font_family": current_font_family
-                })
-                current_font_family = font_family
-                current_text = char
-
-        # 마지막 누적 텍스트 저장
-        new_styled_spans.append({
-            "style_id": style_id,
-            "text": current_text,
-            "font_family": current_font_family
-        })
-
-    return new_styled_spans
\ No newline at end of file
+        for font_family, run_text in segmentFontFamilyRuns(text, target_language):
+            new_styled_spans.append({
+                "style_id": style_id,
+                "text": run_text,
+                "font_family": font_family
+            })
+
+    return new_styled_spans
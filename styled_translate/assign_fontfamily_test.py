@@ -0,0 +1,122 @@
+import random
+import numpy as np
+import pytest
+import styled_translate.get_font_family as get_font_family
+from styled_translate.assign_fontfamily import assignFontFamilyToStyledSpans
+from styled_translate.get_font_family import basic_font_family_map, font_family_list
+
+TARGET_LANGUAGES = list(basic_font_family_map) + ["日本語"]
+
+
+def referenceFontFamily(char, target_language, codepoints_map):
+    """이전 getFontFamily: 기본 family, font_family_list 순서로 글자를 커버하는 family를 하나씩 확인"""
+    if char == '\n':
+        return 'NotoSans'
+
+    basic_font_family = basic_font_family_map[target_language]
+    if ord(char) in codepoints_map[basic_font_family]:
+        return basic_font_family
+
+    for font_family in font_family_list:
+        if ord(char) in codepoints_map[font_family]:
+            return font_family
+
+    raise Exception(f"U+{ord(char):04X}을 커버할 수 있는 font family 존재하지 않음")
+
+
+def referenceAssignFontFamily(styled_spans, target_language, codepoints_map):
+    """이전 assignFontFamilyToStyledSpans: 글자마다 family를 확인하며 family가 바뀔 때 span을 나눔"""
+    new_styled_spans = []
+
+    for span in styled_spans:
+        text = span.get("text", "")
+        style_id = span.get("style_id")
+
+        if not text:
+            continue
+
+        try:
+            current_font_family = referenceFontFamily(text[0], target_language, codepoints_map)
+            current_text = text[0]
+        except:
+            current_font_family = 'NotoSans'
+            current_text = ' '
+
+        for char in text[1:]:
+            try:
+                font_family = referenceFontFamily(char, target_language, codepoints_map)
+            except Exception:
+                font_family = current_font_family
+                char = " "
+
+            if font_family == current_font_family:
+                current_text += char
+            else:
+                new_styled_spans.append({"style_id": style_id, "text": current_text, "font_family": current_font_family})
+                current_font_family = font_family
+                current_text = char
+
+        new_styled_spans.append({"style_id": style_id, "text": current_text, "font_family": current_font_family})
+
+    return new_styled_spans
+
+
+def randomCodepointsMap(rng, max_codepoint):
+    """family마다 무작위 구간들을 커버하는 가짜 codepoint 표 (family끼리 겹치는 구간, 아무도 커버하지 않는 구간 포함)"""
+    codepoints_map = {}
+    for font_family in font_family_list:
+        covered = set()
+        for _ in range(rng.randint(1, 6)):
+            start = rng.randrange(max_codepoint)
+            covered.update(range(start, min(max_codepoint, start + rng.randint(1, 400))))
+        covered.update(rng.sample(range(max_codepoint), 50))
+        codepoints_map[font_family] = np.asarray(sorted(covered), dtype=np.int64)
+    return codepoints_map
+
+
+def randomStyledSpans(rng, max_codepoint):
+    spans = []
+    for style_id in range(rng.randint(1, 6)):
+        length = rng.choice([0, 1, 2, rng.randint(3, 200)])
+        chars = [chr(rng.randrange(1, max_codepoint + 50)) if rng.random() > 0.05 else "\n" for _ in range(length)]
+        spans.append({"style_id": style_id, "text": "".join(chars)})
+    return spans
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_font_family_runs_match_reference_on_random_input(seed, monkeypatch):
+    """family 구간 index로 나눈 span이 글자마다 family를 확인하던 이전 구현과 같은지 (가짜 codepoint 표 사용)"""
+    rng = random.Random(seed)
+    max_codepoint = 3000
+    codepoints_map = randomCodepointsMap(rng, max_codepoint)
+    monkeypatch.setattr(get_font_family, "getCodepointsMap", lambda: codepoints_map)
+    monkeypatch.setattr(get_font_family, "_coverage_indexes", {})
+    reference_map = {font_family: set(codepoints.tolist()) for font_family, codepoints in codepoints_map.items()}
+
+    for _ in range(30):
+        styled_spans = randomStyledSpans(rng, max_codepoint)
+        for target_language in TARGET_LANGUAGES:
+            assert assignFontFamilyToStyledSpans(styled_spans, target_language) == \
+                referenceAssignFontFamily(styled_spans, target_language, reference_map)
+
+
+FIXTURE_SPANS = [
+    {"style_id": 0, "text": "Hello, 세계! ∑ x² → ∞ ♞ 🂡\n두 번째 줄"},
+    {"style_id": 1, "text": "\n"},
+    {"style_id": 2, "text": "\U0010FFFF 범위 밖 글자로 시작"},
+    {"style_id": 3, "text": ""},
+    {"style_id": 4, "text": "𝔸𝔹ℂ ⊕ ⊗ ⟨ψ|φ⟩ ✓ ✗ ☂ ⚡"},
+]
+
+
+def test_font_family_runs_match_reference_on_fixture_fonts():
+    """static 폰트 파일의 실제 codepoint 표로도 이전 구현과 같은지"""
+    try:
+        codepoints_map = get_font_family.getCodepointsMap()
+    except FileNotFoundError:
+        pytest.skip("static 폰트 파일 없음")
+    reference_map = {font_family: set(codepoints.tolist()) for font_family, codepoints in codepoints_map.items()}
+
+    for target_language in TARGET_LANGUAGES:
+        assert assignFontFamilyToStyledSpans(FIXTURE_SPANS, target_language) == \
+            referenceAssignFontFamily(FIXTURE_SPANS, target_language, reference_map)
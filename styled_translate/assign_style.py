@@ -82,6 +82,21 @@ class SpanStyle:
             "link_num": self.link_num
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        # json 등으로 저장된 to_dict 결과에서 복원 (font_color는 해시를 위해 tuple로 되돌림)
+        return cls(
+            is_superscript=data["is_superscript"],
+            y_offset=data["y_offset"],
+            x_gap_with_prev=data["x_gap_with_prev"],
+            font_size=data["font_size"],
+            is_italic=data["is_italic"],
+            is_bold=data["is_bold"],
+            font_color=tuple(data["font_color"]),
+            rotate=data["rotate"],
+            link_num=data["link_num"],
+        )
+
 
 # 중복되지 않는 스타일을 관리하고 각 스타일에 고유 ID를 부여하는 클래스
 class StyleManager:
@@ -1,5 +1,6 @@
 from typing import List, Dict
-from styled_translate.get_font import getFont
+from styled_translate.get_font import getFontPath
+from styled_translate.font_metrics import getAdvanceTable
 from styled_translate.assign_style import SpanStyle, dirToRotation
 from util.block_utils import *
 
@@ -26,9 +27,9 @@ def getCharWidths(styled_span: Dict, style_dict: Dict[int, 'SpanStyle'], scale =
     # print(text, style_id)
     font_family = styled_span["font_family"]
     style = style_dict[style_id]
-    font = getFont(style, font_family)  # SpanStyle 기반 폰트 객체 반환 함수
-    char_widths = font.char_lengths(text, fontsize=style.font_size * scale)  # tuple로 반환됨
-    return list(char_widths)
+    # 폰트별 글자 너비 테이블에서 조회 (font.char_lengths와 같은 값)
+    advance_table = getAdvanceTable(getFontPath(style, font_family))
+    return advance_table.charWidths(text, style.font_size * scale)
 
 def getXgap(styled_span: Dict, style_dict: Dict[int, 'SpanStyle']) -> float:
     style_id = styled_span["style_id"]
@@ -213,7 +214,7 @@ def buildStyledLines(styled_spans: List[Dict], style_dict: Dict[int, 'SpanStyle'
                 return positioned_lines
             
             cur_span = styled_spans[span_idx]  # 현재 탐색중인 span
-            char_widths = getCharWidths(cur_span, style_dict)  # 현재 탐색중인 span에서 얻은 char_widths
+            char_widths = getCharWidths(cur_span, style_dict, scale=scale)  # 현재 탐색중인 span에서 얻은 char_widths
             char_idx = 0  # 현재 넣을 문자 index(cur_sapn에서)
             new_span_text = ""  # 현재 positioned_span에 들어가기 위해 쌓인 text
             cur_x += getXgap(cur_span, style_dict)
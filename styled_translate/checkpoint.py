@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import shutil
+import pymupdf
+from styled_translate.assign_style import SpanStyle
+from util.kv_cache import getCachePath
+
+CHECKPOINT_DIR_NAME = "checkpoints"
+
+
+def toJsonable(value):
+    """pymupdf 객체(Rect, Point 등)가 섞인 값을 json으로 저장할 수 있는 형태로 변환"""
+    if isinstance(value, pymupdf.Rect):
+        return {"__rect__": [value.x0, value.y0, value.x1, value.y1]}
+    if isinstance(value, pymupdf.Point):
+        return {"__point__": [value.x, value.y]}
+    if isinstance(value, dict):
+        return {key: toJsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [toJsonable(item) for item in value]
+    return value
+
+
+def fromJsonable(value):
+    """toJsonable로 변환한 값을 pymupdf 객체로 되돌림"""
+    if isinstance(value, dict):
+        if "__rect__" in value and len(value) == 1:
+            return pymupdf.Rect(value["__rect__"])
+        if "__point__" in value and len(value) == 1:
+            return pymupdf.Point(value["__point__"])
+        return {key: fromJsonable(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fromJsonable(item) for item in value]
+    return value
+
+
+def fileFingerprint(file_path):
+    """파일 내용의 sha256 해시"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class TranslationCheckpoint:
+    """
+    번역 작업 중간 상태를 디스크에 저장해, 프로세스가 중간에 죽어도 이어서 번역할 수 있게 하는 저장소.
+
+    - 문서 내용 + 언어 쌍별로 디렉토리를 하나 사용합니다.
+    - 번역이 끝난 페이지마다 그리기에 필요한 상태(blocks의 styled_lines/scale/to_be_translated 등,
+      links, style_dict)를 page_<번호>.json으로 저장합니다.
+    - 용어집과 페이지별 요약은 meta.json에 저장해, 재시작한 작업은 요약을 다시 만들지 않고 같은 용어집으로 나머지 페이지를 번역합니다.
+    - 파일은 임시 파일에 쓴 뒤 교체하므로, 쓰는 도중 죽어도 깨진 checkpoint가 남지 않습니다.
+    """
+
+    def __init__(self, file_path, src_lang, target_lang):
+        job_id = hashlib.sha256(
+            f"{fileFingerprint(file_path)}:{src_lang}:{target_lang}".encode("utf-8")
+        ).hexdigest()[:32]
+        self.dir_path = os.path.join(getCachePath(CHECKPOINT_DIR_NAME), job_id)
+        os.makedirs(self.dir_path, exist_ok=True)
+
+    def _pagePath(self, page_num):
+        return os.path.join(self.dir_path, f"page_{page_num:05d}.json")
+
+    def _writeJson(self, path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _readJson(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def saveMeta(self, term_dict, summaries):
+        """용어집과 페이지별 요약([{"page", "summary"}, ...]) 저장"""
+        self._writeJson(os.path.join(self.dir_path, "meta.json"), {"term_dict": term_dict, "summaries": summaries})
+
+    def loadMeta(self):
+        """저장된 {"term_dict", "summaries"} 반환 (없거나 요약이 없는 이전 형식이면 None)"""
+        meta = self._readJson(os.path.join(self.dir_path, "meta.json"))
+        if not meta or "summaries" not in meta:
+            return None
+        return meta
+
+    def savePage(self, page_info):
+        """번역이 끝난 페이지의 그리기용 상태 저장"""
+        self._writeJson(self._pagePath(page_info["page_num"]), {
+            "page_num": page_info["page_num"],
+            "blocks": toJsonable(page_info.get("blocks", [])),
+            "links": toJsonable(page_info.get("links", [])),
+            "style_dict": {str(style_id): style.to_dict() for style_id, style in page_info["style_dict"].items()},
+        })
+
+    def loadPage(self, page_num):
+        """저장된 페이지 상태를 page_info 형태로 반환 (없으면 None)"""
+        data = self._readJson(self._pagePath(page_num))
+        if data is None:
+            return None
+
+        return {
+            "page_num": data["page_num"],
+            "blocks": fromJsonable(data["blocks"]),
+            "links": fromJsonable(data["links"]),
+            "style_dict": {int(style_id): SpanStyle.from_dict(style) for style_id, style in data["style_dict"].items()},
+        }
+
+    def completedPageNums(self):
+        """checkpoint가 저장된 페이지 번호 집합"""
+        page_nums = set()
+        for file_name in os.listdir(self.dir_path):
+            if file_name.startswith("page_") and file_name.endswith(".json"):
+                page_nums.add(int(file_name[len("page_"):-len(".json")]))
+        return page_nums
+
+    def clear(self):
+        """작업이 끝나면 checkpoint 삭제"""
+        shutil.rmtree(self.dir_path, ignore_errors=True)
@@ -1,9 +1,15 @@
 from typing import List, Dict, Tuple
 import pymupdf
-from styled_translate.get_font import getFontPath, getFontName
+from styled_translate.get_font import getFont, getFontPath, getFontName
 from styled_translate.assign_style import SpanStyle, dirToRotation
 from text_edit.text_delete import deleteTextBlocks
 from util.line_utils import calculateAverageGap
+from styled_translate.finalize_output import finalizeOutput
+import os
+
+RENDERER_TEXTWRITER = "textwriter"
+RENDERER_INSERT_TEXT = "insert_text"
+DEFAULT_RENDERER = os.environ.get("PDF_RENDERER", RENDERER_TEXTWRITER)  # 번역문을 그리는 방식
 
 def getRotatedBbox(original_bbox, rotate):
   x0, y0, x1, y1 = original_bbox
@@ -171,7 +177,11 @@ def makeBboxFromOrigin(origin_x: float, origin_y: float, width: float, height: f
 
 
 
-def drawStyledLines(block: Dict, style_dict: Dict[int, SpanStyle], links:List[Dict], page: pymupdf.Page):
+def iterSpanDraws(block: Dict, style_dict: Dict[int, SpanStyle]):
+    """
+    block의 styled_lines를 순회하며 그릴 span마다 (x, y, text, style, font_family, rotate, width)를 반환하는 generator.
+    (기준선 시작 좌표 x, y는 페이지 좌표)
+    """
     styled_lines = block.get("styled_lines", [])  # buildStyledLines 결과
     
     if (block.get("class_name") not in ["Picture","Table"]):
@@ -191,48 +201,132 @@ def drawStyledLines(block: Dict, style_dict: Dict[int, SpanStyle], links:List[Di
         line_base_vert = getRotatedBbox(line_frame["bbox"], rotate)[3]
 
         for positioned_span in styled_line["positioned_spans"]:
-            style_id = positioned_span["style_id"]
-            text = positioned_span["text"]
-            rel_x = positioned_span["rel_x"]
-            font_family = positioned_span["font_family"]
-
-            style = style_dict[style_id]
-            font_path = getFontPath(style, font_family)
-            font_name = getFontName(style, font_family)
-            
-            
-            # print(text, style.x_gap_with_prev, style.y_offset, style.is_bold)
+            style = style_dict[positioned_span["style_id"]]
 
-            x, y = getDrawPosition(line_start_hor, line_base_vert, rel_x, style.y_offset, rotate)
-            
-            # print(
-            #     "point=" + f'({x}, {y})',
-            #     "text=" + text,
-            #     "fontfile=" + font_path,
-            #     "fontname=" + font_name,
-            #     "fontsize=" + str(style.font_size),
-            #     "color=" + str(style.font_color),
-            #     "rotate=" + str(style.rotate),
-            #     )
-
-            # 텍스트 삽입
+            x, y = getDrawPosition(line_start_hor, line_base_vert, positioned_span["rel_x"], style.y_offset, rotate)
+
+            yield x, y, positioned_span["text"], style, positioned_span["font_family"], rotate, positioned_span["width"]
+
+
+def insertSpanLink(page, style: SpanStyle, links: List[Dict], x, y, width, rotate):
+    # 링크 삽입
+    link_num = style.link_num
+    
+    if link_num is not None:
+        link = links[link_num]
+        from_bbox = makeBboxFromOrigin(x, y, width, style.font_size, rotate)
+        insertLinkToBbox(page, link, from_bbox)
+
+
+class DocumentFontRegistry:
+    """
+    문서 하나에 폰트 파일을 한 번만 등록하고, 다른 페이지에서는 같은 xref를 페이지 리소스에 연결해 재사용하는 클래스.
+    span마다 fontfile=로 insert_text를 호출하면 페이지마다 폰트 파일을 다시 읽어 들이므로,
+    처음 한 번만 insert_font로 넣고 이후에는 fontname만으로 그릴 수 있게 합니다.
+    """
+
+    def __init__(self, doc: pymupdf.Document):
+        self.doc = doc
+        self.font_xrefs = {}  # font_name -> xref
+        self.page_fonts = {}  # page xref -> 페이지에 연결된 font_name 집합
+
+    def ensureFont(self, page: pymupdf.Page, font_name: str, font_path: str) -> str:
+        page_fonts = self.page_fonts.setdefault(page.xref, set())
+        if font_name in page_fonts:
+            return font_name
+
+        xref = self.font_xrefs.get(font_name)
+        target = self._fontDictLocation(page) if xref is not None else None
+        if target is not None:
+            target_xref, path = target
+            self.doc.xref_set_key(target_xref, f"{path}{font_name}", f"{xref} 0 R")
+        else:
+            self.font_xrefs[font_name] = page.insert_font(fontname=font_name, fontfile=font_path)
+
+        page_fonts.add(font_name)
+        return font_name
+
+    def _fontDictLocation(self, page: pymupdf.Page):
+        """
+        페이지 Font 리소스 dict의 위치 (객체 xref, 그 객체 안의 key 경로) 반환.
+        xref_set_key는 경로 중간의 간접 참조를 따라가지 못하고 값을 깨뜨리므로, Resources/Font가 간접 참조면 참조한 객체에 직접 씁니다.
+        Resources를 상위 Pages에서 상속받는 페이지는 직접 연결하면 상속 리소스가 가려지므로 None (insert_font 사용)
+        """
+        xref, path = page.xref, ""
+        for key in ("Resources", "Font"):
+            value_type, value = self.doc.xref_get_key(xref, f"{path}{key}")
+            if value_type == "xref":
+                xref, path = int(value.split()[0]), ""
+            elif value_type == "dict" or (value_type == "null" and key == "Font"):
+                path = f"{path}{key}/"
+            else:
+                return None
+        return xref, path
+
+
+def drawStyledLines(block: Dict, style_dict: Dict[int, SpanStyle], links:List[Dict], page: pymupdf.Page, font_registry: DocumentFontRegistry):
+    for x, y, text, style, font_family, rotate, width in iterSpanDraws(block, style_dict):
+        font_name = font_registry.ensureFont(page, getFontName(style, font_family), getFontPath(style, font_family))
+
+        # 텍스트 삽입
+        page.insert_text(
+            point=(x, y),
+            text=text,
+            fontname=font_name,
+            fontsize=style.font_size * block.get("scale", 1.0),
+            color=style.font_color,
+            rotate=style.rotate,
+        )
+        
+        insertSpanLink(page, style, links, x, y, width, rotate)
+
+
+class PageTextWriters:
+    """
+    한 페이지에 그릴 span들을 글자 색상별 pymupdf.TextWriter에 모아 두었다가 한 번에 쓰는 클래스.
+    TextWriter 하나에 여러 폰트를 섞어 쓸 수 있으므로 (색상)별로 묶고, 폰트는 글자마다 TextWriter가 관리합니다.
+    span마다 insert_text를 호출해 content stream 조각과 폰트 리소스가 계속 추가되는 것을 막습니다.
+    """
+
+    def __init__(self, page: pymupdf.Page):
+        self.page = page
+        self.writers = {}  # font_color -> TextWriter
+
+    def append(self, x, y, text, font: pymupdf.Font, font_size, color):
+        key = tuple(color)
+        writer = self.writers.get(key)
+        if writer is None:
+            writer = pymupdf.TextWriter(self.page.rect, color=key)
+            self.writers[key] = writer
+        writer.append((x, y), text, font=font, fontsize=font_size)
+
+    def write(self):
+        for color, writer in self.writers.items():
+            writer.write_text(self.page, color=color)
+        self.writers = {}
+
+
+def drawStyledLinesBatched(block: Dict, style_dict: Dict[int, SpanStyle], links: List[Dict], page: pymupdf.Page, writers: PageTextWriters,
+                           font_registry: DocumentFontRegistry):
+    """drawStyledLines와 같은 위치/크기로 그리되, 글자는 writers에 모아 두고 나중에 한 번에 씁니다."""
+    for x, y, text, style, font_family, rotate, width in iterSpanDraws(block, style_dict):
+        font_size = style.font_size * block.get("scale", 1.0)
+
+        if style.rotate == 0:
+            writers.append(x, y, text, getFont(style, font_family), font_size, style.font_color)
+        else:
+            # TextWriter.append는 글자 회전을 지원하지 않으므로 회전된 글자는 기존 방식으로 그림
+            font_name = font_registry.ensureFont(page, getFontName(style, font_family), getFontPath(style, font_family))
             page.insert_text(
                 point=(x, y),
                 text=text,
-                fontfile=font_path,
                 fontname=font_name,
-                fontsize=style.font_size * block.get("scale", 1.0),
+                fontsize=font_size,
                 color=style.font_color,
                 rotate=style.rotate,
             )
-            
-            # 링크 삽입
-            link_num = style.link_num
-            
-            if link_num is not None:
-                link = links[link_num]
-                from_bbox = makeBboxFromOrigin(x, y, positioned_span["width"], style.font_size, rotate)
-                insertLinkToBbox(page, link, from_bbox)
+
+        insertSpanLink(page, style, links, x, y, width, rotate)
                 
                 
 # 번역 안된 상태 그대로 남는 블락에 link insert 하는 함수
@@ -244,30 +338,46 @@ def insertLinksOnly(block:Dict, links: List[Dict], page: pymupdf.Page):
                 insertLinkToBbox(page, links[link_num], span["bbox"])
 
 # 각 block의 styled_lines를 이용하여 page에 텍스트를 그리는 함수
-def replaceTranslatedBlocks(page_info: Dict, style_dict: Dict[int, SpanStyle], page: pymupdf.Page):
+def replaceTranslatedBlocks(page_info: Dict, style_dict: Dict[int, SpanStyle], page: pymupdf.Page, renderer: str = DEFAULT_RENDERER,
+                            font_registry: DocumentFontRegistry = None):
+    """
+    renderer
+      - "textwriter": 페이지의 글자를 색상별 TextWriter에 모아 한 번에 씀 (기본)
+      - "insert_text": span마다 page.insert_text 호출
+    font_registry: 같은 문서의 여러 페이지를 그릴 때 폰트를 한 번만 등록하도록 공유하는 DocumentFontRegistry
+    """
+    font_registry = font_registry or DocumentFontRegistry(page.parent)
     blocks = page_info["blocks"]
     deleteTextBlocks(page, [block for block in blocks if block["to_be_translated"]])
     
     links = page_info.get("links", [])
+    writers = PageTextWriters(page) if renderer == RENDERER_TEXTWRITER else None
+
     for block in blocks:
-        if block["to_be_translated"]:
-            drawStyledLines(block, style_dict, links, page)
-        else:
+        if not block["to_be_translated"]:
             insertLinksOnly(block, links, page)
+        elif writers is not None:
+            drawStyledLinesBatched(block, style_dict, links, page, writers, font_registry)
+        else:
+            drawStyledLines(block, style_dict, links, page, font_registry)
+
+    if writers is not None:
+        writers.write()
 
 
-def replaceTranslatedFile(page_infos, file_path, output_path):
+def replaceTranslatedFile(page_infos, file_path, output_path, renderer: str = DEFAULT_RENDERER, save_profile: str = None):
     page_info_map = {page_info["page_num"]: page_info for page_info in page_infos}
     
     with pymupdf.open(file_path) as doc:
+        font_registry = DocumentFontRegistry(doc)
         for page_num, page in enumerate(doc, start=1):
             page_info = page_info_map[page_num]
             
             style_dict = page_info["style_dict"]
             
-            replaceTranslatedBlocks(page_info, style_dict, page)
+            replaceTranslatedBlocks(page_info, style_dict, page, renderer=renderer, font_registry=font_registry)
         
-        doc.save(output_path, garbage=3, clean=True, deflate=True)
+        return finalizeOutput(doc, output_path, profile=save_profile)
     
     
 
@@ -0,0 +1,61 @@
+import glob
+import os
+import pymupdf
+import pytest
+from styled_translate.draw_styled_blocks import DocumentFontRegistry
+
+FONT_PATHS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "NotoSans", "*.ttf")))
+
+
+def makeSharedResourcesPdf(font_indirect):
+    """
+    페이지 3개가 간접 참조 /Resources 객체 하나를 함께 쓰는 PDF (font_indirect이면 Font dict도 간접 참조).
+    각 페이지에는 그 공유 리소스의 helv 폰트로 쓴 원문이 있습니다.
+    """
+    doc = pymupdf.open()
+    font_xref = doc.get_new_xref()
+    doc.update_object(font_xref, "<</Type/Font/Subtype/Type1/BaseFont/Helvetica/Encoding/WinAnsiEncoding>>")
+    if font_indirect:
+        fonts_xref = doc.get_new_xref()
+        doc.update_object(fonts_xref, f"<</helv {font_xref} 0 R>>")
+        fonts = f"{fonts_xref} 0 R"
+    else:
+        fonts = f"<</helv {font_xref} 0 R>>"
+    resources_xref = doc.get_new_xref()
+    doc.update_object(resources_xref, f"<</Font {fonts}>>")
+
+    for page_num in range(3):
+        page = doc.new_page(width=300, height=300)
+        doc.xref_set_key(page.xref, "Resources", f"{resources_xref} 0 R")
+        contents_xref = doc.get_new_xref()
+        doc.update_object(contents_xref, "<<>>")
+        doc.update_stream(contents_xref, f"BT /helv 12 Tf 20 260 Td (original {page_num}) Tj ET".encode())
+        doc.xref_set_key(page.xref, "Contents", f"{contents_xref} 0 R")
+    return doc
+
+
+@pytest.mark.skipif(not FONT_PATHS, reason="static 폰트 파일 없음")
+@pytest.mark.parametrize("font_indirect", [False, True])
+def test_rotated_span_with_indirect_resources(font_indirect, tmp_path):
+    """간접 참조 /Resources 페이지에 (원문 삭제 없이) 등록 폰트로 회전 span을 그려도 원문과 번역문이 모두 남는지"""
+    doc = makeSharedResourcesPdf(font_indirect)
+    registry = DocumentFontRegistry(doc)
+    for page in doc:
+        font_name = registry.ensureFont(page, "NotoSans-R", FONT_PATHS[0])
+        page.insert_text((150, 50), f"rotated {page.number}", fontname=font_name, fontsize=12, rotate=90)
+
+    path = tmp_path / "out.pdf"
+    doc.save(path)
+    doc.close()
+
+    with pymupdf.open(path) as saved:
+        # 간접 참조를 지나는 경로에 xref_set_key를 쓰면 공유 리소스 객체가 "(fitz: replace me!)"로 깨짐
+        assert not any("replace me" in saved.xref_object(xref) for xref in range(1, saved.xref_length()))
+        font_xrefs = set()
+        for page in saved:
+            text = page.get_text()
+            assert f"original {page.number}" in text
+            assert f"rotated {page.number}" in text
+            font_xrefs.update(font[0] for font in page.get_fonts() if font[4] == "NotoSans-R")
+        # 폰트 파일은 문서에 한 번만 들어감
+        assert len(font_xrefs) == 1
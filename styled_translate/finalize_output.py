@@ -0,0 +1,63 @@
+import os
+import time
+import pymupdf
+from util.console_utils import print_info
+
+'''
+번역본 저장 설정 모음.
+  - subset: 저장 전에 doc.subset_fonts()로 임베딩된 폰트를 실제로 쓴 글자만 남기도록 줄임
+  - save_options: doc.save()에 그대로 넘기는 옵션 (use_objstms: object stream 사용, compression_effort: 압축 강도 0~100)
+'''
+SAVE_PROFILES = {
+    # 저장 속도 우선 (폰트 전체 임베딩, 기존 저장 방식과 같음)
+    "fast": {
+        "subset": False,
+        "save_options": {"garbage": 3, "clean": True, "deflate": True},
+    },
+    # 폰트 subset + object stream (기본)
+    "default": {
+        "subset": True,
+        "save_options": {"garbage": 3, "clean": True, "deflate": True, "use_objstms": 1},
+    },
+    # 파일 크기 우선
+    "compact": {
+        "subset": True,
+        "save_options": {"garbage": 4, "clean": True, "deflate": True, "deflate_images": True, "deflate_fonts": True,
+                         "use_objstms": 1, "compression_effort": 100},
+    },
+}
+
+DEFAULT_SAVE_PROFILE = os.environ.get("PDF_SAVE_PROFILE", "default")
+
+
+def finalizeOutput(doc: pymupdf.Document, output_path: str, profile: str = None):
+    """
+    번역이 끝난 문서를 profile 설정으로 저장하고, 저장 결과를 출력/반환하는 함수.
+
+    Returns:
+        dict: profile, 폰트 subset 시간, 저장 시간, 출력 파일 크기(bytes)
+    """
+    profile = profile or DEFAULT_SAVE_PROFILE
+    if profile not in SAVE_PROFILES:
+        raise ValueError(f"알 수 없는 저장 profile: {profile} (가능한 값: {', '.join(SAVE_PROFILES)})")
+    settings = SAVE_PROFILES[profile]
+
+    start = time.perf_counter()
+    if settings["subset"]:
+        doc.subset_fonts()
+    subset_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    doc.save(output_path, **settings["save_options"])
+    save_time = time.perf_counter() - start
+
+    report = {
+        "profile": profile,
+        "subset_time": round(subset_time, 3),
+        "save_time": round(save_time, 3),
+        "output_bytes": os.path.getsize(output_path),
+    }
+    print_info(f"저장 완료 ({profile}): {report['output_bytes'] / 1024 / 1024:.2f}MB, "
+               f"폰트 subset {report['subset_time']}초, 저장 {report['save_time']}초")
+
+    return report
@@ -0,0 +1,99 @@
+import math
+from typing import Dict, List
+from styled_translate.assign_style import SpanStyle, getFontScale
+from styled_translate.build_styled_lines import buildStyledLines, getCharWidths, getLineXLimit
+from preprocess.make_result_line_frames import assignLineFramesToBlock
+
+FIT_RESOLUTION = 0.01  # 찾은 scale과 실제 최대 scale의 차이 한도 (1%, 기존 0.99 단계와 같은 정밀도)
+
+
+class FitError(Exception):
+    """최소 scale로도 블록에 번역문을 넣지 못했을 때 발생"""
+    def __init__(self, message="scale 줄여 삽입시도 실패"):
+        super().__init__(message)
+
+
+def measureTextWidth(styled_spans: List[Dict], style_dict: Dict[int, SpanStyle]) -> float:
+    """scale 1.0 기준 전체 번역문 너비 (개행 무시)"""
+    return sum(sum(getCharWidths(span, style_dict)) for span in styled_spans)
+
+
+def measureLineCapacity(block: Dict) -> float:
+    """현재 block["line_frames"]에 넣을 수 있는 전체 너비"""
+    line_frames = block.get("line_frames", [])
+    return sum(getLineXLimit(line_frames, idx) for idx in range(len(line_frames)))
+
+
+def estimateFitScale(text_width: float, capacity: float) -> float:
+    """
+    너비 기준으로 들어갈 scale 추정.
+    scale을 줄이면 글자 너비는 scale에 비례해 줄고, 줄 높이도 줄어 줄 수(용량)는 1/scale에 비례해 늘어나므로
+    text_width * s <= capacity / s, 즉 s <= sqrt(capacity / text_width)
+    """
+    if text_width <= 0 or capacity <= 0:
+        return 1.0
+    return min(1.0, math.sqrt(capacity / text_width))
+
+
+def fitStyledSpans(block: Dict, styled_spans: List[Dict], style_dict: Dict[int, SpanStyle], src_lang: str, target_lang: str,
+                   min_scale: float, resolution: float = FIT_RESOLUTION):
+    """
+    블록에 들어가는 가장 큰 scale(1.0 이하)을 찾아 (styled_lines, scale) 반환.
+
+    scale을 0.99씩 줄여가며 매번 배치를 다시 계산하던 방식 대신,
+    1) scale 1.0, 2) 너비/용량으로 추정한 scale, 3) (추정값이 안 들어가면) 하한을 먼저 시험하고
+    남은 구간을 로그 스케일 이분 탐색으로 resolution 이내까지 좁힙니다. (배치 계산 수십 번 → 10번 안팎)
+    사용한 배치 계산 횟수는 block["fit_passes"]에 기록합니다.
+    """
+    base_font_scale = getFontScale(src_lang, target_lang)
+    passes = 0
+    best = None  # (scale, styled_lines, line_frames)
+
+    def try_scale(scale):
+        nonlocal passes, best
+        passes += 1
+        try:
+            assignLineFramesToBlock(block, src_lang, target_lang, font_scale=base_font_scale * scale)
+            styled_lines = buildStyledLines(styled_spans, style_dict, block, scale=scale)
+        except Exception:
+            return False
+        if best is None or scale > best[0]:
+            best = (scale, styled_lines, block["line_frames"])
+        return True
+
+    def finish():
+        block["fit_passes"] = block.get("fit_passes", 0) + passes
+        if best is None:
+            raise FitError()
+        # 마지막으로 시험한 scale이 아닐 수 있으므로 성공한 scale의 line_frames로 되돌림
+        scale, styled_lines, line_frames = best
+        block["line_frames"] = line_frames
+        return styled_lines, scale
+
+    hi = 1.0
+    if try_scale(hi):
+        return finish()
+
+    lo = min_scale * (1 - resolution)
+
+    # 너비/용량 기반 추정값으로 탐색 구간을 먼저 좁힘 (조금 넘치는 블록은 여기서 거의 끝남)
+    guess = estimateFitScale(measureTextWidth(styled_spans, style_dict), measureLineCapacity(block))
+    if lo < guess < hi * (1 - resolution):
+        if try_scale(guess):
+            lo = guess
+        else:
+            hi = guess
+            if not try_scale(lo):
+                return finish()
+    elif not try_scale(lo):
+        return finish()
+
+    # 로그 스케일 이분 탐색: lo는 항상 들어가는 scale, hi는 들어가지 않는 scale
+    while hi / lo > 1 + resolution:
+        mid = math.sqrt(lo * hi)
+        if try_scale(mid):
+            lo = mid
+        else:
+            hi = mid
+
+    return finish()
@@ -0,0 +1,112 @@
+import os
+import random
+import pytest
+import styled_translate.fit_engine as fit_engine
+from styled_translate.assign_style import SpanStyle, getFontScale
+from styled_translate.build_styled_lines import buildStyledLines
+from styled_translate.fit_engine import FIT_RESOLUTION, FitError, fitStyledSpans
+from styled_translate.get_font_family import getFontFilePath
+from preprocess.make_result_line_frames import assignLineFramesToBlock
+
+SRC_LANG, TARGET_LANG = "English", "한국어"
+FONT_FAMILY = "NotoSans"
+
+
+def linearFitScale(block, styled_spans, style_dict, min_scale):
+    """기존 방식: scale을 0.99씩 줄여가며 처음 들어가는 scale 반환"""
+    scale = 1.0
+    while True:
+        try:
+            assignLineFramesToBlock(block, SRC_LANG, TARGET_LANG, font_scale=getFontScale(SRC_LANG, TARGET_LANG) * scale)
+            buildStyledLines(styled_spans, style_dict, block, scale=scale)
+            return scale
+        except Exception:
+            if scale < min_scale:
+                raise Exception("scale 줄여 삽입시도 실패")
+            scale = scale * 0.99
+
+
+def assertSameScale(found, expected):
+    """두 scale의 차이가 FIT_RESOLUTION(큰 쪽 기준) 이내인지"""
+    assert abs(found - expected) <= FIT_RESOLUTION * max(found, expected), (found, expected)
+
+
+def makeBlock(seed):
+    rng = random.Random(seed)
+    x0, y0 = 50.0, 100.0
+    width, height = rng.uniform(120, 300), rng.uniform(9, 13)
+    line_count = rng.randint(1, 6)
+    lines = [{"bbox": [x0, y0 + i * height * 1.2, x0 + width, y0 + i * height * 1.2 + height], "dir": (1, 0)}
+             for i in range(line_count)]
+    return {"lines": lines, "bbox": [x0, y0, x0 + width, lines[-1]["bbox"][3]]}
+
+
+def makeSpans(seed, block):
+    """블록 용량의 1~2.5배 정도 되는 번역문"""
+    rng = random.Random(seed)
+    words = ["translation", "block", "scale", "font", "layout", "의", "번역문", "크기", "a", "of", "the"]
+    line_width = block["bbox"][2] - block["bbox"][0]
+    char_count = int(len(block["lines"]) * line_width / 5 * rng.uniform(1.0, 2.5))
+    text = ""
+    while len(text) < char_count:
+        text += rng.choice(words) + " "
+    cut = rng.randint(1, len(text) - 1)
+    return [{"text": text[:cut], "style_id": 0, "font_family": FONT_FAMILY},
+            {"text": text[cut:], "style_id": 1, "font_family": FONT_FAMILY}]
+
+
+def makeStyleDict(font_size):
+    return {
+        0: SpanStyle(False, 0.0, 0.0, font_size, False, False, (0, 0, 0), 0, None),
+        1: SpanStyle(False, 0.0, 0.0, font_size, False, True, (0, 0, 0), 0, None),
+    }
+
+
+@pytest.mark.parametrize("threshold", [1.0, 0.999, 0.87, 0.6354, 0.5, 0.4501, 0.449])
+def test_fit_scale_matches_linear_search_on_threshold(threshold, monkeypatch):
+    """scale이 threshold 이하일 때만 들어가는 블록에서 이분 탐색 결과가 기존 0.99 단계 탐색과 FIT_RESOLUTION 이내로 같은지"""
+    def build(styled_spans, style_dict, block, scale=1.0):
+        if scale > threshold:
+            raise fit_engine.FitError()
+        return [{"scale": scale}]
+
+    monkeypatch.setattr(fit_engine, "assignLineFramesToBlock", lambda block, *args, **kwargs: block.setdefault("line_frames", []))
+    monkeypatch.setattr(fit_engine, "buildStyledLines", build)
+
+    expected = 1.0
+    while expected > threshold:
+        expected *= 0.99
+
+    block = {}
+    if expected < 0.45 * 0.99:
+        with pytest.raises(FitError):
+            fitStyledSpans(block, [], {}, SRC_LANG, TARGET_LANG, min_scale=0.45)
+        return
+
+    styled_lines, scale = fitStyledSpans(block, [], {}, SRC_LANG, TARGET_LANG, min_scale=0.45)
+    assert styled_lines == [{"scale": scale}]
+    assert scale <= threshold
+    assertSameScale(scale, expected)
+    assert block["fit_passes"] <= 10
+
+
+@pytest.mark.skipif(not os.path.exists(getFontFilePath(FONT_FAMILY)), reason="static 폰트 파일 없음")
+@pytest.mark.parametrize("seed", range(20))
+def test_fit_scale_matches_linear_search_on_layout(seed):
+    """실제 줄 배치에서도 이분 탐색 결과가 기존 0.99 단계 탐색과 FIT_RESOLUTION 이내로 같은지"""
+    block = makeBlock(seed)
+    styled_spans = makeSpans(seed, block)
+    style_dict = makeStyleDict(random.Random(seed).uniform(8, 12))
+
+    try:
+        expected = linearFitScale(dict(block), styled_spans, style_dict, min_scale=0.45)
+    except Exception:
+        with pytest.raises(FitError):
+            fitStyledSpans(dict(block), styled_spans, style_dict, SRC_LANG, TARGET_LANG, min_scale=0.45)
+        return
+
+    fitted = dict(block)
+    styled_lines, scale = fitStyledSpans(fitted, styled_spans, style_dict, SRC_LANG, TARGET_LANG, min_scale=0.45)
+    assertSameScale(scale, expected)
+    # 반환된 line_frames는 찾은 scale로 계산한 것이어야 함
+    assert buildStyledLines(styled_spans, style_dict, fitted, scale=scale) == styled_lines
@@ -0,0 +1,103 @@
+from threading import Lock
+import os
+import numpy as np
+import pymupdf
+from util.kv_cache import CACHE_ENABLED, getCachePath
+
+FONT_METRICS_DIR_NAME = "font_metrics"
+
+
+class GlyphAdvanceTable:
+    """
+    폰트 하나의 codepoint → 글자 너비(font size 1 기준) 조회 테이블.
+
+    글자 너비는 font size에 비례하므로, 테이블에서 찾은 값에 font size만 곱하면
+    font.char_lengths(text, fontsize=...)와 같은 결과를 얻습니다.
+    폰트에 없는 글자(테이블 값이 NaN)나 테이블 범위를 넘는 글자만 pymupdf로 직접 측정합니다.
+    """
+
+    def __init__(self, font_path):
+        self.font_path = font_path
+        self._font = None
+        self._font_lock = Lock()
+        self.advances = self._loadOrBuild()
+
+    def _getFont(self):
+        if self._font is None:
+            self._font = pymupdf.Font(fontfile=self.font_path)
+        return self._font
+
+    def _cachePath(self):
+        stat = os.stat(self.font_path)
+        base_name = os.path.splitext(os.path.basename(self.font_path))[0]
+        dir_path = getCachePath(FONT_METRICS_DIR_NAME)
+        os.makedirs(dir_path, exist_ok=True)
+        # 폰트 파일이 바뀌면 다른 파일 이름이 되도록 크기와 수정 시각을 포함
+        return os.path.join(dir_path, f"{base_name}-{stat.st_size}-{int(stat.st_mtime)}.npy")
+
+    def _loadOrBuild(self):
+        cache_path = self._cachePath() if CACHE_ENABLED else None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                advances = np.load(cache_path)
+                # 예전 float32 테이블은 다시 만듦
+                if advances.dtype == np.float64:
+                    return advances
+            except (OSError, ValueError):
+                pass
+
+        advances = self._build()
+
+        if cache_path:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, advances)
+            os.replace(tmp_path, cache_path)
+
+        return advances
+
+    def _build(self):
+        font = self._getFont()
+        codepoints = np.asarray(sorted(font.valid_codepoints()), dtype=np.int64)
+        if len(codepoints) == 0:
+            return np.full(1, np.nan, dtype=np.float64)
+
+        advances = np.full(int(codepoints[-1]) + 1, np.nan, dtype=np.float64)
+        # char_lengths 한 번 호출로 폰트의 모든 글자 너비 측정
+        text = "".join(map(chr, codepoints.tolist()))
+        advances[codepoints] = font.char_lengths(text, fontsize=1)
+        return advances
+
+    def charWidths(self, text, font_size):
+        """text의 글자별 너비 리스트 반환 (font.char_lengths와 같은 값)"""
+        if not text:
+            return []
+
+        codes = np.fromiter(map(ord, text), dtype=np.int64, count=len(text))
+        in_range = codes < len(self.advances)
+        widths = np.full(len(codes), np.nan, dtype=np.float64)
+        widths[in_range] = self.advances[codes[in_range]]
+
+        # 테이블에 없는 글자는 pymupdf로 측정 (font size 1 기준)
+        missing = np.flatnonzero(np.isnan(widths))
+        if len(missing):
+            with self._font_lock:
+                widths[missing] = self._getFont().char_lengths("".join(text[i] for i in missing), fontsize=1)
+
+        return (widths * font_size).tolist()
+
+
+_advance_tables = {}
+_advance_tables_lock = Lock()
+
+
+def getAdvanceTable(font_path):
+    """폰트 경로별 GlyphAdvanceTable 반환 (없으면 생성)"""
+    table = _advance_tables.get(font_path)
+    if table is not None:
+        return table
+
+    with _advance_tables_lock:
+        if font_path not in _advance_tables:
+            _advance_tables[font_path] = GlyphAdvanceTable(font_path)
+
+    return _advance_tables[font_path]
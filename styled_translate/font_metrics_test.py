@@ -0,0 +1,21 @@
+import glob
+import os
+import pymupdf
+import pytest
+import styled_translate.font_metrics as font_metrics
+from styled_translate.font_metrics import GlyphAdvanceTable
+
+FONT_PATHS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "NotoSans*", "*.ttf")))
+
+
+@pytest.mark.skipif(not FONT_PATHS, reason="static 폰트 파일 없음")
+@pytest.mark.parametrize("font_path", FONT_PATHS[:4])
+@pytest.mark.parametrize("font_size", [1, 7.5, 9.96, 11, 23.7])
+def test_char_widths_match_char_lengths(font_path, font_size, monkeypatch):
+    """테이블로 구한 글자 너비가 font.char_lengths와 정확히 같은지 (폰트에 없는 글자, 테이블 범위 밖 글자 포함)"""
+    monkeypatch.setattr(font_metrics, "CACHE_ENABLED", False)
+    table = GlyphAdvanceTable(font_path)
+    font = pymupdf.Font(fontfile=font_path)
+
+    text = "".join(map(chr, sorted(font.valid_codepoints()))) + "한글 漢字 \U0001F600\u0000"
+    assert table.charWidths(text, font_size) == font.char_lengths(text, fontsize=font_size)
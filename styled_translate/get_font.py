@@ -1,5 +1,5 @@
 from styled_translate.assign_style import SpanStyle
-from styled_translate.get_font_family import hasBold, hasItalic
+from styled_translate.get_font_family import hasBold, hasItalic, getFontFilePath
 import pymupdf
 
 # 스타일에 따라 알맞은 폰트 경로를 선택하고 fitz.Font 인스턴스를 반환
@@ -16,12 +16,12 @@ def getFont(style: SpanStyle, font_family: str) -> pymupdf.Font:
 def getFontPath(style: SpanStyle, font_family: str) -> str:
     key = (style.is_bold and hasBold(font_family), style.is_italic and hasItalic(font_family))
     path_map = {
-        (False, False): f"./static/{font_family}/{font_family}-Regular.ttf",
-        (True, False): f"./static/{font_family}/{font_family}-Bold.ttf",
-        (False, True):  f"./static/{font_family}/{font_family}-Italic.ttf",
-        (True, True): f"./static/{font_family}/{font_family}-BoldItalic.ttf"
+        (False, False): getFontFilePath(font_family, "Regular"),
+        (True, False): getFontFilePath(font_family, "Bold"),
+        (False, True):  getFontFilePath(font_family, "Italic"),
+        (True, True): getFontFilePath(font_family, "BoldItalic")
     }
-    path = path_map.get(key, f"./static/{font_family}/{font_family}-Regular.ttf")
+    path = path_map.get(key, getFontFilePath(font_family, "Regular"))
 
     return path
   
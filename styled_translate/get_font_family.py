@@ -1,4 +1,14 @@
+from threading import Lock
+import json
+import os
+import numpy as np
 import pymupdf
+from util.kv_cache import CACHE_ENABLED, getCachePath
+
+# 실행 위치(cwd)와 관계없이 저장소의 static 폴더를 사용
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+COVERAGE_CACHE_VERSION = 1  # 저장 형식이 바뀌면 올려서 이전 캐시를 무효화
 
 basic_font_family_map = {
     "한국어": "NotoSansKR",
@@ -23,18 +33,137 @@ has_italic_family_list = [
     "NotoSans",
 ]
 
-codepoints_map = {}
 
-for font_family in font_family_list:
-    font = pymupdf.Font(fontfile=f"./static/{font_family}/{font_family}-Regular.ttf")
-    codepoints = font.valid_codepoints()
-    codepoints_map[font_family] = codepoints
+def getFontFilePath(font_family: str, variant: str = "Regular") -> str:
+    """static 폴더 안의 폰트 파일 절대 경로"""
+    return os.path.join(STATIC_DIR, font_family, f"{font_family}-{variant}.ttf")
+
+
+def fontFileSignature(font_family: str):
+    """폰트 파일이 바뀌었는지 확인하기 위한 [크기, 수정 시각]"""
+    stat = os.stat(getFontFilePath(font_family))
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+'''
+family별 커버하는 codepoint(정렬된 np.ndarray)는 import 시점이 아니라 처음 사용할 때 한 번만 준비합니다.
+캐시 파일에 저장된 값이 있고 폰트 파일의 크기/수정 시각이 그대로면 폰트를 열지 않고 캐시를 사용하고,
+없거나 달라졌으면 폰트를 열어 다시 계산한 뒤 캐시 파일을 갱신합니다.
+'''
+_codepoints_map = None
+_codepoints_lock = Lock()
+
+
+def _coverageCachePath():
+    return getCachePath(f"font_coverage-v{COVERAGE_CACHE_VERSION}.npz")
+
+
+def _loadCoverageCache(signatures):
+    try:
+        with np.load(_coverageCachePath()) as data:
+            if json.loads(str(data["signatures"])) != signatures:
+                return None
+            return {font_family: data[font_family] for font_family in font_family_list}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _buildCoverage():
+    codepoints_map = {}
+    for font_family in font_family_list:
+        font = pymupdf.Font(fontfile=getFontFilePath(font_family))
+        codepoints_map[font_family] = np.asarray(sorted(font.valid_codepoints()), dtype=np.int64)
+    return codepoints_map
+
+
+def _saveCoverageCache(codepoints_map, signatures):
+    cache_path = _coverageCachePath()
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, signatures=json.dumps(signatures), **codepoints_map)
+    os.replace(tmp_path, cache_path)
+
+
+def getCodepointsMap():
+    """font family → 커버하는 codepoint 배열 (처음 호출할 때 캐시에서 읽거나 계산)"""
+    global _codepoints_map
+
+    if _codepoints_map is not None:
+        return _codepoints_map
+
+    with _codepoints_lock:
+        if _codepoints_map is None:
+            signatures = {font_family: fontFileSignature(font_family) for font_family in font_family_list}
+            codepoints_map = _loadCoverageCache(signatures) if CACHE_ENABLED else None
+            if codepoints_map is None:
+                codepoints_map = _buildCoverage()
+                if CACHE_ENABLED:
+                    _saveCoverageCache(codepoints_map, signatures)
+            _codepoints_map = codepoints_map
+
+    return _codepoints_map
 
 
 def validCharInFontFamily(char: str, font_family: str):
-    codepoints = codepoints_map[font_family]
+    codepoints = getCodepointsMap()[font_family]
+    idx = np.searchsorted(codepoints, ord(char))
     
-    return ord(char) in codepoints
+    return idx < len(codepoints) and codepoints[idx] == ord(char)
+
+
+class CoverageIndex:
+    """
+    codepoint → 사용할 font family를 찾는 범위 테이블.
+
+    target 언어의 기본 font family를 먼저, 나머지는 font_family_list 순서대로 우선순위를 매겨
+    각 codepoint를 처음으로 커버하는 family로 미리 정해 두고, 같은 family가 이어지는 구간의 시작점만 저장합니다.
+    조회는 정렬된 시작점 배열에 대한 이분 탐색(np.searchsorted)이며, 문자열 전체를 한 번에 조회할 수 있습니다.
+    """
+
+    NO_FAMILY = -1
+
+    def __init__(self, families, codepoints_by_family):
+        self.families = list(families)
+
+        max_codepoint = max((int(codepoints_by_family[f][-1]) for f in self.families if len(codepoints_by_family[f])), default=0)
+        dense = np.full(max_codepoint + 2, self.NO_FAMILY, dtype=np.int16)
+
+        # 우선순위가 낮은 family부터 채워서 높은 family가 덮어쓰게 함
+        for family_id in range(len(self.families) - 1, -1, -1):
+            codepoints = np.asarray(codepoints_by_family[self.families[family_id]], dtype=np.int64)
+            dense[codepoints] = family_id
+
+        # family가 바뀌는 지점만 남겨 범위 테이블로 압축 (마지막 구간은 NO_FAMILY로 끝남)
+        change_points = np.flatnonzero(dense[1:] != dense[:-1]) + 1
+        self.starts = np.concatenate(([0], change_points)).astype(np.int64)
+        self.family_ids = dense[self.starts]
+
+        self.newline_id = self.families.index("NotoSans") if "NotoSans" in self.families else self.NO_FAMILY
+
+    def lookupIds(self, text):
+        """text의 글자별 family id 배열 반환 (커버하는 family가 없으면 NO_FAMILY)"""
+        codes = np.fromiter(map(ord, text), dtype=np.int64, count=len(text))
+        ids = self.family_ids[np.searchsorted(self.starts, codes, side="right") - 1]
+        # 개행은 항상 NotoSans
+        ids[codes == ord("\n")] = self.newline_id
+        return ids
+
+
+_coverage_indexes = {}
+
+
+def getCoverageIndex(target_languge: str):
+    """target 언어별 CoverageIndex 반환 (지원하지 않는 언어면 None)"""
+    if target_languge not in basic_font_family_map:
+        return None
+
+    coverage_index = _coverage_indexes.get(target_languge)
+    if coverage_index is None:
+        basic_font_family = basic_font_family_map[target_languge]
+        families = [basic_font_family] + [f for f in font_family_list if f != basic_font_family]
+        coverage_index = CoverageIndex(families, getCodepointsMap())
+        _coverage_indexes[target_languge] = coverage_index
+
+    return coverage_index
 
 
 '''
@@ -43,16 +172,15 @@ target 언어, 문자하나 받아서 font_family를 문자열로 반환하는 
 def getFontFamily(char:str, target_languge: str):
     if (char == '\n'):
         return 'NotoSans'
-    
-    basic_font_family = basic_font_family_map[target_languge]
-    
-    if validCharInFontFamily(char, basic_font_family):
-        return basic_font_family
-    
-    for font_family in font_family_list:
-        if validCharInFontFamily(char, font_family):
-            return font_family
-        
+
+    coverage_index = getCoverageIndex(target_languge)
+    if coverage_index is None:
+        raise KeyError(target_languge)
+
+    family_id = coverage_index.lookupIds(char)[0]
+    if family_id != CoverageIndex.NO_FAMILY:
+        return coverage_index.families[family_id]
+
     raise Exception(f"U+{ord(char):04X}을 커버할 수 있는 font family 존재하지 않음")
     
 
@@ -0,0 +1,167 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+import pymupdf
+from styled_translate.draw_styled_blocks import replaceTranslatedBlocks, replaceTranslatedFile, insertLinkToBbox, DocumentFontRegistry, DEFAULT_RENDERER
+from styled_translate.finalize_output import finalizeOutput
+from util.process_pool import getProcessContext
+from util.console_utils import print_info
+
+DEFAULT_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", "1"))  # 1이면 한 프로세스에서 순서대로 그림
+MIN_PAGES_PER_SHARD = 8  # 이보다 적은 페이지를 나눠 그리면 프로세스 시작/병합 비용이 더 큼
+# catalog /Names 아래 name tree 중 mergeRenderedParts가 병합한 문서에 다시 만드는 것 (나머지가 있으면 한 프로세스에서 그림)
+MERGEABLE_NAME_TREES = ("Dests", "EmbeddedFiles")
+OTHER_NAME_TREES = ("AP", "JavaScript", "Pages", "Templates", "IDS", "URLS", "AlternatePresentations", "Renditions")
+
+
+def splitPageRanges(total_pages, workers):
+    """[0, total_pages)를 연속된 (start, end) 구간 최대 workers개로 나눔"""
+    shard_count = max(1, min(workers, total_pages // MIN_PAGES_PER_SHARD))
+    base, extra = divmod(total_pages, shard_count)
+
+    ranges = []
+    start = 0
+    for shard_idx in range(shard_count):
+        end = start + base + (1 if shard_idx < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def renderPageRange(file_path, page_infos, start, end, part_path, renderer):
+    """
+    (worker 프로세스) 원본 문서를 열어 [start, end) 페이지에 번역문을 그리고, 그 페이지들만 part_path에 저장.
+
+    다른 페이지를 가리키는 내부 링크가 구간 밖이면 부분 파일에 남길 수 없으므로,
+    그린 뒤의 페이지별 링크 목록을 따로 반환해 병합한 문서에 다시 넣습니다.
+    """
+    page_info_map = {page_info["page_num"]: page_info for page_info in page_infos}
+    page_links = []
+
+    with pymupdf.open(file_path) as doc:
+        font_registry = DocumentFontRegistry(doc)
+        for page_idx in range(start, end):
+            page_info = page_info_map[page_idx + 1]
+            page = doc[page_idx]
+            replaceTranslatedBlocks(page_info, page_info["style_dict"], page, renderer=renderer, font_registry=font_registry)
+            # 링크를 넣은 직후의 page 객체는 링크 목록이 갱신되지 않았으므로 다시 불러와서 읽음
+            page_links.append(doc.reload_page(page).get_links())
+
+        doc.select(list(range(start, end)))
+        doc.save(part_path, garbage=1)
+
+    return part_path, page_links
+
+
+def unmergeableCatalogEntries(doc):
+    """
+    부분 파일을 이어 붙이면 유지할 수 없는 원본 catalog 항목 이름들.
+    (입력 양식 /AcroForm은 field와 페이지의 widget이 서로 참조하고, JavaScript 등 나머지 name tree는 다시 만들지 않음)
+    """
+    catalog = doc.pdf_catalog()
+    entries = []
+    if doc.xref_get_key(catalog, "AcroForm")[0] != "null":
+        entries.append("AcroForm")
+    entries += [f"Names/{key}" for key in OTHER_NAME_TREES if doc.xref_get_key(catalog, f"Names/{key}")[0] != "null"]
+    return entries
+
+
+def namedDestArray(dest, page_xref):
+    """resolve_names()의 목적지 하나를 page_xref 페이지를 가리키는 PDF 목적지 배열 문자열로 변환"""
+    if "to" in dest:
+        x, y = dest["to"]
+        return f"[{page_xref} 0 R /XYZ {x:g} {y:g} {dest.get('zoom', 0):g}]"
+    return f"[{page_xref} 0 R {dest['dest']}]"
+
+
+def copyCatalogEntries(src, merged):
+    """
+    insert_pdf가 옮기지 않는 원본 catalog 항목을 병합한 문서에 복사.
+    - 쪽 번호 표시(/PageLabels)
+    - 이름 있는 목적지(/Names/Dests, /Dests): 페이지 순서가 같으므로 같은 번호의 병합 문서 페이지를 가리키게 다시 만듦
+    - 첨부 파일(/Names/EmbeddedFiles)
+    """
+    page_labels = src.get_page_labels()
+    if page_labels:
+        merged.set_page_labels(page_labels)
+
+    named_dests = sorted(
+        (name.encode("utf-8").hex(), namedDestArray(dest, merged.page_xref(dest["page"])))
+        for name, dest in src.resolve_names().items()
+        if 0 <= dest.get("page", -1) < merged.page_count
+    )
+    if named_dests:
+        dests_xref = merged.get_new_xref()
+        merged.update_object(dests_xref, "<</Names[" + "".join(f"<{name}>{array}" for name, array in named_dests) + "]>>")
+        merged.xref_set_key(merged.pdf_catalog(), "Names/Dests", f"{dests_xref} 0 R")
+
+    for name in src.embfile_names():
+        info = src.embfile_info(name)
+        merged.embfile_add(name, src.embfile_get(name), filename=info["filename"], ufilename=info["ufilename"], desc=info["description"])
+
+
+def mergeRenderedParts(file_path, parts):
+    """
+    부분 파일들을 순서대로 insert_pdf로 이어 붙인 문서 반환.
+    링크는 worker가 기록한 목록으로 다시 넣고, 메타데이터와 목차(TOC), 쪽 번호 표시, 이름 있는 목적지, 첨부 파일은 원본 문서에서 복사합니다.
+    """
+    merged = pymupdf.open()
+
+    for part_path, _ in parts:
+        with pymupdf.open(part_path) as part:
+            merged.insert_pdf(part, links=False, annots=True)
+
+    page_idx = 0
+    for _, page_links in parts:
+        for links in page_links:
+            page = merged[page_idx]
+            for link in links:
+                insertLinkToBbox(page, link, link["from"])
+            page_idx += 1
+
+    with pymupdf.open(file_path) as src:
+        merged.set_metadata(src.metadata)
+        toc = src.get_toc(simple=False)
+        if toc:
+            merged.set_toc(toc)
+        copyCatalogEntries(src, merged)
+
+    return merged
+
+
+def replaceTranslatedFileParallel(page_infos, file_path, output_path, workers=DEFAULT_RENDER_WORKERS,
+                                  renderer: str = DEFAULT_RENDERER, save_profile: str = None):
+    """
+    replaceTranslatedFile의 병렬 버전.
+
+    페이지를 연속 구간으로 나눠 worker 프로세스마다 원본을 열고 replaceTranslatedBlocks로 그린 부분 파일을 만든 뒤,
+    원래 순서대로 병합해 finalizeOutput으로 저장합니다.
+    (PyMuPDF는 스레드 안전하지 않으므로 스레드가 아닌 프로세스로 나눔)
+    구간이 하나뿐이거나, 원본에 병합하면 유지할 수 없는 catalog 항목(입력 양식 등)이 있으면 replaceTranslatedFile로 그립니다.
+    """
+    with pymupdf.open(file_path) as doc:
+        total_pages = len(doc)
+        unmergeable = unmergeableCatalogEntries(doc)
+
+    page_ranges = splitPageRanges(total_pages, workers)
+    if len(page_ranges) > 1 and unmergeable:
+        print_info(f"원본에 {', '.join(unmergeable)} 항목이 있어 한 프로세스에서 그립니다.")
+        page_ranges = [(0, total_pages)]
+    if len(page_ranges) == 1:
+        return replaceTranslatedFile(page_infos, file_path, output_path, renderer=renderer, save_profile=save_profile)
+
+    with tempfile.TemporaryDirectory(prefix="pdf-render-") as tmp_dir:
+        with ProcessPoolExecutor(max_workers=len(page_ranges), mp_context=getProcessContext()) as executor:
+            futures = []
+            for shard_idx, (start, end) in enumerate(page_ranges):
+                shard_page_infos = [page_info for page_info in page_infos if start < page_info["page_num"] <= end]
+                part_path = os.path.join(tmp_dir, f"part_{shard_idx:04d}.pdf")
+                futures.append(executor.submit(renderPageRange, file_path, shard_page_infos, start, end, part_path, renderer))
+
+            parts = [future.result() for future in futures]
+
+        merged = mergeRenderedParts(file_path, parts)
+        try:
+            return finalizeOutput(merged, output_path, profile=save_profile)
+        finally:
+            merged.close()
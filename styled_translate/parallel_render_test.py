@@ -0,0 +1,93 @@
+import pymupdf
+import pytest
+import styled_translate.parallel_render as parallel_render
+from styled_translate.draw_styled_blocks import replaceTranslatedFile
+from styled_translate.parallel_render import replaceTranslatedFileParallel, unmergeableCatalogEntries
+
+PAGE_COUNT = 20  # workers=2면 두 구간으로 나눠 그림 (MIN_PAGES_PER_SHARD 8)
+
+
+def makeCatalogPdf(path, indirect_names=False):
+    """이름 있는 목적지, 그 목적지를 가리키는 링크, 쪽 번호 표시, 첨부 파일이 있는 PDF"""
+    with pymupdf.open() as doc:
+        for idx in range(PAGE_COUNT):
+            doc.new_page().insert_text((72, 72), f"page {idx + 1}")
+
+        dests_xref = doc.get_new_xref()
+        doc.update_object(dests_xref, f"<</Names[(sec.a)[{doc[5].xref} 0 R/XYZ 10 700 0](sec.b)[{doc[15].xref} 0 R/FitH 500]]>>")
+        if indirect_names:
+            names_xref = doc.get_new_xref()
+            doc.update_object(names_xref, f"<</Dests {dests_xref} 0 R>>")
+            doc.xref_set_key(doc.pdf_catalog(), "Names", f"{names_xref} 0 R")
+        else:
+            doc.xref_set_key(doc.pdf_catalog(), "Names", f"<</Dests {dests_xref} 0 R>>")
+
+        doc[0].insert_link({"kind": pymupdf.LINK_NAMED, "from": pymupdf.Rect(72, 100, 200, 120), "name": "sec.b"})
+        doc.set_page_labels([{"startpage": 0, "prefix": "", "style": "r", "firstpagenum": 1},
+                             {"startpage": 3, "prefix": "A-", "style": "D", "firstpagenum": 1}])
+        if not indirect_names:
+            doc.embfile_add("data.txt", b"attached", desc="attachment")
+        doc.save(path)
+
+
+def untranslatedPageInfos(path):
+    with pymupdf.open(path) as doc:
+        return [{"page_num": page.number + 1, "blocks": [], "style_dict": {}, "links": page.get_links()} for page in doc]
+
+
+def catalogSummary(path):
+    with pymupdf.open(path) as doc:
+        return {
+            "names": doc.resolve_names(),
+            "labels": [page.get_label() for page in doc],
+            "files": {name: doc.embfile_get(name) for name in doc.embfile_names()},
+            "links": [{key: link.get(key) for key in ("kind", "page", "nameddest")} for link in doc[0].get_links()],
+        }
+
+
+@pytest.mark.parametrize("indirect_names", [False, True])
+def test_parallel_render_keeps_catalog_entries(tmp_path, indirect_names):
+    src = str(tmp_path / "src.pdf")
+    makeCatalogPdf(src, indirect_names=indirect_names)
+    page_infos = untranslatedPageInfos(src)
+
+    replaceTranslatedFile(page_infos, src, str(tmp_path / "serial.pdf"))
+    replaceTranslatedFileParallel(page_infos, src, str(tmp_path / "parallel.pdf"), workers=2)
+
+    expected = catalogSummary(str(tmp_path / "serial.pdf"))
+    assert set(expected["names"]) == {"sec.a", "sec.b"}
+    assert expected["labels"][:5] == ["i", "ii", "iii", "A-1", "A-2"]
+    assert catalogSummary(str(tmp_path / "parallel.pdf")) == expected
+
+
+def addForm(doc):
+    widget = pymupdf.Widget()
+    widget.field_type = pymupdf.PDF_WIDGET_TYPE_TEXT
+    widget.field_name = "name"
+    widget.rect = pymupdf.Rect(72, 200, 200, 220)
+    doc[2].add_widget(widget)
+
+
+def addJavaScript(doc):
+    js_xref = doc.get_new_xref()
+    doc.update_object(js_xref, "<</S/JavaScript/JS(app.alert(1);)>>")
+    doc.xref_set_key(doc.pdf_catalog(), "Names/JavaScript", f"<</Names[(init){js_xref} 0 R]>>")
+
+
+@pytest.mark.parametrize("add_entry, expected", [(addForm, ["AcroForm"]), (addJavaScript, ["Names/JavaScript"])])
+def test_unmergeable_catalog_entries_fall_back_to_single_process(tmp_path, monkeypatch, add_entry, expected):
+    src = str(tmp_path / "src.pdf")
+    makeCatalogPdf(src)
+    with pymupdf.open(src) as doc:
+        assert unmergeableCatalogEntries(doc) == []
+        add_entry(doc)
+        doc.save(str(tmp_path / "entry.pdf"))
+    src = str(tmp_path / "entry.pdf")
+
+    with pymupdf.open(src) as doc:
+        assert unmergeableCatalogEntries(doc) == expected
+
+    calls = []
+    monkeypatch.setattr(parallel_render, "replaceTranslatedFile", lambda *args, **kwargs: calls.append(args))
+    replaceTranslatedFileParallel(untranslatedPageInfos(src), src, str(tmp_path / "out.pdf"), workers=2)
+    assert len(calls) == 1
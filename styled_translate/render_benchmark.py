@@ -0,0 +1,96 @@
+import copy
+import time
+import numpy as np
+import pymupdf
+from styled_translate.draw_styled_blocks import replaceTranslatedBlocks, DocumentFontRegistry, RENDERER_INSERT_TEXT, RENDERER_TEXTWRITER
+from util.console_utils import print_header, print_info
+
+
+def renderWithRenderer(page_infos, file_path, renderer):
+    """
+    번역된 page_infos를 지정한 renderer로 그린 문서를 반환.
+    반환 값: (doc, 그리기 소요 시간(초))  ※ doc은 호출한 쪽에서 닫아야 함
+    """
+    # 그리기 과정에서 page_info가 바뀌어도 다른 renderer 결과에 영향이 없도록 복사해서 사용
+    page_infos = copy.deepcopy(page_infos)
+    page_info_map = {page_info["page_num"]: page_info for page_info in page_infos}
+
+    doc = pymupdf.open(file_path)
+    font_registry = DocumentFontRegistry(doc)
+    start = time.perf_counter()
+    for page_num, page in enumerate(doc, start=1):
+        page_info = page_info_map[page_num]
+        replaceTranslatedBlocks(page_info, page_info["style_dict"], page, renderer=renderer, font_registry=font_registry)
+    elapsed = time.perf_counter() - start
+
+    return doc, elapsed
+
+
+def contentStreamSize(doc):
+    """문서 전체 페이지 content stream 크기 합 (압축 전)"""
+    return sum(len(page.read_contents()) for page in doc)
+
+
+def pageImage(page, dpi):
+    pix = page.get_pixmap(dpi=dpi, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n).astype(np.int16)
+
+
+def benchmarkRenderers(page_infos, file_path, renderers=(RENDERER_INSERT_TEXT, RENDERER_TEXTWRITER), dpi=72):
+    """
+    같은 번역 결과를 여러 renderer로 그려 속도와 결과를 비교하는 함수.
+
+    renderer별로 그리기 시간, content stream 크기, 저장된 파일 크기를 측정하고,
+    첫 번째 renderer 결과를 기준으로 페이지별 추출 텍스트(읽기 순서) 일치 여부와
+    렌더링 이미지 차이(픽셀 평균 절대 오차)를 비교합니다.
+
+    Args:
+        page_infos: translateWithStyle까지 끝난 페이지 정보 리스트 (style_dict 포함)
+        file_path (str): 원본 PDF 경로
+        renderers: 비교할 renderer 이름들
+        dpi (int): 이미지 비교에 사용할 렌더링 해상도
+    """
+    results = {}
+    docs = {}
+
+    try:
+        for renderer in renderers:
+            doc, render_time = renderWithRenderer(page_infos, file_path, renderer)
+            docs[renderer] = doc
+
+            start = time.perf_counter()
+            saved = doc.tobytes(garbage=3, clean=True, deflate=True)
+            save_time = time.perf_counter() - start
+
+            results[renderer] = {
+                "render_time": round(render_time, 4),
+                "save_time": round(save_time, 4),
+                "content_stream_bytes": contentStreamSize(doc),
+                "output_bytes": len(saved),
+            }
+
+        base_renderer = renderers[0]
+        base_doc = docs[base_renderer]
+        for renderer in renderers[1:]:
+            doc = docs[renderer]
+            text_mismatch_pages = []
+            max_pixel_diff = 0.0
+
+            for page_idx in range(len(base_doc)):
+                # 색상별로 모아 그리면 content stream 순서가 달라지므로 읽기 순서로 정렬해서 비교
+                if base_doc[page_idx].get_text(sort=True) != doc[page_idx].get_text(sort=True):
+                    text_mismatch_pages.append(page_idx + 1)
+                diff = np.abs(pageImage(base_doc[page_idx], dpi) - pageImage(doc[page_idx], dpi)).mean()
+                max_pixel_diff = max(max_pixel_diff, float(diff))
+
+            results[renderer]["text_mismatch_pages"] = text_mismatch_pages
+            results[renderer]["max_mean_pixel_diff"] = round(max_pixel_diff, 4)
+    finally:
+        for doc in docs.values():
+            doc.close()
+
+    print_header("🖨 Renderer 비교")
+    for renderer, result in results.items():
+        print_info(f"{renderer}: {result}")
+
+    return results
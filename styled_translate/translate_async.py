@@ -0,0 +1,137 @@
+import asyncio
+import os
+from openai import AsyncOpenAI
+from styled_translate.translate_blocks import (
+    makeTranslationRequest, parseTranslationResponse, retryWithExponentialBackoffAsync,
+    groupBlocksForTranslation, lookupCachedTranslations, makeGroupPayload, pickRequestedTranslations,
+    applyGroupTranslations, fitFailedBlocks, cacheAcceptedTranslations,
+)
+from styled_translate.translate_with_style import prepareStyledBlocks
+from util.rate_scheduler import getRateScheduler, estimateRequestTokens, sendChatCompletionAsync
+from util.console_utils import print_error
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("OPENAI_MAX_CONCURRENCY", 50))  # 동시에 보낼 수 있는 최대 번역 요청 수
+
+
+class AsyncTranslationEngine:
+    """
+    asyncio 기반 번역 엔진.
+
+    페이지별 스레드가 그룹을 하나씩 순서대로 요청하는 대신, 모든 페이지의 모든 그룹 요청을
+    하나의 이벤트 루프에서 동시에 보내고, 동시에 진행 중인 요청 수만 semaphore 하나로 제한합니다.
+    처리량은 페이지 수가 아니라 허용된 동시 요청 수에 비례합니다.
+    재시도 규칙은 openAiTranslate와 같습니다. (RateLimitError 시 지수 backoff, 최대 7회)
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.client = None
+        self._semaphore = None
+
+    @retryWithExponentialBackoffAsync(initial_delay=2, max_retries=7)
+    async def translate(self, payload, src_lang, target_lang):
+        request = makeTranslationRequest(payload, src_lang, target_lang)
+        # RateScheduler 대기와 backoff 대기 중에는 semaphore를 잡고 있지 않도록, 허용을 받은 뒤 전송만 감쌈
+        await getRateScheduler().acquireAsync(estimateRequestTokens(request))
+        async with self._semaphore:
+            completion = await sendChatCompletionAsync(self.client, request)
+        return parseTranslationResponse(completion)
+
+    async def translateGroup(self, group, summary, term_dict, src_lang, target_lang, new_translations, cache_keys):
+        """
+        그룹 번역 결과 {block_num: 번역} 반환.
+        API로 새로 받은 번역은 new_translations에, 캐시 키는 cache_keys에 모아 두고 페이지 적용이 끝난 뒤 캐시에 저장합니다.
+        """
+        # 캐시에 있는 블록은 API 요청에서 제외
+        translated_map, missing_group, group_cache_keys = lookupCachedTranslations(group, term_dict, src_lang, target_lang)
+        cache_keys.update(group_cache_keys)
+        if not missing_group:
+            return translated_map
+
+        translated_items = await self.translate(makeGroupPayload(missing_group, summary, term_dict), src_lang, target_lang)
+        requested = pickRequestedTranslations(missing_group, translated_items)
+        new_translations.update(requested)
+        translated_map.update(requested)
+        return translated_map
+
+    async def translatePage(self, page_info, term_dict, src_lang, target_lang):
+        """
+        translateWithStyle의 async 버전. 한 라운드의 그룹들은 동시에 요청합니다.
+        CPU 작업인 스타일 준비와 크기 맞춤은 이벤트 루프를 막지 않도록 별도 스레드에서 실행합니다.
+        """
+        blocks = await asyncio.to_thread(prepareStyledBlocks, page_info, src_lang, target_lang)
+        style_dict = page_info["style_dict"]
+        summary = page_info["summary"]
+
+        retry_blocks = [(idx, block) for idx, block in enumerate(blocks) if block.get("to_be_translated", False)]
+        failed_blocks = []
+        new_translations, cache_keys = {}, {}
+
+        for round_num in range(1, 4):
+            grouped_blocks = groupBlocksForTranslation(retry_blocks, style_dict)
+            failed_blocks = []
+            new_retry_blocks = []
+
+            results = await asyncio.gather(
+                *(self.translateGroup(group, summary, term_dict, src_lang, target_lang, new_translations, cache_keys) for group in grouped_blocks),
+                return_exceptions=True,
+            )
+
+            for group, translated_map in zip(grouped_blocks, results):
+                if isinstance(translated_map, BaseException):
+                    failed_blocks.extend([(idx, block, translated_text) for idx, block, translated_text in group])
+                    continue
+                applyGroupTranslations(group, translated_map, style_dict, src_lang, target_lang, failed_blocks, new_retry_blocks)
+
+            retry_blocks = new_retry_blocks
+
+            if not retry_blocks:
+                break
+
+        await asyncio.to_thread(fitFailedBlocks, failed_blocks, style_dict, src_lang, target_lang, page_info["page_num"])
+        cacheAcceptedTranslations(blocks, new_translations, cache_keys)
+
+        return style_dict
+
+    async def translatePages(self, page_infos, term_dict, src_lang, target_lang, on_page_done=None):
+        """
+        모든 페이지를 동시에 번역합니다.
+        on_page_done(page_info)는 페이지가 끝날 때마다 별도 스레드에서 호출됩니다. (진행 상황 출력, checkpoint 저장 등)
+        한 페이지에서 예외가 나면 오류를 출력하고 그 페이지는 번역하지 않은 채로 두며, 나머지 페이지는 계속 번역합니다.
+        (실패한 페이지는 on_page_done을 호출하지 않으므로 checkpoint에도 저장되지 않음)
+        """
+        # semaphore와 http 연결은 실행 중인 이벤트 루프에 묶이므로 실행할 때마다 새로 생성
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with AsyncOpenAI() as client:
+            self.client = client
+
+            async def run_page(page_info):
+                try:
+                    await self.translatePage(page_info, term_dict, src_lang, target_lang)
+                except Exception as e:
+                    print_error(f"{page_info['page_num']}페이지 번역 실패: {e}")
+                    markPageUntranslated(page_info)
+                    return
+                if on_page_done is not None:
+                    await asyncio.to_thread(on_page_done, page_info)
+
+            try:
+                await asyncio.gather(*(run_page(page_info) for page_info in page_infos))
+            finally:
+                self.client = None
+
+        return page_infos
+
+
+def markPageUntranslated(page_info):
+    """번역에 실패한 페이지의 모든 블록을 원문 그대로 두도록 표시 (blocks를 추출하기 전에 실패한 페이지는 빈 blocks)"""
+    for block in page_info.setdefault("blocks", []):
+        block["to_be_translated"] = False
+    page_info.setdefault("style_dict", {})
+
+
+def translatePagesAsync(page_infos, term_dict, src_lang, target_lang, max_concurrency=DEFAULT_MAX_CONCURRENCY, on_page_done=None):
+    """동기 코드에서 AsyncTranslationEngine으로 여러 페이지를 번역하는 함수"""
+    engine = AsyncTranslationEngine(max_concurrency=max_concurrency)
+    return asyncio.run(engine.translatePages(page_infos, term_dict, src_lang, target_lang, on_page_done=on_page_done))
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from pydantic import TypeAdapter
 import time
 import random
+import asyncio
 import re
 import json
 import traceback
@@ -21,8 +22,12 @@ from util.console_utils import (Colors, print_info, print_success, print_error,
                                print_warning, print_processing, print_separator)
 from preprocess.make_result_line_frames import assignLineFramesToBlock
 from styled_translate.assign_style import getFontScale
+from styled_translate.translation_cache import getTranslationCache, makeTranslationKey
+from util.rate_scheduler import createChatCompletion
+from styled_translate.fit_engine import fitStyledSpans
 
 client = OpenAI()
+TRANSLATION_MODEL = "gpt-4.1-mini"
 # anthropic_client = Anthropic()
 
 def blockTextWithStyleTags(block: Dict, style_dict: Dict[int, 'SpanStyle']) -> str:
@@ -375,10 +380,10 @@ def retryWithExponentialBackoff(initial_delay=1, exponential_base=2, jitter=True
         return wrapper
     return decorator
 
-@retryWithExponentialBackoff(initial_delay=2, max_retries=7)
-def openAiTranslate(payload: Dict, src_lang, target_lang) -> List[TranslationItem]:
-    completion = client.chat.completions.create(
-        model="gpt-4.1-mini",
+def makeTranslationRequest(payload: Dict, src_lang, target_lang) -> Dict:
+    """chat.completions.create에 넘길 인자 생성 (동기/비동기 클라이언트 공용)"""
+    return dict(
+        model=TRANSLATION_MODEL,
         # temperature=0.0,
         messages=[
             {"role": "system", "content": makeSystemMessage(src_lang, target_lang)},
@@ -411,11 +416,38 @@ def openAiTranslate(payload: Dict, src_lang, target_lang) -> List[TranslationIte
             }
         }
     )
+
+
+def parseTranslationResponse(completion) -> List[TranslationItem]:
     # JSON 파싱
     json_response = json.loads(completion.choices[0].message.content)
     return adapter.validate_python(json_response["translations"])
 
 
+def retryWithExponentialBackoffAsync(initial_delay=1, exponential_base=2, jitter=True, max_retries=10, errors=(RateLimitError,)):
+    """retryWithExponentialBackoff와 같은 재시도 규칙의 async 함수용 데코레이터"""
+    def decorator(func):
+        async def wrapper(*args, **kwargs):
+            num_retries = 0
+            delay = initial_delay
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except errors:
+                    num_retries += 1
+                    if num_retries > max_retries:
+                        raise Exception(f"Maximum retries exceeded: {max_retries}")
+                    delay *= exponential_base * (1 + jitter * random.random())
+                    await asyncio.sleep(delay)
+        return wrapper
+    return decorator
+
+@retryWithExponentialBackoff(initial_delay=2, max_retries=7)
+def openAiTranslate(payload: Dict, src_lang, target_lang) -> List[TranslationItem]:
+    completion = createChatCompletion(client, makeTranslationRequest(payload, src_lang, target_lang))
+    return parseTranslationResponse(completion)
+
+
 def validate_translation_schema(data: Dict) -> bool:
     """번역 응답 스키마 검증"""
     try:
@@ -494,149 +526,188 @@ def removeLineBreaksFromStyledSpans(styled_spans: List[Dict]) -> List[Dict]:
     ]
 
 
-def makeTranslatedStyledSpans(blocks: List[Dict], style_dict: Dict[int, 'SpanStyle'], summary, page_num, term_dict, src_lang, target_lang) -> List[Dict]:
-    def group_blocks_for_translation(target_blocks, max_length=2000):
-        grouped, group, current_len = [], [], 0
-        for idx, block in target_blocks:
-            styled_text = blockTextWithStyleTags(block, style_dict)
-            if current_len + len(styled_text) > max_length and group:
-                grouped.append(group)
-                group, current_len = [], 0
-            group.append((idx, block, styled_text))
-            current_len += len(styled_text)
-        if group:
+def groupBlocksForTranslation(target_blocks, style_dict, max_length=2000):
+    """번역 대상 (idx, block) 목록을 스타일 태그 텍스트 길이 기준으로 요청 단위 그룹으로 나눔"""
+    grouped, group, current_len = [], [], 0
+    for idx, block in target_blocks:
+        styled_text = blockTextWithStyleTags(block, style_dict)
+        if current_len + len(styled_text) > max_length and group:
             grouped.append(group)
-        return grouped
+            group, current_len = [], 0
+        group.append((idx, block, styled_text))
+        current_len += len(styled_text)
+    if group:
+        grouped.append(group)
+    return grouped
 
-    def process_group(group):
-        payload = {
-            'term_dict': term_dict,
-            'summary': summary,
-            'blocks': [{"block_num": idx, "text": styled_text} for idx, _, styled_text in group]
-        }
-        translated_items = openAiTranslate(payload, src_lang, target_lang)
-        return {item.block_num: item.translated_text for item in translated_items}
 
-    # print_separator()
-    # print_processing(f"[Page {page_num}] 번역할 블록 스타일링 및 그룹핑 시작")
-    initial_targets = [(idx, block) for idx, block in enumerate(blocks) if block.get("to_be_translated", False)]
-    retry_blocks = initial_targets
-    failed_blocks = []
+def lookupCachedTranslations(group, term_dict, src_lang, target_lang):
+    """
+    그룹 중 캐시에 번역이 있는 블록을 찾아 (translated_map, missing_group, cache_keys) 반환.
+    missing_group만 API로 요청하면 됩니다.
+    """
+    translation_cache = getTranslationCache()
+    if translation_cache is None:
+        return {}, group, {}
 
-    for round_num in range(1, 4):
-        # print_info(f"[Page {page_num}] 라운드 {round_num} 번역 시도 ({len(retry_blocks)}개 블록)")
-        grouped_blocks = group_blocks_for_translation(retry_blocks)
-        failed_blocks = []
-        new_retry_blocks = []
+    cache_keys = {
+        idx: makeTranslationKey(styled_text, term_dict, TRANSLATION_MODEL, src_lang, target_lang)
+        for idx, _, styled_text in group
+    }
+    cached = translation_cache.getMany(cache_keys.values())
+    translated_map = {idx: cached[key] for idx, key in cache_keys.items() if key in cached}
+    missing_group = [item for item in group if item[0] not in translated_map]
+    return translated_map, missing_group, cache_keys
 
-        for group_num, group in enumerate(grouped_blocks, 1):
-            # print_processing(f"[Page {page_num}] Group {group_num}: 번역 요청")
-            try:
-                translated_map = process_group(group)
-                
-                # 🔧 1. 응답에 포함된 block_num들과 요청한 block_num들 비교
-                translated_block_nums = set(translated_map.keys())
-                group_block_nums = {idx for idx, _, _ in group}
-                missing_block_nums = group_block_nums - translated_block_nums
-                for idx, block, _ in group:
-                    # 🔧 2. 응답에 빠진 블록은 retry 대상에 추가
-                    if idx in missing_block_nums:
-                        # print_warning(f"[Page {page_num}] Block {idx}: 응답 누락 → 재시도 대상으로 등록")
-                        new_retry_blocks.append((idx, block))
-                        continue
-                    
-                    translated_text = translated_map.get(idx, '')
-                    if not translated_text.strip():
-                        block["to_be_translated"] = False
-                        continue
-                    try:
-                        styled_spans = parseStyledText(translated_text, block.get("primary_style_id", 0), style_dict=style_dict)
-                        styled_spans = assignFontFamilyToStyledSpans(styled_spans, target_lang)
-                        # for span in styled_spans:
-                        #     print(span["text"], span["style_id"])
-                        assignLineFramesToBlock(block, src_lang, target_lang, font_scale=getFontScale(src_lang, target_lang))
-                        styled_lines = buildStyledLines(styled_spans, style_dict, block)
-                        block["styled_lines"] = styled_lines
-                        block["to_be_translated"] = True
-                        block["scale"] = 1.0
-                        # print_success(f"[Page {page_num}] Block {idx} 처리 완료")
-                    except Exception as styling_error:
-                        # print_error(f"[Page {page_num}] Block {idx} 스타일 실패: {styling_error}")
-                        failed_blocks.append((idx, block, translated_text))
-                        # new_retry_blocks.append((idx, block)) # 스타일 실패한 블락은 번역 요청 재시도 하지 않기.
-            except Exception as e:
-                # print_error(f"[Page {page_num}] Group {group_num} 번역 실패: {e}")
-                failed_blocks.extend([(idx, block, translated_text) for idx, block, translated_text in group])
 
-        retry_blocks = new_retry_blocks
-        failed_blocks = failed_blocks
+def makeGroupPayload(group, summary, term_dict):
+    return {
+        'term_dict': term_dict,
+        'summary': summary,
+        'blocks': [{"block_num": idx, "text": styled_text} for idx, _, styled_text in group]
+    }
 
-        if not retry_blocks:
-            break
 
-    if failed_blocks:
-        # print_info(f"[Page {page_num}] Scale 줄여가며 삽입 재시도")
-        pass
+def pickRequestedTranslations(missing_group, translated_items):
+    """API 응답 중 요청한 블록의 번역만 골라 {block_num: 번역} 반환 (캐시 저장은 cacheAcceptedTranslations에서)"""
+    requested = {idx for idx, _, _ in missing_group}
+    return {item.block_num: item.translated_text for item in translated_items if item.block_num in requested}
+
+
+def cacheAcceptedTranslations(blocks, new_translations, cache_keys):
+    """
+    API로 새로 받은 번역 중 블록에 적용(applyGroupTranslations 또는 fitFailedBlocks)까지 성공한 것만 캐시에 저장.
+    스타일 적용/배치에 실패한 응답을 저장하면 다시 실행해도 같은 응답이 재사용되어 재시도로 고칠 수 없으므로 제외합니다.
+    """
+    translation_cache = getTranslationCache()
+    if translation_cache is None:
+        return
+
+    translation_cache.setMany({
+        cache_keys[idx]: text
+        for idx, text in new_translations.items()
+        if idx in cache_keys and blocks[idx].get("to_be_translated") and "styled_lines" in blocks[idx]
+    })
+
+
+def applyGroupTranslations(group, translated_map, style_dict, src_lang, target_lang, failed_blocks, retry_blocks):
+    """
+    그룹의 번역 결과를 블록에 적용.
+    응답에 빠진 블록은 retry_blocks에, 스타일 적용에 실패한 블록은 failed_blocks에 추가합니다.
+    """
+    # 🔧 1. 응답에 포함된 block_num들과 요청한 block_num들 비교
+    translated_block_nums = set(translated_map.keys())
+    group_block_nums = {idx for idx, _, _ in group}
+    missing_block_nums = group_block_nums - translated_block_nums
+    for idx, block, _ in group:
+        # 🔧 2. 응답에 빠진 블록은 retry 대상에 추가
+        if idx in missing_block_nums:
+            retry_blocks.append((idx, block))
+            continue
+        
+        translated_text = translated_map.get(idx, '')
+        if not translated_text.strip():
+            block["to_be_translated"] = False
+            continue
+        try:
+            styled_spans = parseStyledText(translated_text, block.get("primary_style_id", 0), style_dict=style_dict)
+            styled_spans = assignFontFamilyToStyledSpans(styled_spans, target_lang)
+            assignLineFramesToBlock(block, src_lang, target_lang, font_scale=getFontScale(src_lang, target_lang))
+            styled_lines = buildStyledLines(styled_spans, style_dict, block)
+            block["styled_lines"] = styled_lines
+            block["to_be_translated"] = True
+            block["scale"] = 1.0
+        except Exception as styling_error:
+            failed_blocks.append((idx, block, translated_text))
+            # 스타일 실패한 블락은 번역 요청 재시도 하지 않기.
+
+
+def fitFailedBlocks(failed_blocks, style_dict, src_lang, target_lang, page_num=None):
+    """
+    번역은 됐지만 원래 크기로 들어가지 않은 블록들을 scale을 줄여 다시 배치. (fit_engine의 이분 탐색 사용)
+    1차: 번역문 그대로 scale 축소, 2차: 개행 제거 후 scale 축소. 둘 다 실패하면 번역하지 않음.
+    끝나면 페이지 전체의 배치 계산 횟수(block["fit_passes"] 합계)를 출력하고 반환합니다.
+    """
     failed_blocks2 = []
     for idx, block, translated_text in failed_blocks:
         try:
             styled_spans = parseStyledText(translated_text, block.get("primary_style_id", 0), style_dict=style_dict)
             styled_spans = assignFontFamilyToStyledSpans(styled_spans, target_lang)
-            # for span in styled_spans:
-            #     print(span["text"], span["style_id"])
             
-            scale = 1.0
-            while True:
-                try:
-                    assignLineFramesToBlock(block, src_lang, target_lang, font_scale=getFontScale(src_lang, target_lang) * scale)
-                    styled_lines = buildStyledLines(styled_spans, style_dict, block, scale=scale)
-                    break
-                except Exception as e:
-                    if scale < 0.45:
-                        raise Exception("scale 줄여 삽입시도 실패")
-                    scale = scale * 0.99
+            styled_lines, scale = fitStyledSpans(block, styled_spans, style_dict, src_lang, target_lang, min_scale=0.45)
             
             block["styled_lines"] = styled_lines
             block["to_be_translated"] = True
             block["scale"] = scale
-            # print_success(f"[Page {page_num}] Block {idx}: scale 줄여 삽입시도 성공")
         except Exception as e:
             failed_blocks2.append((idx, block, translated_text))
-            # print_error(f"[Page {page_num}] Block {idx}: scale 줄여 삽입시도 실패")
-            # traceback.print_exc()
     
-    if failed_blocks2:
-        # print_info(f"[Page {page_num}] 개행 제거 후 scale 줄여가며 최종 스타일 재시도")
-        pass
     for idx, block, translated_text in failed_blocks2:
         try:
             styled_spans = parseStyledText(translated_text, block.get("primary_style_id", 0), style_dict=style_dict)
             styled_spans = assignFontFamilyToStyledSpans(styled_spans, target_lang)
-            # for span in styled_spans:
-            #     print(span["text"], span["style_id"])
             styled_spans = removeLineBreaksFromStyledSpans(styled_spans)
             
-            scale = 1.0
-            while True:
-                try:
-                    assignLineFramesToBlock(block, src_lang, target_lang, font_scale=getFontScale(src_lang, target_lang) * scale)
-                    styled_lines = buildStyledLines(styled_spans, style_dict, block, scale=scale)
-                    break
-                except Exception as e:
-                    if scale < 0.4:
-                        raise Exception("scale 줄여 삽입시도 실패")
-                    scale = scale * 0.99
+            styled_lines, scale = fitStyledSpans(block, styled_spans, style_dict, src_lang, target_lang, min_scale=0.4)
             
             block["styled_lines"] = styled_lines
             block["to_be_translated"] = True
             block["scale"] = scale
-            # print_success(f"[Page {page_num}] Block {idx}: 최종 개행 제거 성공")
         except Exception as e:
-            # print_error(f"[Page {page_num}] Block {idx}: 개행 제거 후 재시도 실패: {e}")
             block["to_be_translated"] = False
-            # traceback.print_exc()
 
-    return blocks
+    return reportFitPasses(failed_blocks, page_num)
+
 
+def reportFitPasses(failed_blocks, page_num=None):
+    """scale 축소 배치에 쓴 배치 계산 횟수 합계를 출력하고 반환"""
+    if not failed_blocks:
+        return 0
+    total_passes = sum(block.get("fit_passes", 0) for _, block, _ in failed_blocks)
+    page_label = f"{page_num}페이지 " if page_num is not None else ""
+    print_info(f"{page_label}크기 맞춤: 블록 {len(failed_blocks)}개, 배치 계산 {total_passes}회 "
+               f"(블록당 {total_passes / len(failed_blocks):.1f}회)")
+    return total_passes
 
 
+def makeTranslatedStyledSpans(blocks: List[Dict], style_dict: Dict[int, 'SpanStyle'], summary, page_num, term_dict, src_lang, target_lang) -> List[Dict]:
+    new_translations = {}  # API로 새로 받은 번역 (블록에 적용된 뒤 캐시에 저장)
+    cache_keys = {}
+
+    def process_group(group):
+        # 캐시에 있는 블록은 API 요청에서 제외
+        translated_map, missing_group, group_cache_keys = lookupCachedTranslations(group, term_dict, src_lang, target_lang)
+        cache_keys.update(group_cache_keys)
+        if not missing_group:
+            return translated_map
+
+        translated_items = openAiTranslate(makeGroupPayload(missing_group, summary, term_dict), src_lang, target_lang)
+        requested = pickRequestedTranslations(missing_group, translated_items)
+        new_translations.update(requested)
+        translated_map.update(requested)
+        return translated_map
+
+    retry_blocks = [(idx, block) for idx, block in enumerate(blocks) if block.get("to_be_translated", False)]
+    failed_blocks = []
+
+    for round_num in range(1, 4):
+        grouped_blocks = groupBlocksForTranslation(retry_blocks, style_dict)
+        failed_blocks = []
+        new_retry_blocks = []
+
+        for group in grouped_blocks:
+            try:
+                translated_map = process_group(group)
+                applyGroupTranslations(group, translated_map, style_dict, src_lang, target_lang, failed_blocks, new_retry_blocks)
+            except Exception as e:
+                failed_blocks.extend([(idx, block, translated_text) for idx, block, translated_text in group])
+
+        retry_blocks = new_retry_blocks
+
+        if not retry_blocks:
+            break
+
+    fitFailedBlocks(failed_blocks, style_dict, src_lang, target_lang, page_num)
+    cacheAcceptedTranslations(blocks, new_translations, cache_keys)
+
+    return blocks
@@ -1,48 +1,85 @@
-from concurrent.futures import ThreadPoolExecutor
-from preprocess.paged_info import getFileInfo
-from preprocess.preprocess import preProcessPageInfos
-from styled_translate.draw_styled_blocks import replaceTranslatedFile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from preprocess.paged_info import getFileInfo, createDocumentExtractor, getYoloObjects
+from preprocess.preprocess import preProcessPageInfos, preProcessInPool, createPreProcessPool
+from styled_translate.draw_styled_blocks import replaceTranslatedBlocks, DocumentFontRegistry
 from styled_translate.translate_with_style import translateWithStyle
+from styled_translate.checkpoint import TranslationCheckpoint
+from styled_translate.finalize_output import finalizeOutput
+from styled_translate.parallel_render import replaceTranslatedFileParallel, DEFAULT_RENDER_WORKERS
+from styled_translate.translate_async import translatePagesAsync, markPageUntranslated
 from draw.draw_blocks import drawBlocks
 from draw.draw_yolo_objs import drawYoloObjects
 import os
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util.console_utils import print_stage_progress, print_page_progress, start_translation_animation, stop_animation
+from util.console_utils import print_stage_progress, print_page_progress, print_error, start_translation_animation, stop_animation
+from util.mupdf_lock import mupdf_lock, openPdfLocked
+from util.rate_scheduler import printRateSchedulerStats
 
 
-def translatePdf(pdf_path, src_lang, target_lang):
+def translatePdf(pdf_path, src_lang, target_lang, render_workers=DEFAULT_RENDER_WORKERS):
     file_info = getFileInfo(pdf_path, src_lang, target_lang)
     
     term_dict = file_info["term_dict"]
     
     page_infos = file_info["page_infos"]
-    preProcessPageInfos(page_infos)
+    preProcessPageInfos(page_infos, src_lang, target_lang)
 
     for page_info in page_infos:
         translateWithStyle(page_info, term_dict, src_lang, target_lang)
+    printRateSchedulerStats()
 
     # 출력 경로를 같은 디렉토리에 파일명-ko.pdf로 설정
     dir_path = os.path.dirname(pdf_path)
     base_name = os.path.splitext(os.path.basename(pdf_path))[0]
     output_path = os.path.join(dir_path, f"{base_name}-ko.pdf")
-    replaceTranslatedFile(page_infos, pdf_path, output_path)
+    replaceTranslatedFileParallel(page_infos, pdf_path, output_path, workers=render_workers)
 
 
-def translatePdfInParallel(pdf_path, src_lang, target_lang, max_workers=30):
+def translatePdfInParallel(pdf_path, src_lang, target_lang, max_workers=30, streaming=False, resume=True, engine="thread",
+                           render_workers=DEFAULT_RENDER_WORKERS):
+    '''
+    resume이 True이면 번역이 끝난 페이지를 checkpoint로 저장하고,
+    이전에 중단된 같은 작업(같은 파일 내용 + 언어 쌍)이 있으면 남은 페이지만 번역합니다.
+
+    engine이 "async"이면 페이지별 스레드 대신 asyncio 번역 엔진으로 모든 페이지의 그룹 요청을 동시에 보내며,
+    이때 max_workers는 동시에 진행할 수 있는 최대 요청 수로 사용됩니다.
+
+    render_workers가 2 이상이면 번역본 파일을 페이지 구간별 worker 프로세스에서 나눠 그린 뒤 병합합니다.
+    '''
+    if streaming:
+        return translatePdfStreaming(pdf_path, src_lang, target_lang, max_workers=max_workers, resume=resume)
+
     pdf_name = os.path.basename(pdf_path)
+    checkpoint = TranslationCheckpoint(pdf_path, src_lang, target_lang) if resume else None
     
     # drawYoloObjects(pdf_path, pdf_name)
 
-    # 파일 정보 로드 (YOLO 결과 및 페이지 분할 정보 등 포함)
-    file_info = getFileInfo(pdf_path, src_lang, target_lang, max_workers=max_workers)
+    # 이전 작업의 checkpoint가 있으면 끝난 페이지는 저장된 상태를 쓰고, 요약/용어집도 저장된 것을 사용
+    restored_pages, meta = {}, None
+    if checkpoint is not None:
+        meta = checkpoint.loadMeta()
+        for page_num in checkpoint.completedPageNums():
+            restored = checkpoint.loadPage(page_num)
+            if restored is not None:
+                restored_pages[page_num] = restored
+
+    # 파일 정보 로드 (YOLO 결과 및 페이지 분할 정보 등 포함, 복원한 페이지는 레이아웃 분석/blocks 추출 생략)
+    file_info = getFileInfo(pdf_path, src_lang, target_lang, max_workers=max_workers, skip_pages=restored_pages.keys(), summary_info=meta)
     
     term_dict = file_info["term_dict"]  # 용어집
     page_infos = file_info["page_infos"]  # 페이지별 정보
     total_pages = len(page_infos)
+
+    if checkpoint is not None:
+        checkpoint.saveMeta(term_dict, file_info["summaries"])
+    if restored_pages:
+        page_infos = [restored_pages.get(page_info["page_num"], page_info) for page_info in page_infos]
+
+    remaining_page_infos = [page_info for page_info in page_infos if page_info["page_num"] not in restored_pages]
     
-    preProcessPageInfos(page_infos, src_lang, target_lang)  # 텍스트 전처리 등
+    preProcessPageInfos(remaining_page_infos, src_lang, target_lang)  # 텍스트 전처리 등
 
     print_stage_progress("번역 중", 3, 4)
     
@@ -50,10 +87,11 @@ def translatePdfInParallel(pdf_path, src_lang, target_lang, max_workers=30):
     animation_running = [start_translation_animation("translation")]  # 리스트로 감싸서 수정 가능하게
     
     # 페이지별 번역 상황을 추적하기 위한 카운터
-    completed_pages = [0]  # 리스트로 감싸서 closure에서 수정 가능하게 함
+    completed_pages = [len(restored_pages)]  # 리스트로 감싸서 closure에서 수정 가능하게 함
     
-    def translate_page_with_progress(page_info):
-        translateWithStyle(page_info, term_dict, src_lang, target_lang)
+    def on_page_done(page_info):
+        if checkpoint is not None:
+            checkpoint.savePage(page_info)
         completed_pages[0] += 1
         # 애니메이션을 잠시 멈추고 진행상황 출력
         stop_animation(animation_running[0])
@@ -63,12 +101,21 @@ def translatePdfInParallel(pdf_path, src_lang, target_lang, max_workers=30):
         if completed_pages[0] < total_pages:
             animation_running[0] = start_translation_animation()
     
-    # 병렬 번역 처리: 각 페이지에 대해 translateWithStyle(page_info, term_dict) 호출
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        executor.map(translate_page_with_progress, page_infos)
+    def translate_page_with_progress(page_info):
+        translateWithStyle(page_info, term_dict, src_lang, target_lang)
+        on_page_done(page_info)
+    
+    if engine == "async":
+        # 모든 페이지의 번역 요청을 하나의 이벤트 루프에서 동시 처리
+        translatePagesAsync(remaining_page_infos, term_dict, src_lang, target_lang, max_concurrency=max_workers, on_page_done=on_page_done)
+    else:
+        # 병렬 번역 처리: 각 페이지에 대해 translateWithStyle(page_info, term_dict) 호출
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            executor.map(translate_page_with_progress, remaining_page_infos)
     
     # 최종 애니메이션 중지
     stop_animation(animation_running[0])
+    printRateSchedulerStats()
         
     # drawBlocks(page_infos, pdf_path, pdf_name, block_mark= True, class_mark= True)
 
@@ -78,4 +125,142 @@ def translatePdfInParallel(pdf_path, src_lang, target_lang, max_workers=30):
     dir_path = os.path.dirname(pdf_path)
     base_name = os.path.splitext(pdf_name)[0]
     output_path = os.path.join(dir_path, f"{base_name}-ko.pdf")
-    replaceTranslatedFile(page_infos, pdf_path, output_path)
\ No newline at end of file
+    replaceTranslatedFileParallel(page_infos, pdf_path, output_path, workers=render_workers)
+
+    # 결과 파일이 만들어졌으므로 checkpoint 삭제
+    if checkpoint is not None:
+        checkpoint.clear()
+
+
+def translatePdfStreaming(pdf_path, src_lang, target_lang, max_workers=30, max_in_flight=None, resume=True):
+    '''
+    페이지 단위 스트리밍 번역.
+
+    문서 전체의 blocks를 먼저 추출/전처리/번역한 뒤 한꺼번에 그리는 대신,
+    페이지마다 추출 → 전처리 → 번역을 worker에서 수행하고, 끝난 페이지는 바로 출력 문서에 그립니다.
+    - 느린 페이지 하나가 다른 페이지의 렌더링을 막지 않습니다.
+    - 동시에 메모리에 올라와 있는 페이지 수는 max_in_flight(기본 max_workers * 2)로 제한됩니다.
+    - 그려진 페이지의 blocks/style_dict는 바로 해제됩니다.
+
+    요약/용어집과 YOLO 결과는 문서 단위로 필요하므로 getFileInfo에서 먼저 구합니다. (blocks 추출은 생략)
+    요약/레이아웃 분석 때 연 DocumentExtractor를 페이지별 blocks 추출에도 그대로 사용합니다.
+    '''
+    with createDocumentExtractor(pdf_path, cache_blocks=False) as extractor:
+        return streamTranslatedPages(pdf_path, src_lang, target_lang, extractor, max_workers=max_workers, max_in_flight=max_in_flight, resume=resume)
+
+
+def streamTranslatedPages(pdf_path, src_lang, target_lang, extractor, max_workers=30, max_in_flight=None, resume=True):
+    """translatePdfStreaming의 본문 (extractor: 요약/레이아웃 분석/blocks 추출이 공유하는 DocumentExtractor)"""
+    pdf_name = os.path.basename(pdf_path)
+    max_in_flight = max_in_flight or max_workers * 2
+
+    # 이전 작업의 checkpoint가 있으면 끝난 페이지는 레이아웃 분석을 생략하고, 요약/용어집도 저장된 것을 사용
+    checkpoint = TranslationCheckpoint(pdf_path, src_lang, target_lang) if resume else None
+    completed_page_nums = checkpoint.completedPageNums() if checkpoint is not None else set()
+    meta = checkpoint.loadMeta() if checkpoint is not None else None
+
+    file_info = getFileInfo(pdf_path, src_lang, target_lang, max_workers=max_workers, extract_blocks=False, extractor=extractor,
+                            skip_pages=completed_page_nums, summary_info=meta)
+
+    term_dict = file_info["term_dict"]  # 용어집
+    if checkpoint is not None:
+        checkpoint.saveMeta(term_dict, file_info["summaries"])
+    page_infos = file_info["page_infos"]  # 페이지별 정보 (blocks 없음)
+    total_pages = len(page_infos)
+
+    print_stage_progress("번역 중", 3, 4)
+
+    animation_running = [start_translation_animation("translation")]
+    completed_pages = 0
+
+    dir_path = os.path.dirname(pdf_path)
+    base_name = os.path.splitext(pdf_name)[0]
+    output_path = os.path.join(dir_path, f"{base_name}-ko.pdf")
+
+    # 전처리는 순수 Python 연산이라 스레드로는 빨라지지 않으므로 PREPROCESS_WORKERS가 2 이상이면 프로세스 풀에서 수행
+    preprocess_pool = createPreProcessPool()
+
+    # 추출용 문서(extractor)와 출력용 문서를 따로 두어, 이미 그려진 페이지가 다른 페이지의 추출에 영향을 주지 않게 함
+    with openPdfLocked(pdf_path) as out_doc:
+        font_registry = DocumentFontRegistry(out_doc)
+
+        def process_page(page_info):
+            # 이전 작업에서 번역이 끝난 페이지는 저장된 상태 사용
+            if checkpoint is not None:
+                restored = checkpoint.loadPage(page_info["page_num"])
+                if restored is not None:
+                    page_info.update(restored)
+                    return page_info
+
+            page_info.update(extractor.extractPageBlocks(page_info["page_num"] - 1))
+            if page_info["page_num"] in completed_page_nums:
+                # checkpoint 파일이 깨져 복원하지 못한 페이지는 건너뛴 레이아웃 분석도 다시 수행
+                page_info["yolo_objects"] = getYoloObjects(pdf_path, render_workers=0, extractor=extractor, page_indices=[page_info["page_num"] - 1])[0]["objects"]
+            preProcessInPool(page_info, src_lang, target_lang, pool=preprocess_pool)
+            translateWithStyle(page_info, term_dict, src_lang, target_lang)
+            if checkpoint is not None:
+                checkpoint.savePage(page_info)
+            return page_info
+
+        pending_pages = iter(page_infos)
+        in_flight = {}  # future -> page_info
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def submit_next():
+                while len(in_flight) < max_in_flight:
+                    page_info = next(pending_pages, None)
+                    if page_info is None:
+                        return
+                    in_flight[executor.submit(process_page, page_info)] = page_info
+
+            try:
+                submit_next()
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        page_info = in_flight.pop(future)
+                        try:
+                            future.result()
+                        except Exception as e:
+                            # 실패한 페이지는 원문 그대로 그리고 나머지 페이지는 계속 진행 (checkpoint에도 저장되지 않음)
+                            print_error(f"{page_info['page_num']}페이지 번역 실패: {e}")
+                            markPageUntranslated(page_info)
+
+                        with mupdf_lock:
+                            page = out_doc[page_info["page_num"] - 1]
+                            replaceTranslatedBlocks(page_info, page_info["style_dict"], page, font_registry=font_registry)
+
+                        # 그린 페이지의 데이터는 더 이상 필요 없으므로 해제
+                        page_info.pop("blocks", None)
+                        page_info.pop("links", None)
+                        page_info.pop("style_dict", None)
+
+                        completed_pages += 1
+
+                    # 애니메이션 정지에 시간이 걸리므로 진행 상황은 완료된 묶음 단위로 출력
+                    stop_animation(animation_running[0])
+                    print_page_progress(completed_pages, total_pages)
+                    print()
+                    if completed_pages < total_pages:
+                        animation_running[0] = start_translation_animation()
+
+                    submit_next()
+            finally:
+                # 오류가 난 경우 아직 시작하지 않은 페이지는 취소
+                for future in in_flight:
+                    future.cancel()
+                stop_animation(animation_running[0])
+                if preprocess_pool is not None:
+                    preprocess_pool.shutdown(cancel_futures=True)
+        printRateSchedulerStats()
+
+        print_stage_progress("번역본 파일을 생성하는 중", 4, 4)
+
+        with mupdf_lock:
+            finalizeOutput(out_doc, output_path)
+
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    return output_path
@@ -5,15 +5,22 @@ from styled_translate.translate_blocks import makeTranslatedStyledSpans
 from styled_translate.draw_styled_blocks import replaceTranslatedBlocks
 from styled_translate.mark_to_be_translated import assignToBeTranslated
 
-def translateWithStyle(page_info, term_dict, src_lang, target_lang):
+def prepareStyledBlocks(page_info, src_lang, target_lang):
+    """번역 대상 표시, 스타일 사전 생성, 블록별 기본 스타일 지정 (번역 요청 전 단계)"""
     blocks = page_info.get("blocks", [])
-    page_num = page_info["page_num"]
     
     assignToBeTranslated(blocks, src_lang, target_lang)
     
     page_info["style_dict"] = assignSpanStyle(blocks, src_lang, target_lang)
     assignPrimaryStyleId(blocks, page_info["style_dict"])
     
+    return blocks
+
+
+def translateWithStyle(page_info, term_dict, src_lang, target_lang):
+    page_num = page_info["page_num"]
+    blocks = prepareStyledBlocks(page_info, src_lang, target_lang)
+    
     makeTranslatedStyledSpans(blocks, page_info["style_dict"], page_info["summary"], page_num, term_dict, src_lang, target_lang)
         
     return page_info["style_dict"]
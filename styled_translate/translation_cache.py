@@ -0,0 +1,28 @@
+import os
+from util.kv_cache import getKVCache, hashKey
+
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.environ.get("TRANSLATION_CACHE_MAX_ENTRIES", 200000))  # 번역 캐시 최대 항목 수
+
+
+def getTranslationCache():
+    """블록 번역 결과 캐시 반환 (캐시가 비활성화되어 있으면 None)"""
+    return getKVCache("translations", max_entries=TRANSLATION_CACHE_MAX_ENTRIES)
+
+
+def relevantTerms(styled_text, term_dict):
+    """용어집 중 블록 텍스트에 실제로 등장하는 항목만 반환 (대소문자 무시)"""
+    lowered = styled_text.lower()
+    return {
+        term: translated
+        for term, translated in (term_dict or {}).items()
+        if term and term.lower() in lowered
+    }
+
+
+def makeTranslationKey(styled_text, term_dict, model, src_lang, target_lang):
+    """
+    블록 번역 캐시 키 생성.
+    스타일 태그가 포함된 블록 텍스트, 블록에 등장하는 용어집 항목, 모델, 언어 쌍이 같으면 같은 키가 나옵니다.
+    (용어집 전체가 아니라 관련 항목만 사용하므로, 다른 문서에서 같은 문구가 나와도 재사용됩니다.)
+    """
+    return hashKey("translation", model, src_lang, target_lang, styled_text, relevantTerms(styled_text, term_dict))
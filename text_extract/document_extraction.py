@@ -0,0 +1,155 @@
+import os
+import weakref
+import pymupdf
+from util.mupdf_lock import mupdf_lock
+
+'''
+문서를 한 번만 열고, 페이지마다 내용(content stream)을 한 번만 해석해서
+요약용 텍스트, 전처리용 dict blocks, 링크, YOLO용 페이지 이미지를 모두 얻기 위한 추출 계층.
+
+  - 페이지를 DisplayList로 한 번 해석하고, 여기서 TextPage와 pixmap을 만듭니다.
+  - 같은 DisplayList에서 plain text용(기본 flags)과 dict blocks용(flags=1) TextPage를 각각 만들어 페이지별 record로 보관합니다.
+  - 회전된 페이지는 기존과 같은 좌표를 얻기 위해 page.get_textpage로 TextPage를 따로 만듭니다.
+    (page.get_textpage는 회전을 0으로 놓고 추출하지만, DisplayList에는 회전이 적용되어 있음)
+'''
+
+TEXT_FLAGS = 1  # page.get_text("dict", flags=1)과 같은 설정 (전처리 전체가 이 결과를 기준으로 동작)
+SUMMARY_TEXT_FLAGS = pymupdf.TEXTFLAGS_TEXT  # 요약용 텍스트는 page.get_text()와 같은 기본 설정 (mediabox 밖 텍스트 제외 등)
+DISPLAY_LIST_CACHE_PAGES = int(os.environ.get("DISPLAY_LIST_CACHE_PAGES", 32))  # 렌더링을 기다리며 보관할 최대 DisplayList 수
+
+
+class DocumentExtractor:
+    """
+    열린 문서 하나에서 페이지별 추출 결과를 공유하는 클래스. (pymupdf 호출은 mupdf_lock으로 보호)
+
+    페이지 record는 {"page_num", "text", "links", "blocks"} 형태이며, 처음 요청될 때 한 번 만들어집니다.
+    blocks는 전처리에서 그대로 수정되므로 takePageBlocks로 한 번 넘겨주면 record에서 제거합니다.
+
+    Args:
+        file_path (str): PDF 파일 경로
+        cache_blocks (bool): False이면 텍스트만 필요한 요청에서는 blocks를 만들지 않음
+            (페이지 스트리밍 번역처럼 blocks를 나중에 페이지별로 추출하는 경우)
+        display_list_pages (int): 텍스트 추출과 렌더링 중 한쪽만 끝난 페이지의 DisplayList를 보관할 최대 개수
+            (0이면 보관하지 않고, 렌더링할 때 페이지를 다시 해석)
+    """
+
+    def __init__(self, file_path, cache_blocks=True, display_list_pages=DISPLAY_LIST_CACHE_PAGES):
+        self.file_path = file_path
+        self.cache_blocks = cache_blocks
+        self.display_list_pages = display_list_pages
+
+        with mupdf_lock:
+            self.doc = pymupdf.open(file_path)
+            self.page_count = len(self.doc)
+
+        self._records = {}  # page_idx -> 페이지 record
+        self._rendered = set()  # 이미지를 렌더링한 페이지
+        self._display_lists = {}  # page_idx -> DisplayList (다른 쪽 추출을 기다리는 중)
+
+    def close(self):
+        with mupdf_lock:
+            self._display_lists.clear()
+            self._records.clear()
+            self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _takeDisplayList(self, page, page_idx, other_done):
+        """
+        (mupdf_lock 안에서 호출) 페이지의 DisplayList 반환.
+        보관 중이던 것이 있으면 꺼내 쓰고, 새로 만든 경우 다른 쪽(텍스트 추출/렌더링)이 아직이면 자리가 있을 때만 보관합니다.
+        (뒤처진 쪽이 앞 페이지부터 차례로 꺼내 가므로, 가득 찼을 때 오래된 것을 버리지 않고 새 것을 보관하지 않음)
+        """
+        display_list = self._display_lists.pop(page_idx, None)
+        if display_list is None:
+            display_list = page.get_displaylist()
+            if not other_done and len(self._display_lists) < self.display_list_pages:
+                self._display_lists[page_idx] = display_list
+        return display_list
+
+    def _textPages(self, page, page_idx, flags_list):
+        """(mupdf_lock 안에서 호출) 페이지를 한 번 해석한 DisplayList에서 flags_list의 flags별 TextPage 생성"""
+        if page.rotation != 0:
+            return [page.get_textpage(flags=flags) for flags in flags_list]
+
+        display_list = self._takeDisplayList(page, page_idx, page_idx in self._rendered)
+        textpages = []
+        for flags in flags_list:
+            textpage = pymupdf.TextPage(display_list.get_textpage(flags=flags))
+            textpage.parent = weakref.proxy(page)
+            textpages.append(textpage)
+        return textpages
+
+    def pageRecord(self, page_idx, need_blocks=False):
+        """
+        페이지 record 반환. 없거나, blocks가 필요한데 이미 넘겨준 경우 TextPage를 만들어 새로 추출합니다.
+        text는 page.get_text()와 같은 기본 flags로, blocks는 TEXT_FLAGS로 추출합니다.
+        """
+        with mupdf_lock:
+            record = self._records.get(page_idx)
+            if record is not None and (not need_blocks or "blocks" in record):
+                return record
+
+            page = self.doc[page_idx]
+            need_text = record is None
+            need_blocks = need_blocks or self.cache_blocks
+            flags_list = [SUMMARY_TEXT_FLAGS] * need_text + [TEXT_FLAGS] * need_blocks
+            textpages = self._textPages(page, page_idx, flags_list)
+
+            if need_text:
+                record = {
+                    "page_num": page_idx + 1,
+                    "text": page.get_text("text", textpage=textpages[0]).strip(),
+                    "links": page.get_links(),
+                }
+                self._records[page_idx] = record
+
+            if need_blocks:
+                record["blocks"] = page.get_text("dict", textpage=textpages[-1], sort=True)["blocks"]
+
+        return record
+
+    def pageText(self, page_idx):
+        """요약에 사용할 페이지 plain text (앞뒤 공백 제거)"""
+        return self.pageRecord(page_idx)["text"]
+
+    def takePageBlocks(self, page_idx):
+        """
+        전처리에 사용할 페이지 dict blocks를 넘겨주고 record에서는 제거.
+        (넘겨준 blocks는 호출한 쪽에서 수정되며, 다시 요청하면 새로 추출)
+        """
+        with mupdf_lock:
+            return self.pageRecord(page_idx, need_blocks=True).pop("blocks")
+
+    def extractPageBlocks(self, page_idx):
+        """paged_info.extractPageBlocks와 같은 형식의 {"page_num", "blocks", "links"} 반환"""
+        blocks = self.takePageBlocks(page_idx)
+        return {
+            "page_num": page_idx + 1,
+            "blocks": blocks,
+            "links": self.pageRecord(page_idx)["links"],
+        }
+
+    def skipPageRendering(self, page_indices):
+        """렌더링하지 않을 페이지 표시 (캐시된 탐지 결과를 쓰는 경우 등). 보관 중인 DisplayList도 버림"""
+        with mupdf_lock:
+            for page_idx in page_indices:
+                self._rendered.add(page_idx)
+                self._display_lists.pop(page_idx, None)
+
+    def renderPagePixmap(self, page_idx, zoom_for_rect):
+        """
+        YOLO 입력용 페이지 pixmap과 렌더링 배율 반환.
+        zoom_for_rect(page.rect)로 배율을 정하고, 텍스트 추출 때 만든 DisplayList가 남아 있으면 페이지를 다시 해석하지 않고 그대로 렌더링합니다.
+        """
+        with mupdf_lock:
+            page = self.doc[page_idx]
+            zoom = zoom_for_rect(page.rect)
+            text_done = page_idx in self._records or page.rotation != 0
+            display_list = self._takeDisplayList(page, page_idx, text_done)
+            self._rendered.add(page_idx)
+            return display_list.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False), zoom
@@ -0,0 +1,28 @@
+import pymupdf
+from text_extract.document_extraction import DocumentExtractor
+
+
+def makeFixturePdf(path):
+    """mediabox 밖 텍스트, 공백이 많은 텍스트, 회전된 페이지가 있는 PDF"""
+    doc = pymupdf.open()
+    for rotation in (0, 90):
+        page = doc.new_page(width=300, height=300)
+        page.insert_text((20, 40), "inside   the    page", fontsize=12)
+        page.insert_text((20, 80), "fi ligature ﬁ\tand tab", fontsize=12)
+        page.insert_text((20, 340), "below the mediabox", fontsize=12)
+        page.insert_text((-200, 120), "left of the mediabox", fontsize=12)
+        page.set_rotation(rotation)
+    doc.save(path)
+    doc.close()
+
+
+def test_page_record_matches_get_text(tmp_path):
+    """record의 text는 page.get_text()와, blocks는 get_text("dict", flags=1)과 같은지"""
+    path = str(tmp_path / "fixture.pdf")
+    makeFixturePdf(path)
+
+    with pymupdf.open(path) as doc, DocumentExtractor(path) as extractor:
+        for page_idx, page in enumerate(doc):
+            assert "below the mediabox" not in page.get_text()
+            assert extractor.pageText(page_idx) == page.get_text().strip()
+            assert extractor.takePageBlocks(page_idx) == page.get_text("dict", flags=1, sort=True)["blocks"]
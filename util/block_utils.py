@@ -1,23 +1,11 @@
 # 정렬 상수 정의
-from text_extract.text_extract import lineText
+from util.line_features import getLineFeatures
 
 ALIGN_CENTER = "center"
 ALIGN_LEFT = "left"
 
 def get_average_char_width(line):
-    total_width = 0
-    total_chars = 0
-
-    for span in line.get("spans", []):
-        text = span.get("text", "")
-        width = span.get("bbox", [0, 0, 0, 0])[2] - span.get("bbox", [0, 0, 0, 0])[0]
-        total_width += width
-        total_chars += len(text)
-
-    if total_chars == 0:
-        return 0  # 빈 라인인 경우
-
-    return total_width / total_chars
+    return getLineFeatures(line).average_char_width
 
 def getBlockAlignment(block):
     lines = block.get("lines", [])
@@ -30,7 +18,7 @@ def getBlockAlignment(block):
     all_lines_attached_to_sides = True  # 모든 줄이 양 끝에 붙어있는지 확인
 
     for line in lines:
-        if lineText(line).strip() == '':
+        if getLineFeatures(line).stripped_text == '':
             continue  # 빈 라인은 무시
         
         line_x0, _, line_x1, _ = line["bbox"]
@@ -185,13 +185,17 @@ def start_translation_animation(stage="translation"):
     
     thread = threading.Thread(target=animate, daemon=True)
     thread.start()
+    animation_running.append(thread)  # stop_animation에서 스레드 종료를 기다리기 위해 보관
     
     return animation_running
 
 
 def stop_animation(animation_running):
-    """애니메이션 중지"""
+    """애니메이션 중지 (애니메이션 스레드가 끝날 때까지 기다림)"""
     if animation_running:
         animation_running[0] = False
-        time.sleep(0.5)  # 애니메이션이 완전히 멈출 때까지 대기
+        if len(animation_running) > 1:
+            animation_running[1].join()
+        else:
+            time.sleep(0.5)  # 애니메이션이 완전히 멈출 때까지 대기
         print("\r\033[K", end='', flush=True)  # 애니메이션 텍스트 지우기
\ No newline at end of file
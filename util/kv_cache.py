@@ -0,0 +1,160 @@
+from threading import Lock
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+CACHE_DIR = os.path.expanduser(os.environ.get("PDF_TRANSLATOR_CACHE_DIR", "~/.cache/pdf-translator"))
+CACHE_ENABLED = os.environ.get("PDF_TRANSLATOR_CACHE", "1") != "0"  # 0이면 모든 캐시 비활성화
+
+
+def getCachePath(file_name):
+    """캐시 디렉토리 아래의 파일 경로 반환 (디렉토리가 없으면 생성)"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, file_name)
+
+
+def hashKey(*parts):
+    """
+    여러 값을 하나의 캐시 키로 만드는 함수.
+    dict/list도 json으로 정렬해 직렬화하므로, 내용이 같으면 항상 같은 키가 나옵니다.
+    """
+    hasher = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, (str, bytes)):
+            part = json.dumps(part, ensure_ascii=False, sort_keys=True)
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        hasher.update(len(part).to_bytes(8, "little"))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+
+class KVCache:
+    """
+    SQLite 파일 하나에 저장되는 영구 key-value 캐시.
+
+    - 값은 json으로 직렬화해 저장합니다.
+    - 항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 지웁니다. (LRU)
+    - 여러 스레드에서 공유할 수 있도록 모든 접근은 lock으로 보호됩니다.
+    - hit/miss 횟수를 기록합니다.
+    """
+
+    def __init__(self, name, max_entries=100000, path=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.path = path or getCachePath(f"{name}.sqlite3")
+
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache(last_access)")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        return self.getMany([key]).get(key, default)
+
+    def getMany(self, keys):
+        """여러 키를 한 번에 조회해 {key: value} 반환 (없는 키는 결과에서 빠짐)"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        rows = []
+        with self._lock:
+            # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+
+            self.hits += len(rows)
+            self.misses += len(keys) - len(rows)
+
+            if rows:
+                now = time.time()
+                self._conn.executemany("UPDATE cache SET last_access = ? WHERE key = ?", [(now, key) for key, _ in rows])
+                self._conn.commit()
+
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, key, value):
+        self.setMany({key: value})
+
+    def setMany(self, items):
+        """여러 항목을 한 트랜잭션으로 저장하고 필요하면 오래된 항목을 지움"""
+        if not items:
+            return
+
+        now = time.time()
+        rows = [(key, json.dumps(value, ensure_ascii=False), now) for key, value in items.items()]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, last_access) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._evictIfNeeded()
+            self._conn.commit()
+
+    def _evictIfNeeded(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+            (overflow,),
+        )
+        self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def getStats(self):
+        """hit/miss 통계 반환"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_caches = {}
+_caches_lock = Lock()
+
+
+def getKVCache(name, max_entries=100000):
+    """이름별로 프로세스 전역 KVCache 인스턴스 반환 (캐시가 비활성화되어 있으면 None)"""
+    if not CACHE_ENABLED:
+        return None
+
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = KVCache(name, max_entries=max_entries)
+
+    return _caches[name]
@@ -0,0 +1,261 @@
+import re
+import threading
+from operator import is_, itemgetter
+from contextlib import contextmanager
+from styled_translate.assign_style import dirToRotation
+
+'''
+line 하나에 대해 전처리 단계 여러 곳에서 반복해서 계산하던 값들(텍스트, 글머리 기호 매칭, 첫 글자 x좌표, 평균 글자 너비, 회전)을
+한 번만 계산해 두고 같이 쓰기 위한 모듈.
+
+계산한 값은 line dict에 넣지 않고 lineFeatureScope() 동안만 line별로 보관합니다. (checkpoint 저장이나 프로세스 간 전달에 영향 없음)
+보관할 때 line의 spans 리스트, span 개수, span별 bbox 객체, dir를 함께 기억해 두고,
+line이 병합되어 span이 추가되거나 bbox가 새 값으로 바뀌면(normalizeAllBboxes 등) 다시 계산합니다.
+(전처리 과정에서 span의 text/size는 바꾸지 않음)
+'''
+
+# 글머리 기호 제거용 (첫 글자 x좌표 계산) - 앞 공백 허용, 뒤 공백 없어도 됨
+STRIP_BULLET_PATTERNS = [re.compile(p) for p in [
+    r"^\s*(\d+\.)+\s*",          # 1.3.2. 1.3.3. ...
+    r"^\s*\d+\.\s*",             # 1. 2. ...
+    r"^\s*\(\d+\)\s*",           # (1)
+    r"^\s*\[\d+\]\s*",           # [1]
+    r"^\s*\d+\)\s*",             # 1)
+    r"^\s*[a-z]\.\s*",           # a.
+    r"^\s*\([a-zA-Z]\)\s*",      # (a) (B)
+    r"^\s*[①-⑳]\s*",            # 특수 숫자 (① ~ ⑳)
+    r"^\s*[가-힣]\.\s*",         # 가. 나. ...
+    r"^\s*\([가-힣]\)\s*",       # (가)
+    r"^\s*[\u2013\u2192\u2022\u2023\u25AA\u25CF\u25E6\u25BA\u25B6\u002D\u002A\u0022\u002B\u25CE\u2219\u25CB\u2192\u2714\u2726]\s*",
+    r"^[\u0022]\s+",
+]]
+
+# 글머리 기호 제거용 (첫 글자 너비 계산) - 기호 뒤 공백 필요
+WIDTH_BULLET_PATTERNS = [re.compile(p) for p in [
+    r"^(\d+\.)+\s+",          # 1.3.2. 1.3.3. ...
+    r"^\d+\.\s+",             # 1. 2. ...
+    r"^\(\d+\)\s+",           # (1)
+    r"^\[\d+\]\s+",           # [1]
+    r"^\d+\)\s+",             # 1)
+    r"^[a-z]\.\s+",        # a.
+    r"^\([a-zA-Z]\)\s+",      # (a) (B)
+    r"^[①-⑳]\s+",            # 특수 숫자 (① ~ ⑳)
+    r"^[가-힣]\.\s+",         # 가. 나. ...
+    r"^\([가-힣]\)\s+",       # (가)
+    r"^[\u2013\u2192\u2022\u2023\u25AA\u25CF\u25E6\u25BA\u25B6\u002D\u002A\u002B\u25CE\u2219\u25CB\u2192\u2714\u2726]\s*",
+    r"^[\u0022]\s+",
+]]
+
+# 글머리 기호 제거용 (첫 글자 폰트 크기 계산)
+FONT_SIZE_BULLET_PATTERNS = STRIP_BULLET_PATTERNS[:-1]
+
+# 불릿 기호로 시작하는 줄
+BULLET_START_PATTERNS = [re.compile(p) for p in [
+    r"^[\u2013\u2192\u2022\u2023\u25AA\u25CF\u25E6\u25BA\u25B6\u002D\u002A\u002B\u25CE\u2219\u25CB\u2192\u2714\u2726]\s*",
+    r"^[\u0022]\s+",
+]]
+
+# 번호 매기기로 시작하는 줄
+NUMBERED_LIST_PATTERNS = WIDTH_BULLET_PATTERNS[:10]
+
+# 블락 분리 판단용 번호 매기기 ("(1)", "a." 제외)
+SEPARATING_NUMBERED_LIST_PATTERNS = [re.compile(p) for p in [
+    r"^(\d+\.)+\s+",          # 1.3.2. 1.3.3. ...
+    r"^\d+\.\s+",             # 1. 2. ...
+    r"^\[\d+\]\s+",           # [1]
+    r"^\d+\)\s+",             # 1)
+    r"^\([a-zA-Z]\)\s+",      # (a) (B)
+    r"^[①-⑳]\s+",            # 특수 숫자 (① ~ ⑳)
+    r"^[가-힣]\.\s+",         # 가. 나. ...
+    r"^\([가-힣]\)\s+",       # (가)
+]]
+
+
+_get_bbox = itemgetter("bbox")
+
+
+def removeFirstMatch(patterns, text):
+    """patterns 중 처음으로 매칭되는 패턴 하나만 text 앞에서 제거"""
+    for pattern in patterns:
+        match = pattern.match(text)
+        if match:
+            return text[match.end():]
+    return text
+
+
+class _lazyFeature:
+    """
+    처음 읽을 때 한 번만 계산해서 인스턴스 속성으로 저장하는 descriptor.
+    (functools.cached_property와 같은 동작이지만, 3.11 이하에서 매번 잡는 lock이 없어 더 가벼움)
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name] = self.func(obj)
+        return value
+
+
+class LineFeatures:
+    """line 하나에서 계산한 값 모음 (각 값은 처음 읽을 때 한 번만 계산)"""
+
+    def __init__(self, line):
+        self.spans = line.get("spans", [])
+        self.span_count = len(self.spans)
+        self.span_fields = [(span.get("text", ""), span.get("bbox", (0, 0, 0, 0)), span.get("size")) for span in self.spans]
+        self.bbox_refs = [span.get("bbox") for span in self.spans]
+        self.dir = line.get("dir")
+
+    def isValidFor(self, line):
+        """line이 이 값을 계산했을 때와 같은 상태인지 (객체 동일성으로 비교)"""
+        spans = line.get("spans", [])
+        if spans is not self.spans or len(spans) != self.span_count or line.get("dir") is not self.dir:
+            return False
+        try:
+            return all(map(is_, map(_get_bbox, spans), self.bbox_refs))
+        except KeyError:
+            return False
+
+    @_lazyFeature
+    def raw_text(self):
+        """span text를 그대로 이어 붙인 텍스트"""
+        return "".join(text for text, _, _ in self.span_fields)
+
+    @_lazyFeature
+    def text(self):
+        """lineText와 같은 텍스트 (span 사이 간격이 넓으면 공백 추가)"""
+        text = ""
+        prev = None
+        for span in self.span_fields:
+            if prev is not None:
+                # 현재 span과 이전 span의 x좌표 간격 계산
+                gap = span[1][0] - prev[1][2]
+
+                # 평균 글자 너비 계산
+                prev_char_width = (prev[1][2] - prev[1][0]) / max(len(prev[0]), 1)
+                curr_char_width = (span[1][2] - span[1][0]) / max(len(span[0]), 1)
+                avg_char_width = (prev_char_width + curr_char_width) / 2
+
+                # 공백 조건 확인: 간격이 평균 글자 너비의 0.9배 이상이면 공백 추가
+                if gap >= avg_char_width * 0.9:
+                    text += " "
+
+            text += span[0]
+            prev = span
+        return text
+
+    @_lazyFeature
+    def stripped_text(self):
+        return self.text.strip()
+
+    @_lazyFeature
+    def starts_with_bullet(self):
+        return any(pattern.match(self.stripped_text) for pattern in BULLET_START_PATTERNS)
+
+    @_lazyFeature
+    def starts_with_numbered_list(self):
+        return any(pattern.match(self.stripped_text) for pattern in NUMBERED_LIST_PATTERNS)
+
+    @_lazyFeature
+    def starts_with_separating_numbered_list(self):
+        return any(pattern.match(self.stripped_text) for pattern in SEPARATING_NUMBERED_LIST_PATTERNS)
+
+    def _spanAt(self, target_index):
+        """raw_text 기준 target_index 글자가 들어 있는 ((text, bbox, size), span 안에서의 위치), 없으면 None"""
+        char_count = 0
+        for span in self.span_fields:
+            span_len = len(span[0])
+            if char_count + span_len > target_index:
+                return span, target_index - char_count
+            char_count += span_len
+        return None
+
+    @_lazyFeature
+    def first_x_except_bullet(self):
+        """글머리 기호를 제외한 첫 글자의 x0 좌표"""
+        if not self.starts_with_bullet and not self.starts_with_numbered_list:
+            return self.span_fields[0][1][0]
+
+        text = self.raw_text
+        cleaned_text = removeFirstMatch(STRIP_BULLET_PATTERNS, text).lstrip()
+        found = self._spanAt(len(text) - len(cleaned_text))
+        if found is not None:
+            (span_text, bbox, _), offset = found
+            return bbox[0] + offset * ((bbox[2] - bbox[0]) / max(len(span_text), 1))
+
+        return self.span_fields[-1][1][2]  # 못 찾았을 경우
+
+    @_lazyFeature
+    def first_char_width(self):
+        """글머리 기호를 제외한 첫 글자가 있는 span의 평균 글자 너비"""
+        text = self.raw_text
+        cleaned_text = removeFirstMatch(WIDTH_BULLET_PATTERNS, text)
+        found = self._spanAt(len(text) - len(cleaned_text))
+        if found is not None:
+            (span_text, bbox, _), _ = found
+            return (bbox[2] - bbox[0]) / max(len(span_text), 1)
+
+        return 0  # 못 찾았을 경우
+
+    @_lazyFeature
+    def first_font_size(self):
+        """글머리 기호를 제외한 첫 글자가 있는 span의 폰트 크기 (없으면 None)"""
+        text = self.raw_text
+        cleaned_text = removeFirstMatch(FONT_SIZE_BULLET_PATTERNS, text).lstrip()
+        if not cleaned_text:
+            return None
+
+        found = self._spanAt(len(text) - len(cleaned_text))
+        return found[0][2] if found is not None else None
+
+    @_lazyFeature
+    def average_char_width(self):
+        """line 전체 span 너비 합 / 글자 수 (빈 line이면 0)"""
+        total_width = 0
+        total_chars = 0
+        for text, bbox, _ in self.span_fields:
+            total_width += bbox[2] - bbox[0]
+            total_chars += len(text)
+        return total_width / total_chars if total_chars else 0
+
+    @_lazyFeature
+    def rotate(self):
+        return dirToRotation(self.dir)
+
+
+_scope = threading.local()
+
+
+@contextmanager
+def lineFeatureScope():
+    """
+    이 블록 안에서 getLineFeatures로 계산한 값을 line별로 보관해 재사용.
+    (페이지 하나를 전처리하는 동안 사용하고, 끝나면 보관한 값은 버림 / 스레드별로 따로 관리)
+    """
+    previous = getattr(_scope, "cache", None)
+    _scope.cache = {}
+    try:
+        yield
+    finally:
+        _scope.cache = previous
+
+
+def getLineFeatures(line) -> LineFeatures:
+    """line의 LineFeatures 반환 (lineFeatureScope 안이면 내용이 바뀌지 않은 line은 이전에 계산한 값 재사용)"""
+    cache = getattr(_scope, "cache", None)
+    if cache is None:
+        return LineFeatures(line)
+
+    entry = cache.get(id(line))
+    if entry is not None and entry[0] is line and entry[1].isValidFor(line):
+        return entry[1]
+
+    features = LineFeatures(line)
+    # line 객체도 함께 보관해서, scope가 끝나기 전에 id가 다른 line에 재사용되지 않게 함
+    cache[id(line)] = (line, features)
+    return features
@@ -0,0 +1,180 @@
+import random
+import re
+import pytest
+from preprocess.preprocess import preProcess, _preProcess
+from preprocess.preprocess_fixtures import FIXTURE_SEEDS, LINE_DIRECTIONS, fixturePageInfos, preprocessedBlocks
+from styled_translate.assign_style import dirToRotation
+from text_extract.text_extract import lineText
+from util.block_utils import get_average_char_width
+from util.line_features import LineFeatures, getLineFeatures, lineFeatureScope
+from util.line_utils import (getFirstXExceptBullet, getFirstCharacterWidth, startsWithBullet,
+                             getFirstFontSizeExcludingBullet, startsWithNumberedList)
+
+
+REFERENCE_STRIP_BULLET_PATTERNS = [
+    r"^\s*(\d+\.)+\s*", r"^\s*\d+\.\s*", r"^\s*\(\d+\)\s*", r"^\s*\[\d+\]\s*", r"^\s*\d+\)\s*", r"^\s*[a-z]\.\s*",
+    r"^\s*\([a-zA-Z]\)\s*", r"^\s*[①-⑳]\s*", r"^\s*[가-힣]\.\s*", r"^\s*\([가-힣]\)\s*",
+    r"^\s*[\u2013\u2192\u2022\u2023\u25AA\u25CF\u25E6\u25BA\u25B6\u002D\u002A\u0022\u002B\u25CE\u2219\u25CB\u2192\u2714\u2726]\s*",
+    r"^[\u0022]\s+",
+]
+REFERENCE_WIDTH_BULLET_PATTERNS = [
+    r"^(\d+\.)+\s+", r"^\d+\.\s+", r"^\(\d+\)\s+", r"^\[\d+\]\s+", r"^\d+\)\s+", r"^[a-z]\.\s+",
+    r"^\([a-zA-Z]\)\s+", r"^[①-⑳]\s+", r"^[가-힣]\.\s+", r"^\([가-힣]\)\s+",
+    r"^[\u2013\u2192\u2022\u2023\u25AA\u25CF\u25E6\u25BA\u25B6\u002D\u002A\u002B\u25CE\u2219\u25CB\u2192\u2714\u2726]\s*",
+    r"^[\u0022]\s+",
+]
+REFERENCE_SEPARATING_PATTERNS = [
+    r"^(\d+\.)+\s+", r"^\d+\.\s+", r"^\[\d+\]\s+", r"^\d+\)\s+", r"^\([a-zA-Z]\)\s+",
+    r"^[①-⑳]\s+", r"^[가-힣]\.\s+", r"^\([가-힣]\)\s+",
+]
+
+
+def referenceRemoveBullet(patterns, text):
+    for pattern in patterns:
+        if re.match(pattern, text):
+            return re.sub(pattern, "", text, count=1)
+    return text
+
+
+def referenceStartsWithBullet(line):
+    text = lineText(line).strip()
+    return bool(re.match(r"^[\u2013\u2192\u2022\u2023\u25AA\u25CF\u25E6\u25BA\u25B6\u002D\u002A\u002B\u25CE\u2219\u25CB\u2192\u2714\u2726]\s*", text)) \
+        or bool(re.match(r"^[\u0022]\s+", text))
+
+
+def referenceStartsWithNumberedList(line, sepa_check=False):
+    patterns = REFERENCE_SEPARATING_PATTERNS if sepa_check else REFERENCE_WIDTH_BULLET_PATTERNS[:10]
+    text = lineText(line).strip()
+    return any(re.match(p, text.strip()) for p in patterns)
+
+
+def referenceFirstXExceptBullet(line):
+    if not referenceStartsWithBullet(line) and not referenceStartsWithNumberedList(line):
+        return line["spans"][0]["bbox"][0]
+
+    text = "".join(span.get("text", "") for span in line.get("spans", []))
+    cleaned_text = referenceRemoveBullet(REFERENCE_STRIP_BULLET_PATTERNS, text).lstrip()
+
+    target_index = len(text) - len(cleaned_text)
+    char_count = 0
+    for span in line.get("spans", []):
+        span_text = span.get("text", "")
+        if char_count + len(span_text) > target_index:
+            offset = target_index - char_count
+            if offset < len(span_text):
+                return span["bbox"][0] + offset * ((span["bbox"][2] - span["bbox"][0]) / max(len(span_text), 1))
+        char_count += len(span_text)
+
+    return line.get("spans", [])[-1]["bbox"][2]
+
+
+def referenceFirstCharacterWidth(line):
+    text = "".join(span.get("text", "") for span in line.get("spans", []))
+    cleaned_text = referenceRemoveBullet(REFERENCE_WIDTH_BULLET_PATTERNS, text)
+
+    target_index = len(text) - len(cleaned_text)
+    char_count = 0
+    for span in line.get("spans", []):
+        span_text = span.get("text", "")
+        if char_count + len(span_text) > target_index:
+            return (span["bbox"][2] - span["bbox"][0]) / max(len(span_text), 1)
+        char_count += len(span_text)
+
+    return 0
+
+
+def referenceFirstFontSize(line):
+    text = "".join(span.get("text", "") for span in line.get("spans", []))
+    cleaned_text = referenceRemoveBullet(REFERENCE_STRIP_BULLET_PATTERNS[:-1], text).lstrip()
+    if not cleaned_text:
+        return None
+
+    target_index = len(text) - len(cleaned_text)
+    char_count = 0
+    for span in line.get("spans", []):
+        span_text = span.get("text", "")
+        if char_count + len(span_text) > target_index:
+            return span.get("size", None)
+        char_count += len(span_text)
+
+    return None
+
+
+def referenceAverageCharWidth(line):
+    total_width = 0
+    total_chars = 0
+    for span in line.get("spans", []):
+        bbox = span.get("bbox", [0, 0, 0, 0])
+        total_width += bbox[2] - bbox[0]
+        total_chars += len(span.get("text", ""))
+    return total_width / total_chars if total_chars else 0
+
+
+LINE_PREFIXES = ["", "", "• ", "•", "- ", "* ", '" ', '"x', "1. ", "1.2.3. ", "12.", "(3) ", "[4] ", "5) ", "a. ", "(B) ",
+                 "① ", "가. ", "(나) ", "  ", " 2. ", "→ ", "\u2013"]
+LINE_WORDS = ["Text", "word", "값", "a", "1.5", " ", "", "(c)", "x."]
+
+
+def randomFeatureLine(rng):
+    """글머리 기호/번호, 여러 span, 빈 span, 좁거나 넓은 span 간격이 섞인 무작위 line"""
+    x = rng.uniform(0, 300)
+    spans = []
+    for span_idx in range(rng.randint(1, 4)):
+        text = (rng.choice(LINE_PREFIXES) if span_idx == 0 else "") + "".join(rng.choice(LINE_WORDS) for _ in range(rng.randint(0, 4)))
+        if span_idx == 0 and rng.random() < 0.3:
+            text = rng.choice(LINE_PREFIXES)  # 글머리 기호만 있는 span
+        width = rng.uniform(0, 12) * max(len(text), 1)
+        spans.append({"text": text, "size": rng.choice([8, 9.5, 10, 12]), "bbox": (x, 100, x + width, 112)})
+        x += width + rng.uniform(-2, 10)
+    return {"bbox": (spans[0]["bbox"][0], 100, x, 112), "dir": rng.choice(LINE_DIRECTIONS), "wmode": 0, "spans": spans}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_line_features_match_reference_helpers(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        line = randomFeatureLine(rng)
+        with lineFeatureScope():
+            for _ in range(2):  # scope 안에서 다시 읽어도 같은 값인지
+                assert getLineFeatures(line).text == lineText(line)
+                assert getLineFeatures(line).stripped_text == lineText(line).strip()
+                assert startsWithBullet(None, line) == referenceStartsWithBullet(line)
+                assert startsWithNumberedList(None, line) == referenceStartsWithNumberedList(line)
+                assert startsWithNumberedList(None, line, sepa_check=True) == referenceStartsWithNumberedList(line, sepa_check=True)
+                assert getFirstXExceptBullet(line) == referenceFirstXExceptBullet(line)
+                assert getFirstCharacterWidth(line) == referenceFirstCharacterWidth(line)
+                assert getFirstFontSizeExcludingBullet(line) == referenceFirstFontSize(line)
+                assert get_average_char_width(line) == referenceAverageCharWidth(line)
+                assert getLineFeatures(line).rotate == dirToRotation(line["dir"])
+
+
+def test_line_features_are_recomputed_after_line_changes():
+    """scope 안에서 line이 병합되거나 bbox가 새 값으로 바뀌면 다시 계산하는지"""
+    rng = random.Random(0)
+    with lineFeatureScope():
+        for _ in range(200):
+            line, other = randomFeatureLine(rng), randomFeatureLine(rng)
+            getLineFeatures(line).text, getLineFeatures(line).first_x_except_bullet
+
+            change = rng.randrange(4)
+            if change == 0:
+                line["spans"].extend(other["spans"])  # 같은 spans 리스트에 span 추가
+            elif change == 1:
+                line["spans"] = line["spans"] + other["spans"]  # spans 리스트 교체
+            elif change == 2:
+                span = line["spans"][0]
+                span["bbox"] = (span["bbox"][0] - 5, span["bbox"][1], span["bbox"][2] + 5, span["bbox"][3])  # bbox 교체
+            else:
+                line["dir"] = other["dir"]
+
+            fresh = LineFeatures(line)
+            cached = getLineFeatures(line)
+            assert (cached.text, cached.first_x_except_bullet, cached.first_char_width, cached.rotate) == \
+                (fresh.text, fresh.first_x_except_bullet, fresh.first_char_width, fresh.rotate)
+
+
+@pytest.mark.parametrize("seed", FIXTURE_SEEDS)
+def test_preprocess_with_line_feature_scope_matches_fresh_features(seed):
+    """전처리 결과가 line 계산 값을 재사용할 때와 매번 새로 계산할 때 같은지"""
+    page_infos = fixturePageInfos(seed)
+    assert preprocessedBlocks(page_infos, preProcess) == preprocessedBlocks(page_infos, _preProcess)
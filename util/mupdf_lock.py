@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+from threading import RLock
+import pymupdf
+
+# PyMuPDF는 스레드 안전하지 않으므로, 여러 스레드에서 동시에 pymupdf를 호출할 수 있는 곳은
+# 이 lock으로 감싸서 pymupdf 호출이 한 번에 하나씩만 실행되도록 합니다.
+# (네트워크 대기, YOLO 추론 등 pymupdf 바깥의 작업은 lock 없이 겹쳐서 실행됩니다.)
+mupdf_lock = RLock()
+
+
+@contextmanager
+def openPdfLocked(file_path):
+    """문서 열기/닫기를 mupdf_lock 안에서 수행하는 pymupdf.open 대체 context manager"""
+    with mupdf_lock:
+        doc = pymupdf.open(file_path)
+    try:
+        yield doc
+    finally:
+        with mupdf_lock:
+            doc.close()
@@ -0,0 +1,14 @@
+import multiprocessing
+
+
+def getProcessContext():
+    """
+    worker 프로세스 시작 방식.
+    프로세스 풀을 만드는 시점에 다른 스레드(진행 애니메이션, 요약/번역 스레드 등)가 lock을 잡고 있을 수 있으므로,
+    그 lock 상태까지 복사하는 fork 대신 forkserver(없으면 spawn)를 사용합니다.
+    forkserver는 미리 띄워 둔 서버 프로세스에서 worker를 fork하므로 spawn보다 worker 시작이 빠릅니다.
+    두 방식 모두 worker가 main 모듈을 다시 실행하므로, 실행 스크립트는 if __name__ == "__main__": 안에서 시작해야 합니다.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
@@ -0,0 +1,327 @@
+from threading import Lock
+import asyncio
+import os
+import re
+import time
+from openai import RateLimitError
+from util.console_utils import print_info
+
+DEFAULT_RPM_LIMIT = int(os.environ.get("OPENAI_RPM_LIMIT", 0))  # 분당 요청 수 한도 (0이면 응답 헤더로 학습)
+DEFAULT_TPM_LIMIT = int(os.environ.get("OPENAI_TPM_LIMIT", 0))  # 분당 토큰 수 한도 (0이면 응답 헤더로 학습)
+PROBE_POLL_INTERVAL = 0.05  # 한도를 모를 때 첫 요청(probe)의 응답을 기다리며 확인하는 간격(초)
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parseResetDuration(value):
+    """x-ratelimit-reset-* 헤더 값("1s", "6m0s", "20ms" 등)을 초 단위로 변환"""
+    if not value:
+        return None
+    matches = _DURATION_PATTERN.findall(value)
+    if not matches:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def estimateTokens(text):
+    """대략적인 토큰 수 추정 (영어 기준 4글자당 1토큰, 한글 등은 더 많이 나오므로 여유 있게 계산)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def estimateRequestTokens(request, expected_output_tokens=None):
+    """
+    chat.completions 요청 인자로 사용할 토큰 수 추정.
+    출력 토큰 수를 따로 주지 않으면 입력 메시지 중 user 메시지와 비슷한 길이의 응답이 온다고 가정합니다.
+    """
+    input_tokens = 0
+    user_tokens = 0
+    for message in request.get("messages", []):
+        tokens = estimateTokens(message.get("content", "")) + 4
+        input_tokens += tokens
+        if message.get("role") == "user":
+            user_tokens += tokens
+
+    if expected_output_tokens is None:
+        expected_output_tokens = user_tokens
+    return input_tokens + expected_output_tokens
+
+
+class RateScheduler:
+    """
+    OpenAI 요청 수(RPM) / 토큰 수(TPM) 한도를 클라이언트 쪽에서 지키는 스케줄러.
+
+    - 요청마다 추정 토큰 수만큼 요청/토큰 bucket에서 미리 예약하고, 예약이 가능해지는 시각까지만 기다립니다.
+      예약은 도착 순서대로 쌓이므로 대기 중인 요청들이 한꺼번에 깨어나 동시에 재시도하지 않습니다.
+    - 응답의 x-ratelimit-* 헤더로 실제 남은 양과 한도를 반영합니다. (설정된 한도가 없으면 헤더의 한도를 사용)
+      한도를 설정하지 않았으면 첫 요청(probe) 하나만 보내고, 나머지는 그 응답 헤더로 한도를 알게 될 때까지 기다립니다.
+      (한도를 모르는 채로 첫 요청들이 한꺼번에 나가 429를 받는 것을 막음)
+    - 429를 받으면 reset 시각까지 새 요청 허용을 멈춥니다.
+    - 대기 중인 요청 수, 누적/최대 대기 시간 등을 기록합니다.
+    """
+
+    def __init__(self, rpm_limit=DEFAULT_RPM_LIMIT, tpm_limit=DEFAULT_TPM_LIMIT):
+        self.rpm_limit = rpm_limit or None
+        self.tpm_limit = tpm_limit or None
+        self._configured_rpm = bool(rpm_limit)
+        self._configured_tpm = bool(tpm_limit)
+
+        self._lock = Lock()
+        self._request_balance = float(self.rpm_limit or 0)
+        self._token_balance = float(self.tpm_limit or 0)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._limits_known = bool(self.rpm_limit or self.tpm_limit)  # False이면 probe 응답 전까지 요청 하나만 허용
+        self._probe_in_flight = False
+
+        self.queue_depth = 0  # 지금 대기 중인 요청 수
+        self.max_queue_depth = 0
+        self.admitted = 0  # 허용된 요청 수
+        self.delayed = 0  # 대기 후 허용된 요청 수
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.rate_limited = 0  # 받은 429 수
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.rpm_limit:
+            self._request_balance = min(float(self.rpm_limit), self._request_balance + elapsed * self.rpm_limit / 60.0)
+        if self.tpm_limit:
+            self._token_balance = min(float(self.tpm_limit), self._token_balance + elapsed * self.tpm_limit / 60.0)
+
+    def _reserve(self, tokens, waited=0.0):
+        """
+        요청 하나를 예약하고 기다려야 하는 시간(초) 반환.
+        한도를 아직 모르면 첫 요청만 probe로 허용하고, 나머지는 None을 반환해 probe 응답을 기다리게 합니다.
+        waited: probe 응답을 기다리며 이미 보낸 시간 (대기 통계에 포함)
+        """
+        with self._lock:
+            if not self._limits_known:
+                if self._probe_in_flight:
+                    return None
+                self._probe_in_flight = True
+
+            now = time.monotonic()
+            self._refill(now)
+
+            wait = max(0.0, self._paused_until - now)
+            if self.rpm_limit:
+                self._request_balance -= 1
+                if self._request_balance < 0:
+                    wait = max(wait, -self._request_balance * 60.0 / self.rpm_limit)
+            if self.tpm_limit:
+                # 한도보다 큰 요청도 언젠가는 허용되도록 한도로 자름
+                self._token_balance -= min(tokens, self.tpm_limit)
+                if self._token_balance < 0:
+                    wait = max(wait, -self._token_balance * 60.0 / self.tpm_limit)
+
+            self.admitted += 1
+            if waited + wait > 0:
+                self.delayed += 1
+                self.total_wait_time += waited + wait
+                self.max_wait_time = max(self.max_wait_time, waited + wait)
+            if wait > 0:
+                self._enterQueueLocked()
+
+        return wait
+
+    def _enterQueueLocked(self):
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def _enterQueue(self):
+        with self._lock:
+            self._enterQueueLocked()
+
+    def _leaveQueue(self):
+        with self._lock:
+            self.queue_depth -= 1
+
+    def acquire(self, tokens):
+        """요청을 보내도 될 때까지 현재 스레드를 대기"""
+        wait = self._reserve(tokens)
+        if wait is None:
+            # 한도를 알려 줄 probe 요청의 응답을 기다림
+            started = time.monotonic()
+            self._enterQueue()
+            try:
+                while wait is None:
+                    time.sleep(PROBE_POLL_INTERVAL)
+                    wait = self._reserve(tokens, time.monotonic() - started)
+            finally:
+                self._leaveQueue()
+
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._leaveQueue()
+
+    async def acquireAsync(self, tokens):
+        """acquire의 asyncio 버전"""
+        wait = self._reserve(tokens)
+        if wait is None:
+            started = time.monotonic()
+            self._enterQueue()
+            try:
+                while wait is None:
+                    await asyncio.sleep(PROBE_POLL_INTERVAL)
+                    wait = self._reserve(tokens, time.monotonic() - started)
+            finally:
+                self._leaveQueue()
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._leaveQueue()
+
+    def updateFromHeaders(self, headers):
+        """
+        응답의 x-ratelimit-* 헤더로 한도와 남은 양 갱신.
+        응답을 받았으므로 probe 대기도 끝냅니다. (헤더에 한도가 없으면 한도 없이 허용)
+        """
+        if not headers:
+            with self._lock:
+                self._limits_known = True
+            return
+
+        def header_float(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        limit_requests = header_float("x-ratelimit-limit-requests")
+        limit_tokens = header_float("x-ratelimit-limit-tokens")
+        remaining_requests = header_float("x-ratelimit-remaining-requests")
+        remaining_tokens = header_float("x-ratelimit-remaining-tokens")
+
+        with self._lock:
+            self._refill(time.monotonic())
+
+            if limit_requests and not self._configured_rpm and self.rpm_limit != limit_requests:
+                self._request_balance = limit_requests if self.rpm_limit is None else self._request_balance
+                self.rpm_limit = limit_requests
+            if limit_tokens and not self._configured_tpm and self.tpm_limit != limit_tokens:
+                self._token_balance = limit_tokens if self.tpm_limit is None else self._token_balance
+                self.tpm_limit = limit_tokens
+
+            # 서버가 알려준 남은 양이 더 적으면 그 값을 따름 (다른 프로세스와 한도를 공유하는 경우 등)
+            if self.rpm_limit and remaining_requests is not None:
+                self._request_balance = min(self._request_balance, remaining_requests)
+            if self.tpm_limit and remaining_tokens is not None:
+                self._token_balance = min(self._token_balance, remaining_tokens)
+
+            self._limits_known = True
+
+    def onRequestFailed(self):
+        """응답 없이 실패한 요청(네트워크 오류 등) 후 호출. 한도를 아직 모르면 다음 요청을 probe로 보냄"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def onRateLimited(self, headers=None):
+        """429를 받았을 때 호출. 다시 허용될 때(알 수 없으면 1초)까지 새 요청 허용을 멈춤"""
+        reset = None
+        if headers:
+            # retry-after가 있으면 그 값을, 없으면 가장 먼저 돌아오는 한도의 reset 시각을 사용
+            reset = parseResetDuration(headers.get("retry-after"))
+            if reset is None:
+                resets = [
+                    parseResetDuration(headers.get("x-ratelimit-reset-requests")),
+                    parseResetDuration(headers.get("x-ratelimit-reset-tokens")),
+                ]
+                resets = [value for value in resets if value is not None]
+                reset = min(resets) if resets else None
+
+        with self._lock:
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + (reset or 1.0))
+
+        self.updateFromHeaders(headers)
+
+    def getStats(self):
+        with self._lock:
+            return {
+                "rpm_limit": self.rpm_limit,
+                "tpm_limit": self.tpm_limit,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "delayed": self.delayed,
+                "rate_limited": self.rate_limited,
+                "total_wait_time": round(self.total_wait_time, 4),
+                "max_wait_time": round(self.max_wait_time, 4),
+                "avg_wait_time": round(self.total_wait_time / self.admitted, 4) if self.admitted else 0.0,
+            }
+
+
+_rate_scheduler = None
+_rate_scheduler_lock = Lock()
+
+
+def getRateScheduler():
+    """프로세스 전역 RateScheduler 인스턴스 반환 (없으면 생성)"""
+    global _rate_scheduler
+
+    with _rate_scheduler_lock:
+        if _rate_scheduler is None:
+            _rate_scheduler = RateScheduler()
+
+    return _rate_scheduler
+
+
+def printRateSchedulerStats():
+    """번역이 끝난 뒤 RateScheduler의 요청/대기 통계 출력"""
+    stats = getRateScheduler().getStats()
+    if not stats["admitted"]:
+        return
+    print_info(
+        f"API 요청 {stats['admitted']}건 (대기 {stats['delayed']}건, 평균 대기 {stats['avg_wait_time']}초, "
+        f"최대 대기 {stats['max_wait_time']}초, 최대 대기열 {stats['max_queue_depth']}, 429 응답 {stats['rate_limited']}건)"
+    )
+
+
+def createChatCompletion(client, request, expected_output_tokens=None):
+    """
+    RateScheduler의 허용을 받은 뒤 chat.completions 요청을 보내고, 응답 헤더로 스케줄러를 갱신하는 함수.
+    RateLimitError는 스케줄러에 반영한 뒤 그대로 다시 던지므로, 기존 재시도 데코레이터와 함께 사용할 수 있습니다.
+    """
+    scheduler = getRateScheduler()
+    scheduler.acquire(estimateRequestTokens(request, expected_output_tokens))
+
+    try:
+        raw_response = client.chat.completions.with_raw_response.create(**request)
+    except RateLimitError as e:
+        scheduler.onRateLimited(getattr(e.response, "headers", None))
+        raise
+    except Exception:
+        scheduler.onRequestFailed()
+        raise
+
+    scheduler.updateFromHeaders(raw_response.headers)
+    return raw_response.parse()
+
+
+async def sendChatCompletionAsync(client, request):
+    """
+    RateScheduler의 허용을 이미 받은 요청을 보내고, 응답 헤더로 스케줄러를 갱신하는 함수.
+    (동시 요청 수 semaphore를 쓰는 쪽에서, 스케줄러 대기 중에는 semaphore를 잡지 않도록 허용과 전송을 나눌 때 사용)
+    """
+    scheduler = getRateScheduler()
+    try:
+        raw_response = await client.chat.completions.with_raw_response.create(**request)
+    except RateLimitError as e:
+        scheduler.onRateLimited(getattr(e.response, "headers", None))
+        raise
+    except Exception:
+        scheduler.onRequestFailed()
+        raise
+
+    scheduler.updateFromHeaders(raw_response.headers)
+    return raw_response.parse()
@@ -0,0 +1,133 @@
+import math
+
+
+class GridIndex:
+    """
+    페이지 안의 bbox들을 균일한 격자(cell)에 나눠 담아, 주어진 bbox와 겹칠 수 있는 항목만 빠르게 찾는 공간 인덱스.
+
+    모든 항목을 하나씩 비교하는 대신 query bbox가 걸친 cell에 들어 있는 항목만 후보로 돌려주므로,
+    블락 × YOLO 객체, 링크 × span처럼 페이지 안에서 전부 짝지어 비교하던 반복을 줄일 수 있습니다.
+    경계가 맞닿은 경우도 겹친다고 보고 후보에 포함하므로(닫힌 구간), 실제 판정은 호출한 쪽의 기존 조건으로 다시 합니다.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> 항목 번호 리스트
+        self.bboxes = {}  # 항목 번호 -> 정규화된 bbox
+        self.unindexed = []  # 좌표가 유한하지 않아 격자에 넣을 수 없는 항목 (항상 후보로 반환)
+        self.cell_bounds = None  # 사용된 cell 범위 (min_cx, min_cy, max_cx, max_cy)
+
+    @classmethod
+    def fromBboxes(cls, bboxes, cell_size: float = None):
+        """
+        bboxes[i]를 항목 번호 i로 담은 인덱스 생성 (bbox가 None이거나 비어 있으면 제외).
+        cell_size를 주지 않으면 항목 bbox의 평균 크기로 정합니다.
+        """
+        items = [(idx, tuple(bbox[:4])) for idx, bbox in enumerate(bboxes) if bbox]
+
+        if cell_size is None:
+            sizes = [max(abs(bbox[2] - bbox[0]), abs(bbox[3] - bbox[1])) for _, bbox in items]
+            sizes = [size for size in sizes if math.isfinite(size)]
+            cell_size = sum(sizes) / len(sizes) if sizes else 1.0
+        index = cls(max(cell_size, 1.0))
+
+        for idx, bbox in items:
+            index.insert(idx, bbox)
+        return index
+
+    def _cellRange(self, bbox):
+        x0, y0, x1, y1 = bbox
+        return (math.floor(x0 / self.cell_size), math.floor(y0 / self.cell_size),
+                math.floor(x1 / self.cell_size), math.floor(y1 / self.cell_size))
+
+    def insert(self, idx, bbox):
+        x0, y0, x1, y1 = bbox
+        bbox = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+        if not all(math.isfinite(v) for v in bbox):
+            self.unindexed.append(idx)
+            return
+
+        self.bboxes[idx] = bbox
+        cx0, cy0, cx1, cy1 = self._cellRange(bbox)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), []).append(idx)
+
+        if self.cell_bounds is None:
+            self.cell_bounds = (cx0, cy0, cx1, cy1)
+        else:
+            bx0, by0, bx1, by1 = self.cell_bounds
+            self.cell_bounds = (min(bx0, cx0), min(by0, cy0), max(bx1, cx1), max(by1, cy1))
+
+    def query(self, bbox):
+        """bbox와 겹치거나 맞닿는 항목 번호를 오름차순(입력 순서)으로 반환"""
+        x0, y0, x1, y1 = bbox
+        qx0, qy0, qx1, qy1 = min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+        if not all(math.isfinite(v) for v in (qx0, qy0, qx1, qy1)):
+            # 범위를 정할 수 없는 query는 전체 항목을 후보로 반환
+            return sorted(list(self.bboxes) + self.unindexed)
+
+        found = set(self.unindexed)
+
+        if self.cell_bounds is not None:
+            cx0, cy0, cx1, cy1 = self._cellRange((qx0, qy0, qx1, qy1))
+            bx0, by0, bx1, by1 = self.cell_bounds
+            # 항목이 있는 cell 범위 밖은 볼 필요 없음
+            cx0, cy0, cx1, cy1 = max(cx0, bx0), max(cy0, by0), min(cx1, bx1), min(cy1, by1)
+
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    for idx in self.cells.get((cx, cy), ()):
+                        if idx in found:
+                            continue
+                        ix0, iy0, ix1, iy1 = self.bboxes[idx]
+                        if ix0 <= qx1 and qx0 <= ix1 and iy0 <= qy1 and qy0 <= iy1:
+                            found.add(idx)
+
+        return sorted(found)
+
+
+class MaxSegmentTree:
+    """
+    값 배열에서 "lo 이후로 값이 threshold보다 큰 첫 번째 위치"를 O(log n)에 찾는 세그먼트 트리.
+    제외할 위치는 값을 -inf로 바꿔 두면 검색에서 빠집니다.
+    """
+
+    def __init__(self, values):
+        self.n = len(values)
+        self.size = 1
+        while self.size < max(self.n, 1):
+            self.size *= 2
+        self.tree = [float("-inf")] * (2 * self.size)
+        self.tree[self.size:self.size + self.n] = values
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def update(self, idx, value):
+        node = self.size + idx
+        self.tree[node] = value
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+    def findFirstAbove(self, lo, threshold):
+        """lo 이상인 위치 중 값 > threshold인 첫 위치 (없으면 n)"""
+        if lo >= self.n:
+            return self.n
+
+        def search(node, node_lo, node_hi):
+            if node_hi <= lo or not self.tree[node] > threshold:
+                return None
+            if node >= self.size:
+                return node - self.size
+            mid = (node_lo + node_hi) // 2
+            found = search(2 * node, node_lo, mid)
+            if found is None:
+                found = search(2 * node + 1, mid, node_hi)
+            return found
+
+        found = search(1, 0, self.size)
+        return self.n if found is None or found >= self.n else found
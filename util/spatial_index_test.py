@@ -0,0 +1,84 @@
+import copy
+import math
+import random
+import pytest
+import preprocess.assign_classname as assign_classname
+import preprocess.bbox_adjust as bbox_adjust
+import preprocess.link_mark as link_mark
+from preprocess.preprocess import preProcess
+from preprocess.preprocess_fixtures import FIXTURE_SEEDS, fixturePageInfos, preprocessedBlocks, randomBbox, jitteredBbox
+from util.spatial_index import GridIndex
+
+
+class BruteForceIndex:
+    """이전 구현처럼 모든 항목을 입력 순서대로 후보로 돌려주는 인덱스"""
+
+    def __init__(self, count):
+        self.count = count
+
+    @classmethod
+    def fromBboxes(cls, bboxes, cell_size=None):
+        return cls(len(bboxes))
+
+    def query(self, bbox):
+        return list(range(self.count))
+
+
+def referenceOverlaps(bboxes, query):
+    """닫힌 구간으로 query와 겹치거나 맞닿는 bbox 번호 (좌표가 유한하지 않은 항목/query는 항상 포함)"""
+    def normalized(bbox):
+        x0, y0, x1, y1 = bbox[:4]
+        return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+    qx0, qy0, qx1, qy1 = normalized(query)
+    query_finite = all(math.isfinite(v) for v in (qx0, qy0, qx1, qy1))
+    found = []
+    for idx, bbox in enumerate(bboxes):
+        if not bbox:
+            continue
+        x0, y0, x1, y1 = normalized(bbox)
+        if not query_finite or not all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+            found.append(idx)
+        elif x0 <= qx1 and qx0 <= x1 and y0 <= qy1 and qy0 <= y1:
+            found.append(idx)
+    return found
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_grid_index_query_matches_pairwise_scan(seed):
+    rng = random.Random(seed)
+    page_size = rng.choice([100, 612, 2000])
+    bboxes = [randomBbox(rng, page_size) for _ in range(rng.randint(0, 300))]
+    bboxes += [None, [], [0, 0, math.inf, 10], [math.nan, 0, 5, 5]][:rng.randint(0, 4)]
+    rng.shuffle(bboxes)
+
+    for cell_size in (None, 0.5, 7, 500):
+        index = GridIndex.fromBboxes(bboxes, cell_size=cell_size)
+        queries = [randomBbox(rng, page_size) for _ in range(100)] + [bbox for bbox in bboxes if bbox][:50]
+        queries.append([0, 0, math.inf, 1])
+        for query in queries:
+            assert index.query(query) == referenceOverlaps(bboxes, query)
+
+
+@pytest.mark.parametrize("seed", FIXTURE_SEEDS)
+def test_preprocess_with_grid_index_matches_pairwise_scan(seed, monkeypatch):
+    """클래스 이름 부여, 링크 표시, bbox 보정을 모든 쌍 비교로 했을 때와 결과가 같은지"""
+    page_infos = fixturePageInfos(seed)
+    blocks = preprocessedBlocks(page_infos, preProcess)
+    with monkeypatch.context() as patch:
+        for module in (assign_classname, link_mark, bbox_adjust):
+            patch.setattr(module, "GridIndex", BruteForceIndex)
+        assert blocks == preprocessedBlocks(page_infos, preProcess)
+
+    # 블락 근처/무작위 위치의 객체 기준 bbox 보정 (adjustBlocks)
+    rng = random.Random(seed)
+    for page_blocks in blocks:
+        adjust_objects = [{"bbox": jitteredBbox(rng, block["bbox"], 6)} for block in page_blocks]
+        adjust_objects += [{"bbox": randomBbox(rng, 612)} for _ in range(5)] + [{"bbox": None}]
+
+        reference_blocks = copy.deepcopy(page_blocks)
+        bbox_adjust.adjustBlocks(page_blocks, adjust_objects)
+        with monkeypatch.context() as patch:
+            patch.setattr(bbox_adjust, "GridIndex", BruteForceIndex)
+            bbox_adjust.adjustBlocks(reference_blocks, adjust_objects)
+        assert page_blocks == reference_blocks
@@ -2,34 +2,21 @@ from fastapi import FastAPI, UploadFile, File
 from fastapi.responses import JSONResponse
 import pymupdf 
 import numpy as np
-from ultralytics import YOLO  
-import os
+from yolo.yolo_inference.detector_service import getDetectorService
+from yolo.yolo_inference.detection import CATEGORY_ID_TO_NAME
+from yolo.yolo_inference.model_init import initModel as loadDetectorModel
+from yolo.yolo_inference.detection_cache import getDetectionCacheStats
+from yolo.yolo_inference.rasterize import renderZoom
 
 app = FastAPI()  # FastAPI 앱 생성
 
-# YOLO 모델에서 사용될 클래스 ID → 이름 매핑
-CATEGORY_ID_TO_NAME = {
-    0: "Caption",
-    1: "Footnote",
-    2: "Formula",
-    3: "List-item",
-    4: "Page-footer",
-    5: "Page-header",
-    6: "Picture",
-    7: "Section-header",
-    8: "Table",
-    9: "Text",
-    10: "Title"
-}
-
-def initModel():
+def initModel(backend=None):
     """
     YOLO 모델 초기화 함수.
-    요청마다 이 함수를 호출해 YOLO 모델을 새로 로드합니다.
+    호출할 때마다 backend(None이면 YOLO_BACKEND 환경변수)에 맞는 모델을 새로 로드합니다.
+    엔드포인트에서는 getDetectorService()로 공유 모델을 사용합니다.
     """
-    model_path = os.path.join(os.path.dirname(__file__), 'model', 'best.pt')
-    model = YOLO(model_path)
-    return model
+    return loadDetectorModel(backend)
 
 def detectObjectFromPage(page, model):
     """
@@ -42,8 +29,9 @@ def detectObjectFromPage(page, model):
     Returns:
         list: 탐지된 객체 정보의 리스트
     """
-    # PDF 페이지를 이미지(pixmap)로 렌더링 (150 DPI 해상도)
-    pix = page.get_pixmap(dpi=150)
+    # PDF 페이지를 이미지(pixmap)로 렌더링 (페이지 긴 변을 모델 입력 크기에 맞춤)
+    zoom = renderZoom(page.rect)
+    pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
     
     # pixmap 데이터를 numpy 배열로 변환 (H, W, C)
     img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
@@ -56,7 +44,7 @@ def detectObjectFromPage(page, model):
     results = model(img)
     
     output = []
-    scale = 72 / 150  # PDF 좌표계(72 DPI)로 변환하기 위한 스케일
+    scale = 1 / zoom  # PDF 좌표계(72 DPI)로 변환하기 위한 스케일
 
     # YOLO 탐지 결과 순회
     for r in results:
@@ -79,6 +67,23 @@ def detectObjectFromPage(page, model):
 
     return output
 
+@app.on_event("startup")
+def loadDetector():
+    """
+    서버 시작 시 YOLO 모델을 한 번 로드하고 warm-up 합니다.
+    이후 모든 요청은 같은 모델을 공유합니다.
+    """
+    getDetectorService().load()
+
+
+@app.get("/stats")
+def detector_stats():
+    """
+    공유 YOLO 모델의 로드 시간, warm-up 시간, 페이지당 추론 시간 통계와 페이지 탐지 캐시 hit/miss 통계 반환.
+    """
+    return JSONResponse(content={**getDetectorService().getStats(), "detection_cache": getDetectionCacheStats()})
+
+
 @app.post("/detect")
 async def detect_objects_in_pdf(pdf_file: UploadFile = File(...)):
     """
@@ -112,8 +117,8 @@ async def detect_objects_in_pdf(pdf_file: UploadFile = File(...)):
             }
     """
     try:
-        # YOLO 모델 요청마다 새로 로드
-        model = initModel()
+        # 서버 시작 시 로드된 공유 모델 사용
+        model = getDetectorService()
 
         # 업로드된 PDF 파일 내용을 메모리에서 읽음
         content = await pdf_file.read()
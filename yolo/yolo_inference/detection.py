@@ -1,7 +1,15 @@
 import pymupdf 
 import numpy as np
-from ultralytics import YOLO  
 import os
+from contextlib import nullcontext
+from itertools import chain
+from queue import Queue, Full
+from threading import Thread, Event
+from yolo.yolo_inference.detector_service import getDetectorService, modelInputSize
+from yolo.yolo_inference.detection_cache import getDetectionCache, modelFingerprint, pageCacheKey
+from yolo.yolo_inference.model_init import initModel as loadDetectorModel
+from yolo.yolo_inference.rasterize import iterRasterizedPages, renderZoom, DEFAULT_IMGSZ, DEFAULT_RENDER_DPI
+from util.mupdf_lock import mupdf_lock, openPdfLocked
 
 # YOLO 모델에서 사용될 클래스 ID → 이름 매핑
 CATEGORY_ID_TO_NAME = {
@@ -18,79 +26,329 @@ CATEGORY_ID_TO_NAME = {
     10: "Title"
 }
 
-def initModel():
+# 배치 탐지 기본값 (CPU 전용 노드에서는 환경변수로 메모리/처리량 조절)
+DEFAULT_BATCH_SIZE = int(os.environ.get("YOLO_BATCH_SIZE", 1))  # 모델 한 번 호출에 넣을 페이지 수
+DEFAULT_QUEUE_DEPTH = int(os.environ.get("YOLO_QUEUE_DEPTH", 4))  # 미리 렌더링해 둘 최대 페이지 수
+DEFAULT_RENDER_WORKERS = int(os.environ.get("YOLO_RENDER_WORKERS", 0))  # 페이지 렌더링 프로세스 수 (0이면 현재 프로세스에서 렌더링)
+
+def initModel(backend=None):
     """
     YOLO 모델 초기화 함수.
-    요청마다 이 함수를 호출해 YOLO 모델을 새로 로드합니다.
+    호출할 때마다 backend(None이면 YOLO_BACKEND 환경변수)에 맞는 모델을 새로 로드합니다.
+    반복 사용 시에는 getDetectorService()로 공유 모델을 사용하세요.
+    """
+    return loadDetectorModel(backend)
+
+def renderPageImage(page, imgsz=DEFAULT_IMGSZ, dpi=DEFAULT_RENDER_DPI):
+    """
+    PDF 페이지를 YOLO 입력용 RGB 이미지(np.ndarray, H x W x 3)로 렌더링하는 함수.
+    페이지 긴 변이 imgsz 픽셀이 되도록 렌더링하고(dpi가 주어지면 고정 DPI), (img, 렌더링 배율)을 반환합니다.
+    """
+    # PDF 페이지를 이미지(pixmap)로 렌더링
+    zoom = renderZoom(page.rect, imgsz=imgsz, dpi=dpi)
+    pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
+    return pixmapToImage(pix), zoom
+
+
+def pixmapToImage(pix):
+    """pixmap을 YOLO 입력용 RGB 이미지(np.ndarray, H x W x 3)로 변환하는 함수."""
+    # pixmap 데이터를 numpy 배열로 변환 (H, W, C)
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    
+    # RGBA 이미지일 경우 RGB로 변환 (알파 채널 제거)
+    if pix.n == 4:
+        img = img[:, :, :3]
+
+    return img
+
+
+def resultToObjects(result, zoom):
+    """
+    YOLO 결과(이미지 1장 분량)를 PDF 좌표계 기준 객체 배열로 변환하는 함수.
+    zoom은 이미지를 렌더링할 때 사용한 배율 (PDF 1pt당 픽셀 수)
     """
-    model_path = os.path.join(os.path.dirname(__file__), 'model', 'best.pt')
-    model = YOLO(model_path)
-    return model
+    output = []
+    scale = 1 / zoom  # PDF 좌표계(72 DPI)로 변환하기 위한 스케일
+
+    for box in result.boxes:
+        class_id = int(box.cls[0])  # 클래스 ID
+        conf = float(box.conf[0])  # 신뢰도
+        xyxy = box.xyxy[0].tolist()  # 바운딩 박스 좌표 [x1, y1, x2, y2]
+
+        output.append({
+            "class_id": class_id,
+            "class_name": CATEGORY_ID_TO_NAME.get(class_id, "unknown"),
+            "confidence": round(conf, 4),
+            "bbox": [
+                round(xyxy[0] * scale, 2),
+                round(xyxy[1] * scale, 2),
+                round(xyxy[2] * scale, 2),
+                round(xyxy[3] * scale, 2)
+            ]
+        })
+
+    return output
 
-def detectObjectFromPage(page, model):
+
+def detectObjectFromPage(page, model, imgsz=None, dpi=DEFAULT_RENDER_DPI):
     """
     PDF 페이지에서 객체 탐지를 수행하는 함수.
     
     Args:
         page (pymupdf.Page): PDF 페이지 객체
         model (YOLO): YOLO 모델 객체
+        imgsz (int): 페이지 긴 변을 렌더링할 픽셀 수 (None이면 모델 입력 크기)
+        dpi (int): 0보다 크면 imgsz 대신 사용할 고정 렌더링 해상도
 
     Returns:
         list: 탐지된 객체 정보의 리스트
     """
-    # PDF 페이지를 이미지(pixmap)로 렌더링 (150 DPI 해상도)
-    pix = page.get_pixmap(dpi=150)
-    
-    # pixmap 데이터를 numpy 배열로 변환 (H, W, C)
-    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
-    
-    # RGBA 이미지일 경우 RGB로 변환 (알파 채널 제거)
-    if pix.n == 4:
-        img = img[:, :, :3]
+    imgsz = imgsz or modelInputSize(model)
+
+    # PDF 페이지를 모델 입력 크기로 렌더링
+    with mupdf_lock:
+        img, zoom = renderPageImage(page, imgsz=imgsz, dpi=dpi)
+
+    return detectObjectsInImage(img, model, zoom)
+
 
+def detectObjectsInImage(img, model, zoom):
+    """렌더링된 페이지 이미지 한 장에서 객체 탐지를 수행하는 함수. (zoom: 렌더링 배율)"""
     # YOLO로 이미지에서 객체 탐지 수행 (verbose=False로 로그 출력 비활성화)
     results = model(img, verbose=False)
     
     output = []
-    scale = 72 / 150  # PDF 좌표계(72 DPI)로 변환하기 위한 스케일
 
     # YOLO 탐지 결과 순회
     for r in results:
-        for box in r.boxes:
-            class_id = int(box.cls[0])  # 클래스 ID
-            conf = float(box.conf[0])  # 신뢰도
-            xyxy = box.xyxy[0].tolist()  # 바운딩 박스 좌표 [x1, y1, x2, y2]
-
-            output.append({
-                "class_id": class_id,
-                "class_name": CATEGORY_ID_TO_NAME.get(class_id, "unknown"),
-                "confidence": round(conf, 4),
-                "bbox": [
-                    round(xyxy[0] * scale, 2),
-                    round(xyxy[1] * scale, 2),
-                    round(xyxy[2] * scale, 2),
-                    round(xyxy[3] * scale, 2)
-                ]
-            })
+        output.extend(resultToObjects(r, zoom))
 
     return output
 
 
-def detectObjectsFromFile(file_path):
-    # YOLO 모델 요청마다 새로 로드
-    model = initModel()
+def iterPageImages(doc, imgsz=DEFAULT_IMGSZ, dpi=DEFAULT_RENDER_DPI, page_indices=None):
+    """
+    현재 프로세스에서 페이지를 순서대로 렌더링하며 (page_num, img, 렌더링 배율)을 내보내는 generator.
+    page_indices(0부터 시작하는 페이지 index 리스트)가 주어지면 그 페이지만 렌더링합니다.
+    """
+    for page_idx in (range(len(doc)) if page_indices is None else page_indices):
+        # 다른 스레드의 pymupdf 작업과 겹치지 않도록 페이지 단위로 lock
+        with mupdf_lock:
+            img, zoom = renderPageImage(doc[page_idx], imgsz=imgsz, dpi=dpi)
+        yield page_idx + 1, img, zoom
+
+
+def iterExtractedPageImages(extractor, imgsz=DEFAULT_IMGSZ, dpi=DEFAULT_RENDER_DPI, page_indices=None):
+    """
+    DocumentExtractor로 페이지를 순서대로 렌더링하며 (page_num, img, 렌더링 배율)을 내보내는 generator.
+    텍스트 추출과 같은 문서 핸들을 쓰고, 텍스트 추출 때 해석해 둔 페이지 내용이 있으면 그대로 렌더링합니다.
+    page_indices가 주어지면 그 페이지만 렌더링합니다.
+    """
+    zoom_for_rect = lambda rect: renderZoom(rect, imgsz=imgsz, dpi=dpi)
+    for page_idx in (range(extractor.page_count) if page_indices is None else page_indices):
+        pix, zoom = extractor.renderPagePixmap(page_idx, zoom_for_rect)
+        yield page_idx + 1, pixmapToImage(pix), zoom
+
+
+def renderPagesIntoQueue(page_images, image_queue, stop_event):
+    """
+    producer: (page_num, img, 렌더링 배율)을 순서대로 image_queue에 넣는 함수.
+    큐가 가득 차면 consumer가 비울 때까지 대기하므로, 미리 렌더링되는 페이지 수는 큐 깊이로 제한됩니다.
+    모든 페이지를 넣으면 None을, 렌더링 중 예외가 나면 예외 객체를 넣고 종료합니다.
+
+    Args:
+        page_images: iterPageImages 또는 iterRasterizedPages가 반환한 generator
+    """
+    def put(item):
+        while not stop_event.is_set():
+            try:
+                image_queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    try:
+        for item in page_images:
+            if not put(item):
+                return
+        put(None)
+    except Exception as e:
+        put(e)
+    finally:
+        # 중간에 멈춘 경우 generator 정리 (공유 메모리 해제, worker 종료 등)
+        close = getattr(page_images, "close", None)
+        if close:
+            close()
+
+
+def detectObjectsInBatches(page_images, model, batch_size=DEFAULT_BATCH_SIZE, queue_depth=DEFAULT_QUEUE_DEPTH):
+    """
+    렌더링과 추론을 겹쳐서 수행하는 배치 탐지 함수.
+
+    producer 스레드가 page_images에서 페이지 이미지를 꺼내 크기 queue_depth의 큐에 넣고,
+    consumer(현재 스레드)는 batch_size장씩 모아 모델을 한 번에 호출합니다.
+    batch_size / queue_depth를 키우면 메모리를 더 쓰는 대신 처리량이 늘어납니다.
+
+    Args:
+        page_images: (page_num, img, 렌더링 배율)을 내보내는 iterable (iterPageImages, iterRasterizedPages, iterExtractedPageImages)
+
+    Returns:
+        list: detectObjectsFromFile과 같은 형식의 페이지별 탐지 결과
+    """
+    image_queue = Queue(maxsize=max(queue_depth, 1))
+    stop_event = Event()
+    producer = Thread(target=renderPagesIntoQueue, args=(page_images, image_queue, stop_event), daemon=True)
+    producer.start()
+
+    results = []
+    batch = []
+
+    def flushBatch():
+        if not batch:
+            return
+        batch_results = model([img for _, img, _ in batch], verbose=False)
+        for (page_num, _, zoom), r in zip(batch, batch_results):
+            results.append({
+                'page_num': page_num,
+                'objects': resultToObjects(r, zoom)
+            })
+        batch.clear()
+
+    try:
+        while True:
+            item = image_queue.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flushBatch()
+
+        flushBatch()
+    finally:
+        # consumer 쪽 예외로 빠져나온 경우에도 producer가 큐에서 막히지 않도록 종료 신호
+        stop_event.set()
+        producer.join()
+
+    return results
+
+
+def detectObjectsFromPages(file_path, model, page_indices=None, batch_size=DEFAULT_BATCH_SIZE, queue_depth=DEFAULT_QUEUE_DEPTH,
+                           render_workers=DEFAULT_RENDER_WORKERS, extractor=None, imgsz=None, dpi=DEFAULT_RENDER_DPI):
+    """
+    PDF 파일의 페이지들(page_indices, None이면 전체 페이지)을 렌더링해 객체 탐지를 수행하는 함수.
+
+    - render_workers가 1 이상이면 여러 프로세스가 페이지를 렌더링하고(iterRasterizedPages),
+      현재 프로세스는 공유 메모리로 받은 이미지를 배치로 추론합니다.
+    - extractor(DocumentExtractor)가 주어지면 파일을 다시 열지 않고 extractor의 문서에서 렌더링합니다.
+    - batch_size가 2 이상이면 렌더링과 추론을 겹치는 배치 모드(detectObjectsInBatches)로 동작합니다.
+    - 둘 다 기본값이면 페이지를 하나씩 렌더링/추론합니다.
+    - imgsz가 None이면 페이지 긴 변을 모델 입력 크기(modelInputSize)로 렌더링합니다.
+    """
+    imgsz = imgsz or modelInputSize(model)
+
+    if render_workers > 0:
+        page_images = iterRasterizedPages(file_path, imgsz=imgsz, dpi=dpi, workers=render_workers, page_indices=page_indices)
+        return detectObjectsInBatches(page_images, model, batch_size=batch_size, queue_depth=queue_depth)
+
+    if extractor is not None:
+        page_images = iterExtractedPageImages(extractor, imgsz=imgsz, dpi=dpi, page_indices=page_indices)
+        if batch_size > 1:
+            return detectObjectsInBatches(page_images, model, batch_size=batch_size, queue_depth=queue_depth)
+        return [
+            {'page_num': page_num, 'objects': detectObjectsInImage(img, model, zoom)}
+            for page_num, img, zoom in page_images
+        ]
     
-    # pymupdf로 PDF 열기
-    with pymupdf.open(file_path) as doc:
+    # pymupdf로 PDF 열기 (다른 단계와 동시에 실행될 수 있으므로 lock 사용)
+    with openPdfLocked(file_path) as doc:
+        if batch_size > 1:
+            page_images = iterPageImages(doc, imgsz=imgsz, dpi=dpi, page_indices=page_indices)
+            return detectObjectsInBatches(page_images, model, batch_size=batch_size, queue_depth=queue_depth)
+
         results = []
 
         # PDF 각 페이지 순회
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            objects = detectObjectFromPage(page, model)
+        for page_num in (range(len(doc)) if page_indices is None else page_indices):
+            with mupdf_lock:
+                page = doc[page_num]
+            objects = detectObjectFromPage(page, model, imgsz=imgsz, dpi=dpi)
             results.append({
                 'page_num': page_num + 1,  # 1부터 시작하는 페이지 번호
                 'objects': objects         # 탐지된 객체 배열
             })
 
     return results
+
+
+def detectObjectsFromFile(file_path, batch_size=DEFAULT_BATCH_SIZE, queue_depth=DEFAULT_QUEUE_DEPTH, render_workers=DEFAULT_RENDER_WORKERS,
+                          extractor=None, imgsz=None, dpi=DEFAULT_RENDER_DPI, use_cache=True, page_indices=None):
+    """
+    PDF 파일 페이지들(page_indices, None이면 전체 페이지)에서 객체 탐지를 수행하는 함수.
+
+    - 페이지 내용 + 모델 파일 + 렌더링 설정이 같은 페이지의 이전 탐지 결과가 캐시(detection_cache)에 있으면
+      그 페이지는 렌더링/추론 없이 캐시된 objects를 사용하고, 나머지 페이지만 detectObjectsFromPages로 탐지합니다.
+      캐시 키는 페이지를 탐지할 차례가 되었을 때 페이지마다 계산합니다. (iterUncachedPages)
+      (use_cache=False이거나 캐시가 비활성화되어 있으면 전체 페이지를 탐지)
+    - 페이지는 긴 변이 모델 입력 크기(imgsz, None이면 로드한 모델에서 읽은 값)가 되도록 렌더링하고,
+      탐지 결과는 페이지별 렌더링 배율로 PDF 좌표계로 되돌립니다. (dpi가 주어지면 고정 DPI로 렌더링)
+    - 모든 페이지가 캐시에 있으면 모델을 로드하지 않습니다.
+    """
+    # 프로세스 전역에서 한 번만 로드된 모델 사용
+    model = getDetectorService()
+    options = dict(batch_size=batch_size, queue_depth=queue_depth, render_workers=render_workers,
+                   extractor=extractor, imgsz=imgsz, dpi=dpi)
+
+    cache = getDetectionCache() if use_cache else None
+    model_hash = modelFingerprint() if cache is not None else None
+    if model_hash is None:
+        return detectObjectsFromPages(file_path, model, page_indices=page_indices, **options)
+
+    page_keys, cached = {}, {}
+    with (nullcontext(extractor.doc) if extractor is not None else openPdfLocked(file_path)) as doc:
+        if page_indices is None:
+            with mupdf_lock:
+                page_indices = range(len(doc))
+        # imgsz를 모델에서 읽는 경우 모델 파일 hash가 같으면 입력 크기도 같으므로, 키에는 모델을 따른다는 표시만 넣음
+        key_imgsz = imgsz if imgsz is not None else ["model", DEFAULT_IMGSZ]
+        uncached_pages = iterUncachedPages(doc, page_indices, cache, model_hash, key_imgsz, dpi, page_keys, cached, extractor=extractor)
+        # 캐시에 없는 페이지가 하나라도 있을 때만 모델을 로드해 탐지
+        first_uncached = next(uncached_pages, None)
+        detected = [] if first_uncached is None else \
+            detectObjectsFromPages(file_path, model, page_indices=chain([first_uncached], uncached_pages), **options)
+
+    cache.setMany({page_keys[item['page_num'] - 1]: item['objects'] for item in detected})
+
+    detected_objects = {item['page_num']: item['objects'] for item in detected}
+    return [
+        {
+            'page_num': page_idx + 1,
+            'objects': cached[page_idx] if page_idx in cached else detected_objects[page_idx + 1]
+        }
+        for page_idx in page_indices
+    ]
+
+
+def iterUncachedPages(doc, page_indices, cache, model_hash, imgsz, dpi, page_keys, cached, extractor=None):
+    """
+    page_indices 중 탐지 캐시에 없는 페이지 index를 차례로 내보내는 generator. (detectObjectsFromPages의 page_indices로 사용)
+    캐시 키는 탐지 단계가 페이지를 꺼내 갈 때 페이지마다 계산하므로, 전체 페이지를 미리 hash하느라 탐지 시작이 늦어지거나
+    다른 스레드가 mupdf_lock을 오래 기다리지 않습니다.
+    계산한 키는 page_keys에, 캐시된 objects는 cached에 {page_idx: 값}으로 모읍니다.
+    """
+    memo = {}
+    for page_idx in page_indices:
+        with mupdf_lock:
+            key = page_keys[page_idx] = pageCacheKey(doc, page_idx, model_hash, imgsz, dpi, memo)
+        objects = cache.get(key)
+        if objects is None:
+            yield page_idx
+            continue
+
+        cached[page_idx] = objects
+        if extractor is not None:
+            # 캐시된 페이지는 렌더링하지 않으므로, 렌더링을 기다리며 보관 중인 페이지 내용도 버림
+            extractor.skipPageRendering([page_idx])
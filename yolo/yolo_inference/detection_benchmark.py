@@ -0,0 +1,174 @@
+import time
+import pymupdf
+from yolo.yolo_inference.detection import renderPageImage, resultToObjects
+from yolo.yolo_inference.detector_service import getDetectorService, DetectorService, modelInputSize
+from yolo.yolo_inference.model_init import initModel, DETECTOR_BACKENDS
+from yolo.yolo_inference.rasterize import DEFAULT_IMGSZ
+from util.console_utils import print_header, print_info
+
+
+def bboxIoU(a, b):
+    """두 bbox [x0, y0, x1, y1]의 IoU"""
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def matchObjects(base_objects, objects, iou_threshold=0.5):
+    """
+    같은 class이면서 IoU가 iou_threshold 이상인 객체끼리 IoU가 큰 순서로 1:1 매칭.
+    반환 값: 매칭된 쌍들의 IoU 리스트
+    """
+    candidates = []
+    for i, base in enumerate(base_objects):
+        for j, obj in enumerate(objects):
+            if base["class_id"] != obj["class_id"]:
+                continue
+            iou = bboxIoU(base["bbox"], obj["bbox"])
+            if iou >= iou_threshold:
+                candidates.append((iou, i, j))
+
+    used_base, used_obj, ious = set(), set(), []
+    for iou, i, j in sorted(candidates, reverse=True):
+        if i in used_base or j in used_obj:
+            continue
+        used_base.add(i)
+        used_obj.add(j)
+        ious.append(iou)
+    return ious
+
+
+def benchmarkRenderResolution(file_path, imgsz=None, baseline_dpi=150, model=None, run_inference=True):
+    """
+    YOLO 입력을 고정 DPI(이전 방식)로 렌더링할 때와, 페이지 긴 변을 모델 입력 크기(imgsz)에 맞춰 렌더링할 때를 비교하는 함수.
+
+    방식별로 페이지당 렌더링 시간, 이미지 크기(픽셀 수), 페이지당 추론 시간을 측정하고,
+    고정 DPI 결과를 기준으로 imgsz 결과의 탐지 객체가 얼마나 일치하는지(같은 class, IoU 0.5 이상) 비교합니다.
+
+    Args:
+        file_path (str): PDF 파일 경로
+        imgsz (int): 모델 입력 크기 (None이면 모델에서 읽은 값, 렌더링만 비교하면 YOLO_IMGSZ)
+        baseline_dpi (int): 비교 기준으로 사용할 고정 DPI
+        model: 추론에 사용할 모델 (None이면 getDetectorService())
+        run_inference (bool): False이면 렌더링만 비교
+    """
+    if run_inference and model is None:
+        model = getDetectorService()
+        model.load()  # 모델 로드/warm-up 시간이 첫 페이지 추론 시간에 섞이지 않도록 미리 로드
+    imgsz = imgsz or (modelInputSize(model) if model is not None else DEFAULT_IMGSZ)
+
+    modes = {
+        f"dpi{baseline_dpi}": {"imgsz": imgsz, "dpi": baseline_dpi},
+        f"imgsz{imgsz}": {"imgsz": imgsz, "dpi": 0},
+    }
+    results = {}
+    page_objects = {}
+
+    with pymupdf.open(file_path) as doc:
+        for mode, options in modes.items():
+            render_time = inference_time = 0.0
+            pixels = 0
+            page_objects[mode] = []
+
+            for page in doc:
+                start = time.perf_counter()
+                img, zoom = renderPageImage(page, **options)
+                render_time += time.perf_counter() - start
+                pixels += img.shape[0] * img.shape[1]
+
+                if run_inference:
+                    start = time.perf_counter()
+                    detections = model(img, verbose=False)
+                    inference_time += time.perf_counter() - start
+                    page_objects[mode].append([obj for r in detections for obj in resultToObjects(r, zoom)])
+
+            page_count = max(len(doc), 1)
+            results[mode] = {
+                "avg_render_time": round(render_time / page_count, 4),
+                "avg_megapixels": round(pixels / page_count / 1e6, 3),
+                "avg_inference_time": round(inference_time / page_count, 4) if run_inference else None,
+            }
+
+    if run_inference:
+        base_mode, mode = list(modes)
+        base_count = sum(len(objects) for objects in page_objects[base_mode])
+        ious = []
+        for base_objects, objects in zip(page_objects[base_mode], page_objects[mode]):
+            ious.extend(matchObjects(base_objects, objects))
+
+        results[mode]["objects"] = sum(len(objects) for objects in page_objects[mode])
+        results[base_mode]["objects"] = base_count
+        results[mode]["matched_ratio"] = round(len(ious) / base_count, 4) if base_count else 1.0
+        results[mode]["mean_matched_iou"] = round(sum(ious) / len(ious), 4) if ious else None
+
+    print_header("🖼 YOLO 입력 렌더링 해상도 비교")
+    for mode, result in results.items():
+        print_info(f"{mode}: {result}")
+
+    return results
+
+
+def compareDetectorBackends(pdf_paths, backends=DETECTOR_BACKENDS, imgsz=DEFAULT_IMGSZ):
+    """
+    탐지 backend(ultralytics / onnx / onnx-int8)별 정확도와 지연 시간을 샘플 문서들로 비교하는 함수.
+
+    페이지를 한 번만 렌더링해 모든 backend에 같은 이미지를 넣고,
+    backend별로 모델 로드/warm-up 시간, 페이지당 추론 시간(평균, p95), 탐지 객체 수를 측정합니다.
+    첫 번째 backend의 결과를 기준으로 나머지 backend의 탐지 객체가 얼마나 일치하는지(같은 class, IoU 0.5 이상) 비교합니다.
+
+    Args:
+        pdf_paths (list[str]): 비교에 사용할 PDF 파일 경로들
+        backends (tuple[str]): 비교할 backend 이름들 (첫 번째가 기준)
+        imgsz (int): 모델 입력 크기
+    """
+    pages = []  # (img, 렌더링 배율)
+    for file_path in pdf_paths:
+        with pymupdf.open(file_path) as doc:
+            for page in doc:
+                pages.append(renderPageImage(page, imgsz=imgsz, dpi=0))
+
+    results = {}
+    page_objects = {}
+
+    for backend in backends:
+        service = DetectorService(model_loader=lambda backend=backend: initModel(backend))
+        service.load()
+
+        page_times = []
+        page_objects[backend] = []
+        for img, zoom in pages:
+            start = time.perf_counter()
+            detections = service(img)
+            page_times.append(time.perf_counter() - start)
+            page_objects[backend].append([obj for r in detections for obj in resultToObjects(r, zoom)])
+
+        page_times.sort()
+        page_count = max(len(page_times), 1)
+        stats = service.getStats()
+        results[backend] = {
+            "load_time": stats["load_time"],
+            "warmup_time": stats["warmup_time"],
+            "avg_inference_time": round(sum(page_times) / page_count, 4),
+            "p95_inference_time": round(page_times[int(0.95 * (len(page_times) - 1))], 4) if page_times else 0.0,
+            "objects": sum(len(objects) for objects in page_objects[backend]),
+        }
+
+    base_backend = backends[0]
+    base_count = results[base_backend]["objects"]
+    for backend in backends[1:]:
+        ious = []
+        for base_objects, objects in zip(page_objects[base_backend], page_objects[backend]):
+            ious.extend(matchObjects(base_objects, objects))
+
+        object_count = results[backend]["objects"]
+        results[backend]["matched_ratio"] = round(len(ious) / base_count, 4) if base_count else 1.0  # 기준 객체 중 찾은 비율
+        results[backend]["precision"] = round(len(ious) / object_count, 4) if object_count else 1.0  # 탐지 객체 중 기준과 일치한 비율
+        results[backend]["mean_matched_iou"] = round(sum(ious) / len(ious), 4) if ious else None
+
+    print_header(f"⚙️ YOLO 탐지 backend 비교 ({len(pages)}페이지, 기준: {base_backend})")
+    for backend, result in results.items():
+        print_info(f"{backend}: {result}")
+
+    return results
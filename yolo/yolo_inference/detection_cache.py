@@ -0,0 +1,159 @@
+import os
+import re
+import hashlib
+from threading import Lock
+from yolo.yolo_inference.model_init import DETECTOR_BACKEND, modelPath
+from util.kv_cache import getKVCache, hashKey
+
+'''
+페이지별 YOLO 탐지 결과를 디스크에 캐시하는 모듈.
+
+탐지 결과는 같은 페이지를 같은 모델/설정으로 렌더링하면 항상 같으므로,
+페이지 내용(content stream, 참조하는 resource/annotation 객체, 페이지 크기/회전), 모델 파일 hash, backend, 렌더링 설정(imgsz, dpi)으로 키를 만듭니다.
+같은 문서를 다시 처리하거나 일부 페이지만 수정된 문서를 처리할 때, 바뀌지 않은 페이지는 렌더링/추론 없이 objects를 재사용합니다.
+
+객체를 참조하는 부분은 xref 번호 대신 참조한 객체 내용의 hash로 바꿔서 계산하므로,
+다시 저장하면서 xref 번호가 바뀐 문서에서도 내용이 같은 페이지는 같은 키가 나옵니다.
+'''
+
+DETECTION_CACHE_MAX_ENTRIES = int(os.environ.get("YOLO_DETECTION_CACHE_MAX_ENTRIES", 200000))  # 탐지 캐시 최대 항목 수
+
+# 렌더링 결과에 영향이 없는 key (다른 페이지/구조 트리로 이어지는 참조라 따라가면 관계없는 수정에도 키가 바뀜)
+SKIPPED_KEYS = {"Parent", "P", "Dest", "A", "PA", "IRT", "Popup", "StructParent", "StructParents", "M"}
+# stream 객체는 압축을 푼 내용으로 hash하므로, 인코딩 방식에 따라 달라지는 stream dict key도 제외
+STREAM_SKIPPED_KEYS = SKIPPED_KEYS | {"Length", "Filter", "DecodeParms", "DL"}
+REF_PATTERN = re.compile(r"(\d+)\s+\d+\s+R")
+# PDF 값 토큰: dict/배열 괄호, 문자열, hex 문자열, 객체 참조, 이름, 그 밖의 값(숫자, true/false/null)
+TOKEN_PATTERN = re.compile(r"<<|>>|\[|\]|\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>|\d+\s+\d+\s+R\b|/[^\s/\[\]<>()]*|[^\s/\[\]<>()]+")
+
+_model_hashes = {}  # 모델 파일 경로 -> (파일 크기, 수정 시각, hash)
+_model_hashes_lock = Lock()
+
+
+def getDetectionCache():
+    """페이지별 탐지 결과 캐시 반환 (캐시가 비활성화되어 있으면 None)"""
+    return getKVCache("yolo_detections", max_entries=DETECTION_CACHE_MAX_ENTRIES)
+
+
+def modelFingerprint(backend=None):
+    """
+    backend가 로드하는 모델 파일의 sha256 (파일이 없으면 None).
+    파일 크기와 수정 시각이 그대로면 이전에 계산한 값을 재사용합니다.
+    """
+    path = modelPath(backend)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    with _model_hashes_lock:
+        cached = _model_hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        _model_hashes[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+
+def parsePdfValue(tokens, pos, doc, memo, skipped_keys=SKIPPED_KEYS):
+    """
+    (mupdf_lock 안에서 호출) tokens[pos]부터 PDF 값 하나를 읽어 (정규화한 값, 다음 위치) 반환.
+    dict는 key 순서와 무관하도록 정렬하고(skipped_keys 제외, 안쪽 dict는 SKIPPED_KEYS 제외), 객체 참조는 참조한 객체의 hash로 바꿉니다.
+    """
+    token = tokens[pos]
+    if token == "<<":
+        entries = {}
+        pos += 1
+        while pos < len(tokens) and tokens[pos] != ">>":
+            key = tokens[pos]
+            value, pos = parsePdfValue(tokens, pos + 1, doc, memo)
+            if key[1:] not in skipped_keys:
+                entries[key] = value
+        return {"dict": sorted(entries.items())}, pos + 1
+    if token == "[":
+        items = []
+        pos += 1
+        while pos < len(tokens) and tokens[pos] != "]":
+            item, pos = parsePdfValue(tokens, pos, doc, memo)
+            items.append(item)
+        return items, pos + 1
+
+    ref = REF_PATTERN.fullmatch(token)
+    if ref:
+        return {"ref": objectDigest(doc, int(ref.group(1)), memo)}, pos + 1
+    return token, pos + 1
+
+
+def valueDigest(doc, value, memo, skipped_keys=SKIPPED_KEYS):
+    """(mupdf_lock 안에서 호출) xref_object/xref_get_key로 읽은 PDF 값 문자열을 xref 번호, dict key 순서와 무관한 값으로 변환"""
+    tokens = TOKEN_PATTERN.findall(value)
+    if not tokens:
+        return value
+    return parsePdfValue(tokens, 0, doc, memo, skipped_keys)[0]
+
+
+def objectDigest(doc, xref, memo):
+    """
+    (mupdf_lock 안에서 호출) xref 객체와 그 객체가 참조하는 객체들 전체의 내용 hash.
+    memo는 문서 하나에서 공유해, 여러 페이지가 함께 쓰는 폰트/이미지는 한 번만 계산합니다.
+    """
+    digest = memo.get(xref)
+    if digest is not None:
+        return digest
+    if not 0 < xref < doc.xref_length():
+        return "missing"  # 존재하지 않는 객체를 가리키는 참조
+    memo[xref] = "cycle"  # 순환 참조 방지
+
+    if not doc.xref_is_stream(xref):
+        parts = [valueDigest(doc, doc.xref_object(xref, compressed=True), memo)]
+    else:
+        # 압축을 푼 내용으로 계산 (다시 저장하면서 압축 방식/수준만 바뀐 stream도 같은 hash)
+        parts = [
+            valueDigest(doc, doc.xref_object(xref, compressed=True), memo, STREAM_SKIPPED_KEYS),
+            hashlib.sha256(doc.xref_stream(xref)).hexdigest(),
+        ]
+
+    digest = memo[xref] = hashKey(*parts)
+    return digest
+
+
+def inheritedKey(doc, xref, key):
+    """(mupdf_lock 안에서 호출) 페이지 객체의 key 값. 없으면 상위 Pages 노드에서 상속한 값 (없으면 ("null", "null"))"""
+    while True:
+        value_type, value = doc.xref_get_key(xref, key)
+        if value_type != "null":
+            return value_type, value
+
+        parent_type, parent = doc.xref_get_key(xref, "Parent")
+        if parent_type != "xref":
+            return value_type, value
+        xref = int(parent.split()[0])
+
+
+def pageDigest(doc, page, memo):
+    """(mupdf_lock 안에서 호출) 페이지 렌더링 결과를 결정하는 내용의 hash"""
+    return hashKey(
+        "page",
+        list(page.rect),
+        page.rotation,
+        [objectDigest(doc, xref, memo) for xref in page.get_contents()],
+        valueDigest(doc, inheritedKey(doc, page.xref, "Resources")[1], memo),
+        valueDigest(doc, doc.xref_get_key(page.xref, "Annots")[1], memo),
+    )
+
+
+def pageCacheKey(doc, page_idx, model_hash, imgsz, dpi, memo, backend=None):
+    """(mupdf_lock 안에서 호출) 페이지 하나의 탐지 캐시 키. memo는 같은 문서의 페이지끼리 공유합니다. (objectDigest 참고)"""
+    backend = backend or DETECTOR_BACKEND
+    return hashKey("yolo", backend, model_hash, imgsz, dpi, pageDigest(doc, doc[page_idx], memo))
+
+
+def getDetectionCacheStats():
+    """탐지 캐시 hit/miss 통계 반환 (캐시가 비활성화되어 있으면 None)"""
+    cache = getDetectionCache()
+    return cache.getStats() if cache is not None else None
@@ -0,0 +1,150 @@
+from threading import Lock
+import os
+import time
+import numpy as np
+from yolo.yolo_inference.model_init import initModel
+from yolo.yolo_inference.rasterize import DEFAULT_IMGSZ
+from util.console_utils import print_warning
+
+LETTER_ASPECT = 612 / 792  # warm-up 이미지 비율 (Letter 페이지 가로 / 세로)
+
+
+def modelInputSize(model):
+    """
+    모델 입력 크기(imgsz). 페이지를 이 크기로 렌더링해야 모델 안에서 이미지를 다시 줄이거나 늘리지 않습니다.
+    - DetectorService: 로드한 모델의 입력 크기 (아직 로드하지 않았으면 로드)
+    - OnnxDetector: ONNX 입력 shape (model.imgsz)
+    - ultralytics YOLO: 학습/export 때의 설정 (model.overrides["imgsz"])
+    알 수 없으면 YOLO_IMGSZ(기본 640)을 사용합니다.
+    """
+    if isinstance(model, DetectorService):
+        return model.getImgsz()
+
+    imgsz = getattr(model, "imgsz", None)
+    if imgsz is None:
+        imgsz = (getattr(model, "overrides", None) or {}).get("imgsz")
+    if isinstance(imgsz, (list, tuple)):
+        imgsz = max(imgsz)
+    return int(imgsz) if imgsz else DEFAULT_IMGSZ
+
+
+class DetectorService:
+    """
+    프로세스 전역에서 YOLO 모델을 한 번만 로드해 공유하는 탐지 서비스.
+
+    - 최초 사용 시 best.pt를 로드하고, 빈 페이지 이미지로 warm-up 추론을 수행합니다.
+    - 로드한 모델의 입력 크기(imgsz)를 기록해 두고, 페이지 렌더링 크기로 사용합니다. (getImgsz)
+    - 모델 호출은 lock으로 보호되므로 여러 스레드(FastAPI 요청, 번역 파이프라인)에서 공유할 수 있습니다.
+    - 모델 로드 시간, warm-up 시간, 페이지당 추론 시간을 기록합니다.
+
+    model(img)와 같은 방식으로 호출할 수 있어, 기존 detectObjectFromPage(page, model)에
+    그대로 model 대신 넘길 수 있습니다.
+    """
+
+    def __init__(self, model_loader=initModel, warmup_shape=None):
+        self.model_loader = model_loader
+        self.warmup_shape = warmup_shape  # (H, W, C), None이면 Letter 페이지를 긴 변 imgsz로 렌더링한 크기
+        self.model = None
+        self.imgsz = None  # 로드한 모델의 입력 크기
+
+        self._load_lock = Lock()
+        self._inference_lock = Lock()
+
+        self.load_time = 0.0
+        self.warmup_time = 0.0
+        self.inference_count = 0  # model 호출 횟수
+        self.inference_pages = 0  # 추론한 페이지(이미지) 수
+        self.inference_time = 0.0  # 누적 추론 시간
+        self.last_inference_time = 0.0  # 마지막 호출의 페이지당 추론 시간
+
+    def isLoaded(self):
+        return self.model is not None
+
+    def load(self):
+        """모델을 아직 로드하지 않았다면 로드 + warm-up 후 모델 반환"""
+        if self.model is not None:
+            return self.model
+
+        with self._load_lock:
+            if self.model is not None:
+                return self.model
+
+            start = time.perf_counter()
+            model = self.model_loader()
+            self.load_time = time.perf_counter() - start
+
+            imgsz = modelInputSize(model)
+            if "YOLO_IMGSZ" in os.environ and imgsz != DEFAULT_IMGSZ:
+                print_warning(f"YOLO_IMGSZ={DEFAULT_IMGSZ} 대신 모델 입력 크기 {imgsz}로 페이지를 렌더링합니다.")
+
+            # 첫 추론에서 발생하는 초기화 비용을 미리 지불
+            start = time.perf_counter()
+            warmup_shape = self.warmup_shape or (imgsz, round(imgsz * LETTER_ASPECT), 3)
+            dummy_page = np.full(warmup_shape, 255, dtype=np.uint8)
+            model(dummy_page, verbose=False)
+            self.warmup_time = time.perf_counter() - start
+
+            self.imgsz = imgsz
+            self.model = model
+
+        return self.model
+
+    def getImgsz(self):
+        """로드한 모델의 입력 크기 (아직 로드하지 않았다면 로드)"""
+        self.load()
+        return self.imgsz
+
+    def __call__(self, images, **kwargs):
+        """
+        로드된 모델로 추론을 수행합니다.
+
+        Args:
+            images: 단일 이미지(np.ndarray) 또는 이미지 리스트
+            **kwargs: 모델 호출 시 그대로 전달할 인자 (기본 verbose=False)
+        """
+        model = self.load()
+        kwargs.setdefault("verbose", False)
+        page_count = len(images) if isinstance(images, list) else 1
+
+        with self._inference_lock:
+            start = time.perf_counter()
+            results = model(images, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            self.inference_count += 1
+            self.inference_pages += page_count
+            self.inference_time += elapsed
+            self.last_inference_time = elapsed / max(page_count, 1)
+
+        return results
+
+    def getStats(self):
+        """로드 시간 및 추론 시간 통계 반환"""
+        with self._inference_lock:
+            avg_page_time = self.inference_time / self.inference_pages if self.inference_pages else 0.0
+            return {
+                "loaded": self.isLoaded(),
+                "imgsz": self.imgsz,
+                "load_time": round(self.load_time, 4),
+                "warmup_time": round(self.warmup_time, 4),
+                "inference_count": self.inference_count,
+                "inference_pages": self.inference_pages,
+                "inference_time": round(self.inference_time, 4),
+                "avg_page_inference_time": round(avg_page_time, 4),
+                "last_page_inference_time": round(self.last_inference_time, 4),
+            }
+
+
+_detector_service = None
+_detector_service_lock = Lock()
+
+
+def getDetectorService():
+    """프로세스 전역 DetectorService 인스턴스 반환 (없으면 생성)"""
+    global _detector_service
+
+    with _detector_service_lock:
+        if _detector_service is None:
+            _detector_service = DetectorService()
+
+    return _detector_service
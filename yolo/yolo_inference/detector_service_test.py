@@ -0,0 +1,57 @@
+import pymupdf
+import pytest
+from yolo.yolo_inference.detector_service import DetectorService, modelInputSize
+from yolo.yolo_inference.detection import detectObjectsFromPages
+from yolo.yolo_inference.rasterize import DEFAULT_IMGSZ
+
+
+class FakeYolo:
+    """ultralytics YOLO처럼 overrides에 학습 설정을 가진 모델. 받은 이미지 shape를 기록"""
+    def __init__(self, imgsz):
+        self.overrides = {"imgsz": imgsz, "task": "detect"}
+        self.shapes = []
+
+    def __call__(self, images, verbose=False, **kwargs):
+        images = images if isinstance(images, list) else [images]
+        self.shapes.extend(img.shape for img in images)
+        return []
+
+
+class FakeOnnx:
+    def __init__(self, imgsz):
+        self.imgsz = imgsz
+
+
+@pytest.mark.parametrize("model, expected", [
+    (FakeYolo(1024), 1024),
+    (FakeYolo([800, 1280]), 1280),
+    (FakeOnnx(960), 960),
+    (object(), DEFAULT_IMGSZ),
+])
+def test_model_input_size(model, expected):
+    assert modelInputSize(model) == expected
+
+
+def test_service_reads_imgsz_from_loaded_model():
+    model = FakeYolo(1024)
+    service = DetectorService(model_loader=lambda: model)
+
+    assert service.getImgsz() == 1024
+    assert modelInputSize(service) == 1024
+    # warm-up도 모델 입력 크기로 렌더링한 Letter 페이지 크기로 수행
+    assert model.shapes == [(1024, 791, 3)]
+
+
+@pytest.mark.parametrize("render_workers", [0, 1])
+def test_pages_are_rendered_at_model_input_size(tmp_path, render_workers):
+    pdf_path = str(tmp_path / "pages.pdf")
+    with pymupdf.open() as doc:
+        doc.new_page(width=612, height=792)
+        doc.new_page(width=842, height=595)
+        doc.save(pdf_path)
+
+    model = FakeYolo(1024)
+    service = DetectorService(model_loader=lambda: model)
+    detectObjectsFromPages(pdf_path, service, render_workers=render_workers)
+
+    assert [max(shape[:2]) for shape in model.shapes[1:]] == [1024, 1024]
@@ -1,8 +1,34 @@
 # 모델 로드
-from ultralytics import YOLO
 import os
 
-def initModel():
-  model_path = os.path.join(os.path.dirname(__file__), 'model', 'best.pt')
-  model = YOLO(model_path)
-  return model
\ No newline at end of file
+MODEL_DIR = os.path.join(os.path.dirname(__file__), 'model')
+PT_MODEL_PATH = os.path.join(MODEL_DIR, 'best.pt')
+ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'best.onnx')  # onnx_export.exportOnnxModel로 생성
+ONNX_INT8_MODEL_PATH = os.path.join(MODEL_DIR, 'best.int8.onnx')  # onnx_export.quantizeOnnxModel로 생성
+
+# 탐지 backend: "ultralytics"(best.pt) / "onnx"(onnxruntime CPU) / "onnx-int8"(int8 양자화 모델)
+DETECTOR_BACKEND = os.environ.get("YOLO_BACKEND", "ultralytics")
+DETECTOR_BACKENDS = ("ultralytics", "onnx", "onnx-int8")
+
+def modelPath(backend=None):
+  """backend(None이면 YOLO_BACKEND 환경변수)가 로드하는 모델 파일 경로"""
+  backend = backend or DETECTOR_BACKEND
+  paths = {"ultralytics": PT_MODEL_PATH, "onnx": ONNX_MODEL_PATH, "onnx-int8": ONNX_INT8_MODEL_PATH}
+  if backend not in paths:
+    raise ValueError(f"지원하지 않는 YOLO backend: {backend} (가능한 값: {', '.join(DETECTOR_BACKENDS)})")
+  return paths[backend]
+
+def initModel(backend=None):
+  """
+  backend(None이면 YOLO_BACKEND 환경변수)에 맞는 탐지 모델 로드.
+  각 backend의 라이브러리는 여기서 import하므로, onnx backend를 쓰면 ultralytics/torch를 불러오지 않습니다.
+  """
+  backend = backend or DETECTOR_BACKEND
+  model_path = modelPath(backend)
+
+  if backend == "ultralytics":
+    from ultralytics import YOLO
+    return YOLO(model_path)
+
+  from yolo.yolo_inference.onnx_backend import OnnxDetector
+  return OnnxDetector(model_path)
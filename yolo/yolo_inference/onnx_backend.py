@@ -0,0 +1,192 @@
+import os
+import numpy as np
+from yolo.yolo_inference.detection import CATEGORY_ID_TO_NAME
+from yolo.yolo_inference.rasterize import DEFAULT_IMGSZ
+
+'''
+ultralytics/torch 없이 onnxruntime(CPU)으로 레이아웃 모델을 실행하는 탐지 backend.
+
+best.pt를 ONNX로 export한 모델(onnx_export.exportOnnxModel)을 사용하며,
+ultralytics가 하던 전처리(letterbox)와 후처리(confidence 필터, class별 NMS, 좌표 복원)를 직접 수행합니다.
+전처리/후처리 함수는 numpy(와 opencv)만 사용하고, onnxruntime은 OnnxDetector를 만들 때 import합니다.
+결과는 ultralytics Results와 같은 모양(result.boxes의 cls/conf/xyxy)으로 돌려주므로 resultToObjects를 그대로 사용할 수 있습니다.
+'''
+
+# ultralytics predict 기본값과 같은 후처리 설정
+DEFAULT_CONF_THRESHOLD = 0.25
+DEFAULT_IOU_THRESHOLD = 0.7
+DEFAULT_MAX_DET = 300
+LETTERBOX_COLOR = 114  # ultralytics LetterBox의 padding 색
+ONNX_THREADS = int(os.environ.get("YOLO_ONNX_THREADS", 0))  # onnxruntime intra-op 스레드 수 (0이면 onnxruntime 기본값)
+
+
+class OnnxBoxes:
+    """ultralytics Boxes처럼 순회하면 cls/conf/xyxy를 가진 box를 하나씩 내보내는 객체"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy  # (N, 4) 원본 이미지 픽셀 좌표
+        self.conf = conf  # (N,)
+        self.cls = cls  # (N,)
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __iter__(self):
+        for i in range(len(self.conf)):
+            yield OnnxBoxes(self.xyxy[i:i + 1], self.conf[i:i + 1], self.cls[i:i + 1])
+
+
+class OnnxResult:
+    """이미지 한 장의 탐지 결과 (ultralytics Results 중 boxes만 제공)"""
+
+    def __init__(self, boxes, orig_shape):
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+
+
+def resizeImage(img, width, height):
+    """이미지(np.ndarray, H x W x 3)를 width x height로 크기 조절 (ultralytics LetterBox와 같은 cv2 선형 보간)"""
+    import cv2
+
+    return cv2.resize(np.ascontiguousarray(img), (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def letterboxImage(img, size):
+    """
+    ultralytics LetterBox(auto=False)와 같은 방식으로 비율을 유지한 채 size x size에 맞추고 남는 곳은 회색으로 채움.
+    반환 값: (letterbox 이미지, 배율, (왼쪽 padding, 위쪽 padding))
+    """
+    height, width = img.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+
+    if (new_width, new_height) != (width, height):
+        img = resizeImage(img, new_width, new_height)
+
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+
+    canvas = np.full((size, size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    canvas[top:top + new_height, left:left + new_width] = img[:, :, :3]
+    return canvas, ratio, (left, top)
+
+
+def imageToInput(img, size):
+    """
+    이미지 한 장을 모델 입력(1 x 3 x size x size, 0~1 float32)으로 변환.
+    ultralytics는 numpy 이미지를 BGR로 보고 채널을 뒤집어 모델에 넣으므로, 같은 입력이 되도록 채널 순서를 똑같이 뒤집습니다.
+    """
+    canvas, ratio, pad = letterboxImage(img, size)
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255.0
+    return tensor, ratio, pad
+
+
+def nonMaxSuppression(boxes, scores, iou_threshold):
+    """xyxy boxes에 대한 greedy NMS. 남길 index 배열 반환 (score 내림차순)"""
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        x0 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y0 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x1 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y1 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-9)
+
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+def decodePredictions(prediction, ratio, pad, orig_shape, conf_threshold, iou_threshold, max_det):
+    """
+    YOLOv8 출력 한 장분((4 + 클래스 수) x anchor 수: cx, cy, w, h, 클래스별 점수)을 원본 이미지 좌표의 탐지 결과로 변환.
+    ultralytics와 같이 class별로 NMS를 수행합니다. (class마다 좌표를 큰 값만큼 떨어뜨려 한 번에 NMS)
+    """
+    prediction = prediction.T  # (anchor 수, 4 + 클래스 수)
+    class_scores = prediction[:, 4:]
+    cls = class_scores.argmax(axis=1)
+    conf = class_scores[np.arange(len(cls)), cls]
+
+    mask = conf > conf_threshold
+    prediction, cls, conf = prediction[mask], cls[mask], conf[mask]
+
+    cx, cy, w, h = prediction[:, 0], prediction[:, 1], prediction[:, 2], prediction[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    if len(boxes):
+        offset_boxes = boxes + (cls * 7680)[:, np.newaxis]  # class별 NMS를 위한 좌표 이동 (ultralytics max_wh와 같은 값)
+        keep = nonMaxSuppression(offset_boxes, conf, iou_threshold)[:max_det]
+        boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+    # letterbox 좌표 → 원본 이미지 좌표
+    left, top = pad
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - left) / ratio).clip(0, orig_shape[1])
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - top) / ratio).clip(0, orig_shape[0])
+
+    return OnnxResult(OnnxBoxes(boxes, conf, cls), orig_shape)
+
+
+class OnnxDetector:
+    """
+    onnxruntime CPU 세션으로 YOLO 레이아웃 모델을 실행하는 탐지기.
+    model(images, verbose=False)처럼 ultralytics YOLO와 같은 방식으로 호출할 수 있어 DetectorService에 그대로 넣을 수 있습니다.
+
+    Args:
+        model_path (str): ONNX 모델 경로 (int8 양자화 모델도 가능)
+        conf_threshold (float): 이 값 이하의 confidence는 버림
+        iou_threshold (float): class별 NMS IoU 기준
+        max_det (int): 이미지당 최대 탐지 수
+        threads (int): intra-op 스레드 수 (0이면 onnxruntime 기본값)
+    """
+
+    def __init__(self, model_path, conf_threshold=DEFAULT_CONF_THRESHOLD, iou_threshold=DEFAULT_IOU_THRESHOLD,
+                 max_det=DEFAULT_MAX_DET, threads=ONNX_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.model_path = model_path
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        _, _, height, width = model_input.shape
+        # 고정 크기로 export된 모델은 입력 크기를 그대로 쓰고, dynamic 모델이면 기본 imgsz 사용
+        self.imgsz = height if isinstance(height, int) else DEFAULT_IMGSZ
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+
+        class_count = self.session.get_outputs()[0].shape[1]
+        if isinstance(class_count, int) and class_count - 4 != len(CATEGORY_ID_TO_NAME):
+            raise ValueError(f"ONNX 모델의 클래스 수({class_count - 4})가 CATEGORY_ID_TO_NAME({len(CATEGORY_ID_TO_NAME)})과 다릅니다: {model_path}")
+
+    def __call__(self, images, verbose=False, **kwargs):
+        """단일 이미지 또는 이미지 리스트를 받아 이미지별 OnnxResult 리스트 반환"""
+        if not isinstance(images, list):
+            images = [images]
+
+        inputs = [imageToInput(img, self.imgsz) for img in images]
+
+        # 배치 크기가 고정(보통 1)된 모델이면 한 장씩, 아니면 한 번에 실행
+        if self.fixed_batch == 1 or len(inputs) == 1:
+            predictions = [self.session.run(None, {self.input_name: tensor})[0][0] for tensor, _, _ in inputs]
+        else:
+            batch = np.concatenate([tensor for tensor, _, _ in inputs])
+            predictions = list(self.session.run(None, {self.input_name: batch})[0])
+
+        return [
+            decodePredictions(prediction, ratio, pad, img.shape[:2], self.conf_threshold, self.iou_threshold, self.max_det)
+            for prediction, (_, ratio, pad), img in zip(predictions, inputs, images)
+        ]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from yolo.yolo_inference.detection import CATEGORY_ID_TO_NAME
+from yolo.yolo_inference.onnx_backend import LETTERBOX_COLOR, decodePredictions, letterboxImage, nonMaxSuppression
+
+CLASS_COUNT = len(CATEGORY_ID_TO_NAME)
+
+
+def makePrediction(boxes, scores, classes):
+    """xyxy box, 점수, 클래스로 YOLOv8 출력 한 장분((4 + 클래스 수) x anchor 수) 생성"""
+    prediction = np.zeros((4 + CLASS_COUNT, len(boxes)), dtype=np.float32)
+    for anchor, ((x0, y0, x1, y1), score, cls) in enumerate(zip(boxes, scores, classes)):
+        prediction[:4, anchor] = [(x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0]
+        prediction[4 + cls, anchor] = score
+    return prediction
+
+
+def test_non_max_suppression_keeps_known_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30], [0, 0, 10, 10.5]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.95], dtype=np.float32)
+
+    # box 3과의 IoU: box 0은 100/105, box 1은 85.5/119.5(약 0.716), box 2는 0
+    assert nonMaxSuppression(boxes, scores, 0.5).tolist() == [3, 2]
+    assert nonMaxSuppression(boxes, scores, 0.75).tolist() == [3, 1, 2]
+    assert nonMaxSuppression(boxes[:0], scores[:0], 0.5).tolist() == []
+
+
+def test_decode_predictions_applies_threshold_and_per_class_nms():
+    boxes = [[0, 0, 10, 10], [0.5, 0.5, 10.5, 10.5], [1, 1, 11, 11], [40, 40, 50, 50]]
+    prediction = makePrediction(boxes, [0.9, 0.8, 0.85, 0.2], [9, 9, 2, 9])
+
+    result = decodePredictions(prediction, 1.0, (0, 0), (64, 64), conf_threshold=0.25, iou_threshold=0.7, max_det=300)
+
+    # 같은 클래스(9)의 겹치는 box(IoU 약 0.82)는 하나만 남고, 다른 클래스(2)의 box는 남으며, 0.25 이하 점수는 버림
+    assert result.boxes.cls.tolist() == [9, 2]
+    assert result.boxes.conf.tolist() == pytest.approx([0.9, 0.85])
+    np.testing.assert_allclose(result.boxes.xyxy, [[0, 0, 10, 10], [1, 1, 11, 11]])
+
+
+def test_letterbox_pads_known_region():
+    """100 x 200 이미지를 64로 맞추면 배율 0.32, 64 x 32로 줄여 위아래로 16픽셀씩 채움"""
+    pytest.importorskip("cv2")
+    img = np.full((100, 200, 3), 30, dtype=np.uint8)
+
+    canvas, ratio, pad = letterboxImage(img, 64)
+
+    assert canvas.shape == (64, 64, 3)
+    assert ratio == pytest.approx(0.32)
+    assert pad == (0, 16)
+    assert (canvas[16:48] == 30).all()
+    assert (canvas[:16] == LETTERBOX_COLOR).all() and (canvas[48:] == LETTERBOX_COLOR).all()
+
+
+def test_letterbox_coordinates_map_back_to_original_image():
+    """letterbox 좌표로 나온 box가 원본 이미지 좌표로 되돌아가는지 (이미지 밖으로 나간 부분은 잘림)"""
+    pytest.importorskip("cv2")
+    img = np.full((100, 200, 3), 255, dtype=np.uint8)
+    img[20:60, 50:150] = 0  # 원본 좌표 (50, 20) - (150, 60)의 검은 사각형
+
+    canvas, ratio, pad = letterboxImage(img, 64)
+    rows, cols = np.nonzero(canvas[:, :, 0] < 60)
+    letterbox_box = [cols.min(), rows.min(), cols.max() + 1, rows.max() + 1]
+    assert letterbox_box == [16, 22, 48, 35]  # (50 * 0.32, 20 * 0.32 + 16) - (150 * 0.32, 60 * 0.32 + 16)을 픽셀로 반올림
+
+    exact_box = [50 * ratio + pad[0], 20 * ratio + pad[1], 150 * ratio + pad[0], 60 * ratio + pad[1]]
+    outside_box = [-10, 0, 70, 70]  # 왼쪽/아래 padding 밖까지 나간 box
+    prediction = makePrediction([exact_box, outside_box], [0.9, 0.8], [9, 6])
+
+    result = decodePredictions(prediction, ratio, pad, img.shape[:2], conf_threshold=0.25, iou_threshold=0.7, max_det=300)
+
+    np.testing.assert_allclose(result.boxes.xyxy, [[50, 20, 150, 60], [0, 0, 200, 100]], atol=1e-4)
@@ -0,0 +1,123 @@
+import os
+import re
+import shutil
+import numpy as np
+from yolo.yolo_inference.detection import iterPageImages
+from yolo.yolo_inference.detector_service import modelInputSize
+from yolo.yolo_inference.model_init import PT_MODEL_PATH, ONNX_MODEL_PATH, ONNX_INT8_MODEL_PATH
+from yolo.yolo_inference.rasterize import DEFAULT_IMGSZ
+from util.console_utils import print_info, print_warning
+from util.mupdf_lock import openPdfLocked
+
+'''
+onnx backend용 모델 파일을 만드는 모듈. (학습/배포 준비 단계에서 한 번 실행)
+
+  - exportOnnxModel: best.pt를 고정 입력 크기(1 x 3 x imgsz x imgsz)의 ONNX 모델로 export (ultralytics 필요)
+  - quantizeOnnxModel: ONNX 모델을 int8로 양자화 (onnxruntime.quantization 필요)
+    calibration용 PDF를 주면 실제 페이지 이미지로 activation 범위를 잡는 static 양자화를,
+    없으면 가중치만 양자화하는 dynamic 양자화를 수행합니다.
+'''
+
+MODULE_NODE_PATTERN = re.compile(r"/model\.(\d+)/(.*)")  # ultralytics export node 이름: /model.<module 번호>/<module 안 경로>
+MAX_CALIBRATION_PAGES = 64  # static 양자화 calibration에 사용할 최대 페이지 수
+
+
+def exportOnnxModel(pt_path=PT_MODEL_PATH, onnx_path=ONNX_MODEL_PATH, imgsz=None, opset=12):
+    """
+    best.pt를 ONNX로 export해서 onnx_path에 저장하고 경로 반환.
+    입력 크기는 imgsz(None이면 best.pt의 입력 크기)로 고정하고, 후처리(NMS)는 onnx_backend에서 직접 수행하므로 포함하지 않습니다.
+    """
+    from ultralytics import YOLO
+
+    model = YOLO(pt_path)
+    imgsz = imgsz or modelInputSize(model)
+    exported_path = model.export(format="onnx", imgsz=imgsz, opset=opset, simplify=True, dynamic=False, nms=False)
+    if os.path.abspath(exported_path) != os.path.abspath(onnx_path):
+        shutil.move(exported_path, onnx_path)
+
+    print_info(f"ONNX 모델 export 완료: {onnx_path} (imgsz={imgsz})")
+    return onnx_path
+
+
+def iterCalibrationInputs(pdf_paths, imgsz, max_pages=MAX_CALIBRATION_PAGES):
+    """calibration용 PDF 페이지를 onnx backend와 같은 방식으로 렌더링/전처리한 모델 입력을 차례로 반환"""
+    from yolo.yolo_inference.onnx_backend import imageToInput
+
+    page_count = 0
+    for pdf_path in pdf_paths:
+        with openPdfLocked(pdf_path) as doc:
+            for _, img, _ in iterPageImages(doc, imgsz=imgsz, dpi=0):
+                if page_count >= max_pages:
+                    return
+                tensor, _, _ = imageToInput(img, imgsz)
+                yield tensor
+                page_count += 1
+
+
+def detectHeadDecodeNodes(node_names):
+    """
+    양자화에서 제외할 Detect head의 box 디코딩 node 이름 목록.
+    box 분포(DFL) 디코딩 부분은 int8로 바꾸면 좌표 오차가 커지므로 float로 남깁니다.
+    Detect head의 module 번호는 모델 구조마다 다르므로(YOLOv8은 22, YOLO11은 23 등) dfl node가 있는 마지막 module을 Detect head로 보고,
+    그 안의 dfl node와 head 바로 아래 연산(Split, Sub, Add, Mul, Concat 등 디코딩)을 반환합니다. conv branch(cv2, cv3 등)는 양자화합니다.
+    """
+    modules = [(match, name) for name in node_names if (match := MODULE_NODE_PATTERN.fullmatch(name))]
+    dfl_modules = [int(match.group(1)) for match, _ in modules if match.group(2).startswith("dfl/")]
+    if not dfl_modules:
+        return []
+
+    head_module = max(dfl_modules)
+    return [
+        name for match, name in modules
+        if int(match.group(1)) == head_module and (match.group(2).startswith("dfl/") or "/" not in match.group(2))
+    ]
+
+
+def quantizeOnnxModel(onnx_path=ONNX_MODEL_PATH, int8_path=ONNX_INT8_MODEL_PATH, calibration_pdfs=None,
+                      max_calibration_pages=MAX_CALIBRATION_PAGES):
+    """
+    ONNX 모델을 int8로 양자화해서 int8_path에 저장하고 경로 반환.
+
+    Args:
+        onnx_path (str): exportOnnxModel로 만든 ONNX 모델 경로
+        int8_path (str): 양자화한 모델을 저장할 경로
+        calibration_pdfs (list[str] | None): static 양자화 calibration에 사용할 PDF 경로들 (None이면 dynamic 양자화)
+        max_calibration_pages (int): calibration에 사용할 최대 페이지 수
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static,
+    )
+
+    model = onnx.load(onnx_path)
+    nodes_to_exclude = detectHeadDecodeNodes([node.name for node in model.graph.node])
+    if not nodes_to_exclude:
+        print_warning(f"Detect head의 dfl node를 찾지 못해 모든 node를 양자화합니다: {onnx_path}")
+
+    if not calibration_pdfs:
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8, nodes_to_exclude=nodes_to_exclude)
+        print_info(f"int8 dynamic 양자화 완료: {int8_path}")
+        return int8_path
+
+    model_input = model.graph.input[0]
+    input_name = model_input.name
+    imgsz = model_input.type.tensor_type.shape.dim[2].dim_value or DEFAULT_IMGSZ
+
+    class PdfCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.inputs = iterCalibrationInputs(calibration_pdfs, imgsz, max_calibration_pages)
+
+        def get_next(self):
+            tensor = next(self.inputs, None)
+            return None if tensor is None else {input_name: tensor.astype(np.float32)}
+
+    quantize_static(
+        onnx_path, int8_path, PdfCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=nodes_to_exclude,
+    )
+    print_info(f"int8 static 양자화 완료: {int8_path} (calibration PDF {len(calibration_pdfs)}개)")
+    return int8_path
@@ -0,0 +1,153 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import os
+import numpy as np
+import pymupdf
+from util.mupdf_lock import mupdf_lock
+from util.process_pool import getProcessContext
+
+# YOLO 입력 렌더링 설정
+DEFAULT_IMGSZ = int(os.environ.get("YOLO_IMGSZ", 640))  # 모델 입력 크기 (페이지 긴 변을 이 픽셀 수에 맞춰 렌더링)
+DEFAULT_RENDER_DPI = int(os.environ.get("YOLO_RENDER_DPI", 0))  # 0보다 크면 imgsz 대신 고정 DPI로 렌더링 (이전 방식: 150)
+
+
+def renderZoom(page_rect, imgsz=DEFAULT_IMGSZ, dpi=DEFAULT_RENDER_DPI):
+    """
+    YOLO 입력용 렌더링 배율 (PDF 1pt당 픽셀 수).
+
+    모델은 이미지의 긴 변을 imgsz로 줄여서 추론하므로, 그보다 크게 렌더링하면 렌더링/복사 비용만 늘어납니다.
+    그래서 기본적으로 페이지 긴 변이 imgsz 픽셀이 되는 배율을 쓰고, dpi가 주어지면 dpi / 72를 씁니다.
+    """
+    if dpi:
+        return dpi / 72
+    long_side = max(page_rect.width, page_rect.height)
+    return imgsz / long_side if long_side > 0 else 1.0
+
+
+def rasterizePageRange(file_path, start, end, imgsz=DEFAULT_IMGSZ, dpi=DEFAULT_RENDER_DPI):
+    """
+    worker 프로세스에서 실행되는 함수.
+    자체 pymupdf 문서 핸들로 [start, end) 범위의 페이지를 렌더링하고,
+    각 페이지의 RGB 버퍼를 공유 메모리에 기록한 뒤 (page_num, 공유 메모리 이름, shape, 렌더링 배율)만 반환합니다.
+    이미지 바이트는 pickle로 전달되지 않습니다.
+    """
+    pages = []
+
+    with pymupdf.open(file_path) as doc:
+        for page_idx in range(start, end):
+            page = doc[page_idx]
+            zoom = renderZoom(page.rect, imgsz=imgsz, dpi=dpi)
+            pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            samples = pix.samples_mv
+
+            shm = shared_memory.SharedMemory(create=True, size=max(len(samples), 1))
+            shm.buf[:len(samples)] = samples
+
+            # 공유 메모리 해제(unlink)는 부모 프로세스가 담당하므로 worker 쪽 추적에서 제외
+            resource_tracker.unregister(shm._name, "shared_memory")
+            shm.close()
+
+            pages.append((page_idx + 1, shm.name, (pix.height, pix.width, pix.n), zoom))
+
+    return pages
+
+
+def readSharedImage(shm_name, shape):
+    """
+    공유 메모리에 기록된 페이지 이미지를 np.ndarray(H x W x 3)로 읽고 공유 메모리를 해제하는 함수.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        img = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # RGBA 이미지일 경우 RGB로 변환 (알파 채널 제거)
+    if shape[2] == 4:
+        img = img[:, :, :3]
+
+    return img
+
+
+def releaseSharedImages(pages):
+    """읽지 않고 버리는 페이지들의 공유 메모리 해제"""
+    for _, shm_name, _, _ in pages:
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def splitPageRuns(page_indices, max_pages):
+    """정렬된 페이지 index들을 연속된 (start, end) 구간으로 나눔 (구간 길이는 최대 max_pages)"""
+    ranges = []
+    for page_idx in page_indices:
+        if ranges and ranges[-1][1] == page_idx and ranges[-1][1] - ranges[-1][0] < max_pages:
+            ranges[-1] = (ranges[-1][0], page_idx + 1)
+        else:
+            ranges.append((page_idx, page_idx + 1))
+    return ranges
+
+
+def iterRasterizedPages(file_path, imgsz=DEFAULT_IMGSZ, dpi=DEFAULT_RENDER_DPI, workers=None, pages_per_task=4, page_indices=None):
+    """
+    여러 프로세스로 페이지를 병렬 렌더링하며 (page_num, img, 렌더링 배율)을 페이지 순서대로 내보내는 generator.
+
+    - 문서를 pages_per_task 페이지씩 나눠 worker들에게 배분합니다.
+    - 동시에 처리 중인 작업 수를 workers * 2로 제한해, 추론이 렌더링보다 느려도
+      공유 메모리에 쌓이는 페이지 수가 무한히 늘어나지 않게 합니다.
+
+    Args:
+        file_path (str): PDF 파일 경로
+        imgsz (int): 모델 입력 크기 (페이지 긴 변을 이 픽셀 수로 렌더링)
+        dpi (int): 0보다 크면 imgsz 대신 사용할 고정 렌더링 해상도
+        workers (int): worker 프로세스 수 (None이면 CPU 코어 수)
+        pages_per_task (int): worker 한 번 호출에서 렌더링할 페이지 수
+        page_indices (list[int]): 렌더링할 페이지 index들 (None이면 전체 페이지)
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if page_indices is None:
+        with mupdf_lock, pymupdf.open(file_path) as doc:
+            page_indices = range(len(doc))
+
+    page_ranges = deque(splitPageRuns(sorted(page_indices), pages_per_task))
+    pending = deque()
+
+    # worker가 부모의 스레드/락 상태를 물려받지 않도록 fork 대신 forkserver(없으면 spawn) 방식 사용
+    with ProcessPoolExecutor(max_workers=workers, mp_context=getProcessContext()) as executor:
+        def submitNext():
+            while page_ranges and len(pending) < workers * 2:
+                start, end = page_ranges.popleft()
+                pending.append(executor.submit(rasterizePageRange, file_path, start, end, imgsz, dpi))
+
+        try:
+            submitNext()
+            while pending:
+                pages = pending.popleft().result()
+                submitNext()
+
+                for i, (page_num, shm_name, shape, zoom) in enumerate(pages):
+                    try:
+                        img = readSharedImage(shm_name, shape)
+                    except BaseException:
+                        releaseSharedImages(pages[i + 1:])
+                        raise
+
+                    try:
+                        yield page_num, img, zoom
+                    except BaseException:
+                        # consumer가 중간에 멈춘 경우 남은 페이지의 공유 메모리 해제
+                        releaseSharedImages(pages[i + 1:])
+                        raise
+        finally:
+            # 아직 소비되지 않은 작업의 공유 메모리 해제
+            for future in pending:
+                try:
+                    releaseSharedImages(future.result())
+                except Exception:
+                    pass